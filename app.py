@@ -1,7 +1,12 @@
-from fastapi import FastAPI, Request, HTTPException
+import time
+startup_started = time.perf_counter()  # before the heavy imports, so time-to-ready covers them
+
+from fastapi import FastAPI, APIRouter, Request, HTTPException
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse, PlainTextResponse, JSONResponse
 import pickle
 import numpy as np
 import json
@@ -13,31 +18,80 @@ from typing import List, Dict, Any, Union
 import uvicorn
 import os
 import logging
+import asyncio
+import math
+import hashlib
+
+import feature_engine
+import movement_codec
+from session_state import SessionStateStore
+from detection_cadence import CadencePolicy
+from shared_state import (SharedStateStore, SharedSessionStates, SharedCadencePolicy, SharedModelVersion, file_lock,
+                          deployment_token, claim_once)
+from inference_scheduler import InferenceScheduler
+from result_cache import ResultCache, window_key
+import prefilter
+from compiled_forest import CompiledForest, profiled_precision
+from execution import ExecutionLayer
+from storage import SessionStore
+from retention import SessionRetention
+import dashboard_stats
+from live_feed import LiveFeed
+from event_log import EventLogger, setup_logging
+from metrics import MetricsRegistry, StageTimings
+from config import database_config as db_config
+from config import logging_config as log_config
+
+startup_timings = StageTimings()
+startup_timings.started = startup_started
+startup_timings.since_start("imports")
 
 # Setup logging
-logging.basicConfig(level=logging.INFO)
+log_listener = setup_logging(
+    level=logging.INFO,
+    json_format=log_config.LOG_FORMAT == "json",
+    use_queue=log_config.LOG_USE_QUEUE,
+    queue_max=log_config.LOG_QUEUE_MAX
+)
 logger = logging.getLogger(__name__)
+# Hot-path events, sampled per event type according to the logging profile
+events = EventLogger(logger, sample_rates=log_config.sample_rates(), json_format=log_config.LOG_FORMAT == "json")
 
 app = FastAPI(title="TouchGuard Bot Detection", version="1.0.0")
+app.state.ready = False  # set once startup, including warmup, has finished
 
 # Mount static files and templates
 app.mount("/static", StaticFiles(directory="frontend/static"), name="static")
 templates = Jinja2Templates(directory="frontend/templates")
 
 # Database setup
-DB_FILE = "touchguard.db"
+DB_FILE = db_config.DB_FILE
 
 def init_database():
-    """Initialize SQLite database with proper schema"""
-    # Delete existing database to start fresh
-    if os.path.exists(DB_FILE):
-        os.remove(DB_FILE)
-        logger.info("🗑️ Existing database deleted")
+    """Create the schema once per deployment, whichever worker gets the lock first"""
+    with file_lock(DB_FILE + ".lock"):
+        reset = db_config.DB_RESET_ON_START and claim_once(DB_FILE + ".reset", deployment_token(WORKERS))
+        create_schema(reset)
+        model_versions.store.install(reset=reset)
+
+def create_schema(reset):
+    """Create the schema if needed; sessions are kept across restarts unless reset"""
+    if reset:
+        # Delete existing database to start fresh
+        if os.path.exists(DB_FILE):
+            os.remove(DB_FILE)
+            logger.info("🗑️ Existing database deleted")
+        # Stale WAL files must not be replayed into the new database
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(DB_FILE + suffix):
+                os.remove(DB_FILE + suffix)
     
     conn = sqlite3.connect(DB_FILE)
+    # Only takes effect on a new database; lets retention hand freed pages back a few at a time
+    conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
     cursor = conn.cursor()
     cursor.execute('''
-        CREATE TABLE sessions (
+        CREATE TABLE IF NOT EXISTS sessions (
             session_id TEXT PRIMARY KEY,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             user_type TEXT,
@@ -49,28 +103,177 @@ def init_database():
             user_agent TEXT
         )
     ''')
+    dashboard_stats.install(conn)
+    # A database written before the counters existed gets them filled in once
+    if not conn.execute('SELECT 1 FROM session_stats LIMIT 1').fetchone():
+        dashboard_stats.reconcile(conn)
+    counts = dashboard_stats.read_counts(conn)
     conn.commit()
     conn.close()
-    logger.info("✅ Database initialized with clean schema")
+    logger.info(f"✅ Database ready: {counts['total_sessions']} existing sessions kept")
+
+# Incremental feature state (sessions using incremental=True)
+SESSION_STATE_MAX_SESSIONS = 10000
+SESSION_STATE_IDLE_SECONDS = 30 * 60
+
+# Multi-worker deployments (uvicorn --workers N, gunicorn) set TOUCHGUARD_WORKERS=N: incremental
+# feature state and cadence schedules then live in db_config.SHARED_STATE_FILE, where every worker sees them
+WORKERS = int(os.environ.get("TOUCHGUARD_WORKERS", 1))
+SHARED_STATE_ENABLED = WORKERS > 1 or os.environ.get("TOUCHGUARD_SHARED_STATE", "0") == "1"
+
+# Server-driven detection cadence: settled sessions are re-checked less often, early calls deferred
+CADENCE_ENABLED = os.environ.get("TOUCHGUARD_CADENCE", "1") == "1"
+CADENCE_BASE_INTERVAL_S = 5.0
+CADENCE_MAX_INTERVAL_S = 60.0
+CADENCE_MIN_NEW_MOVEMENTS = 10
+CADENCE_MAX_NEW_MOVEMENTS = 200
+# Detections in flight at which the server counts as fully loaded
+CADENCE_LOAD_CAPACITY = 64
+
+# Verdicts for full-window payloads resent unchanged (idle cursor, client retries); incremental
+# calls change session state, so they are never answered from the cache
+RESULT_CACHE_ENABLED = os.environ.get("TOUCHGUARD_RESULT_CACHE", "1") == "1"
+RESULT_CACHE_MAX_ENTRIES = 10000
+RESULT_CACHE_TTL_SECONDS = 60.0
+
+# Rule-based checks ahead of the forest; traces they recognise as scripted skip feature extraction
+# and inference. TOUCHGUARD_PREFILTER_STAGES picks and orders the stages (see prefilter.STAGES)
+PREFILTER_ENABLED = os.environ.get("TOUCHGUARD_PREFILTER", "1") == "1"
+PREFILTER_STAGES = [stage for stage in os.environ.get("TOUCHGUARD_PREFILTER_STAGES",
+                                                      ",".join(prefilter.STAGES)).split(",") if stage]
+
+# Micro-batching of concurrent /api/detect inference calls
+INFERENCE_MAX_BATCH_SIZE = 32
+INFERENCE_MAX_WAIT_MS = 2.0
+
+# Evaluate the forest from flat node arrays instead of through sklearn
+USE_COMPILED_FOREST = True
+
+# Keep blocking work off the event loop: SQLite on a thread pool (0 workers = inline),
+# inference "inline", on a "thread" pool or on a shared-memory "process" pool
+DB_EXECUTOR_WORKERS = int(os.environ.get("TOUCHGUARD_DB_WORKERS", 4))
+INFERENCE_EXECUTOR = os.environ.get("TOUCHGUARD_INFERENCE_EXECUTOR", "thread")
+INFERENCE_EXECUTOR_WORKERS = int(os.environ.get("TOUCHGUARD_INFERENCE_WORKERS", 2))
+
+MODEL_PATH = os.environ.get("TOUCHGUARD_MODEL_PATH", 'models/touchguard_improved_bot_detector.pkl')
+# /api/admin/reload-model publishes the new pickle's digest in the shared state file; every other
+# worker or instance checks it at most this often before a detection and swaps the model in too
+MODEL_SYNC_INTERVAL_S = float(os.environ.get("TOUCHGUARD_MODEL_SYNC_SECONDS", 1.0))
+# Memory-mappable export of the compiled forest, shared by every worker process; rebuilt
+# from MODEL_PATH whenever the pickle changes
+FOREST_PATH = os.environ.get("TOUCHGUARD_FOREST_PATH", 'models/touchguard_forest')
+# "float32" halves the threshold and leaf arrays, about a quarter of the export. Unset, the model is
+# served at the precision train.py --variants profiled and recorded for it in VARIANTS_REPORT_PATH
+FOREST_PRECISION = os.environ.get("TOUCHGUARD_FOREST_PRECISION")
+VARIANTS_REPORT_PATH = os.environ.get("TOUCHGUARD_VARIANTS_REPORT", "model_variants.json")
+
+# Run synthetic traces through feature extraction and inference before /readyz reports ready
+WARMUP_ENABLED = os.environ.get("TOUCHGUARD_WARMUP", "1") == "1"
+WARMUP_TRACE_LENGTHS = [10, 100, 1000]
+
+# Add a Server-Timing header with per-stage durations to /api/detect responses
+SERVER_TIMING_HEADER = os.environ.get("TOUCHGUARD_SERVER_TIMING", "0") == "1"
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def unpickle_model():
+    with open(MODEL_PATH, 'rb') as f:
+        return pickle.load(f)
+
+def forest_precision(digest):
+    """TOUCHGUARD_FOREST_PRECISION, else the precision profiled for the pickle with this digest, else float64"""
+    return FOREST_PRECISION or profiled_precision(VARIANTS_REPORT_PATH, digest)
+
+def load_model():
+    """Inference model: the memory-mapped forest export, re-exported first if the pickle changed
+    
+    Returns (model, pickle digest, forest precision); the process-pool workers load with the same
+    digest and precision. model is None when nothing could be loaded.
+    """
+    try:
+        digest = file_digest(MODEL_PATH)
+    except OSError as e:
+        logger.error(f"❌ Error loading model: {e}")
+        return None, None, None
+    precision = forest_precision(digest)
+    if USE_COMPILED_FOREST:
+        forest = CompiledForest.load(FOREST_PATH, source_digest=digest, precision=precision)
+        if forest is not None:
+            logger.info(f"✅ Compiled forest mapped from {FOREST_PATH}: {forest.n_estimators} trees, "
+                        f"depth {forest.depth}, {precision}")
+            return forest, digest, precision
+    
+    try:
+        model = unpickle_model()
+        logger.info("✅ TouchGuard model loaded successfully")
+    except Exception as e:
+        logger.error(f"❌ Error loading model: {e}")
+        return None, None, None
+    if not USE_COMPILED_FOREST:
+        return model, digest, precision
+    
+    try:
+        forest = CompiledForest.from_sklearn(model, precision=precision)
+    except Exception as e:
+        logger.error(f"❌ Forest compilation failed, using sklearn model: {e}")
+        return model, digest, precision
+    try:
+        forest.save(FOREST_PATH, source_digest=digest)
+        forest = CompiledForest.load(FOREST_PATH, source_digest=digest, precision=precision) or forest
+        logger.info(f"💾 Compiled forest exported to {FOREST_PATH}")
+    except OSError as e:
+        logger.warning(f"⚠️ Could not export the compiled forest, keeping it in memory: {e}")
+    logger.info(f"✅ Compiled forest ready: {forest.n_estimators} trees, depth {forest.depth}, {precision}")
+    return forest, digest, precision
 
 # Load the trained model
-try:
-    with open('models/touchguard_improved_bot_detector.pkl', 'rb') as f:
-        model = pickle.load(f)
-    logger.info("✅ TouchGuard model loaded successfully")
-except Exception as e:
-    logger.error(f"❌ Error loading model: {e}")
-    model = None
+with startup_timings.stage("model_load"):
+    model, model_digest, model_precision = load_model()
 
 class MouseData(BaseModel):
     session_id: str
     movements: List[Dict[str, Any]]
     clicks: int
     timestamp: Union[str, float]
+    incremental: bool = False  # movements holds only the points sent since the last call
+    reset: bool = False        # incremental, but start the session state over from these movements
+
+def with_state_reset(result, update):
+    """Tell an incremental caller whether the server had lost its earlier points, so it resends its window"""
+    if update is not None:
+        result["state_reset"] = update.state_reset
+    return result
 
 class DetectionEngine:
     def __init__(self):
         self.model = model
+        if shared_store is not None:
+            self.session_states = SharedSessionStates(
+                shared_store,
+                max_sessions=SESSION_STATE_MAX_SESSIONS,
+                idle_timeout=SESSION_STATE_IDLE_SECONDS
+            )
+        else:
+            self.session_states = SessionStateStore(
+                max_sessions=SESSION_STATE_MAX_SESSIONS,
+                idle_timeout=SESSION_STATE_IDLE_SECONDS
+            )
+        self.scheduler = InferenceScheduler(
+            self.predict_proba,
+            max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+            max_wait_ms=INFERENCE_MAX_WAIT_MS,
+            execution=execution
+        )
+        self.results = ResultCache(max_entries=RESULT_CACHE_MAX_ENTRIES, ttl=RESULT_CACHE_TTL_SECONDS)
+        self.prefilter = prefilter.PrefilterCascade(stages=PREFILTER_STAGES) if PREFILTER_ENABLED else None
+    
+    def set_model(self, new_model):
+        """Swap in a new model; cached verdicts from the old one are dropped"""
+        # Model first: a request that sees the new cache generation must also see the new model
+        self.model = new_model
+        self.results.invalidate()
     
     def get_real_ip(self, request: Request) -> str:
         """Get real client IP address"""
@@ -88,148 +291,236 @@ class DetectionEngine:
     
     def parse_mouse_behavior(self, movements):
         """Extract coordinates from movement data"""
-        coords = []
-        for move in movements:
-            if isinstance(move, dict) and 'x' in move and 'y' in move:
-                try:
-                    coords.append((float(move['x']), float(move['y'])))
-                except (ValueError, TypeError):
-                    continue
-        return coords
+        return feature_engine.coordinates_of(movements)
     
     def extract_features(self, movements, click_count):
         """Extract 18 behavioral features"""
-        if len(movements) < 3:
-            return None
-        
-        x_coords = [m[0] for m in movements]
-        y_coords = [m[1] for m in movements]
-        
-        velocities = []
-        accelerations = []
-        direction_changes = []
-        distances = []
-        pauses = []
-        
-        for i in range(1, len(movements)):
-            dx = x_coords[i] - x_coords[i-1]
-            dy = y_coords[i] - y_coords[i-1]
-            distance = np.sqrt(dx**2 + dy**2)
-            distances.append(distance)
-            velocity = max(distance, 0.1)
-            velocities.append(velocity)
-            
-            if velocity < 2:
-                pauses.append(1)
-            
-            if i > 1:
-                prev_velocity = velocities[-2] if len(velocities) > 1 else velocity
-                acceleration = velocity - prev_velocity
-                accelerations.append(acceleration)
-            
-            if i > 1 and distance > 0:
-                prev_dx = x_coords[i-1] - x_coords[i-2]
-                prev_dy = y_coords[i-1] - y_coords[i-2]
-                if prev_dx != 0 or prev_dy != 0:
-                    angle_current = np.arctan2(dy, dx)
-                    angle_prev = np.arctan2(prev_dy, prev_dx)
-                    angle_diff = abs(angle_current - angle_prev)
-                    if angle_diff > np.pi:
-                        angle_diff = 2*np.pi - angle_diff
-                    direction_changes.append(angle_diff)
-        
         try:
-            features = [
-            # --- Velocity-based Features (from the list of speeds between points) ---
-            np.mean(velocities) if velocities else 0,                      # 1. Average mouse speed
-            np.std(velocities) if len(velocities) > 1 else 0,            # 2. Speed variation (standard deviation)
-            np.max(velocities) if velocities else 0,                     # 3. Maximum speed
-            np.min(velocities) if velocities else 0,                     # 4. Minimum speed
-            np.median(velocities) if velocities else 0,                  # 5. Median speed
-            np.var(velocities) if len(velocities) > 1 else 0,           # 17. Variance of speed (another measure of variation)
-
-            # --- Acceleration-based Features (from the change in speed) ---
-            np.mean(accelerations) if accelerations else 0,              # 6. Average acceleration
-            np.std(accelerations) if len(accelerations) > 1 else 0,      # 7. Acceleration variation (standard deviation)
-
-            # --- Direction-based Features (from the change in angle) ---
-            np.mean(direction_changes) if direction_changes else 0,       # 8. Average change in direction (how curvy the path is)
-            np.std(direction_changes) if len(direction_changes) > 1 else 0, # 9. Direction change variation (standard deviation)
-
-            # --- Overall Movement Features ---
-            len(movements),                                               # 10. Total number of recorded mouse coordinates
-            sum(distances) if distances else 0,                           # 11. Total distance traveled by the cursor
-            click_count,                                                  # 12. Total number of clicks
-            len(pauses),                                                  # 13. Number of pauses (moments of very low speed)
-            (max(x_coords) - min(x_coords)) if x_coords else 0,          # 14. The horizontal distance covered (width of movement)
-            (max(y_coords) - min(y_coords)) if y_coords else 0,          # 15. The vertical distance covered (height of movement)
-            len(movements) / (sum(distances) + 1) if distances else 0,   # 16. Movement efficiency (ratio of points to distance)
-            (sum(distances) / len(movements)) if movements and distances else 0 # 18. Average step size between points
-        ]
-                    
-            features = [float(f) if not np.isnan(f) and not np.isinf(f) else 0.0 for f in features]
+            features = feature_engine.extract_features(movements, click_count)
+            if features is None:
+                return None
             
             # Log feature extraction for debugging
-            logger.info(f"🧠 Features extracted: velocity_mean={features[0]:.3f}, velocity_std={features[1]:.3f}, movement_count={features[9]}")
+            events.info("detect.features",
+                        "🧠 Features extracted: velocity_mean={velocity_mean:.3f}, velocity_std={velocity_std:.3f}, movement_count={movement_count}",
+                        velocity_mean=features[0], velocity_std=features[1], movement_count=features[10])
             
-            return features if len(features) == 18 else None
+            return features if len(features) == feature_engine.NUM_FEATURES else None
             
         except Exception as e:
             logger.error(f"❌ Feature extraction error: {e}")
             return None
     
-    def predict(self, session_id: str, movements: List[Dict], clicks: int, ip_address: str, user_agent: str):
+    def extract_incremental_features(self, session_id: str, movements, click_count, reset: bool = False,
+                                     timings: StageTimings = None, timestamps=None):
+        """Fold new points into the session's running state; returns a SessionUpdate"""
+        timings = timings or StageTimings()
+        with timings.stage("features"):
+            return self.session_states.update(session_id, movements, click_count, reset=reset, timestamps=timestamps)
+    
+    def prepare_features(self, session_id: str, movements: List[Dict], clicks: int, update=None,
+                         timings: StageTimings = None):
+        """Parse movements and extract features; returns (features, movement_count, error)
+        
+        update is the SessionUpdate of an incremental call, whose features are already computed.
+        """
+        timings = timings or StageTimings()
+        with timings.stage("parse"):
+            coords = self.parse_mouse_behavior(movements)
+        if update is not None:
+            features, movement_count = update.features, update.count
+            if movement_count < 3:
+                return None, movement_count, "Insufficient movement data"
+        else:
+            if len(coords) < 3:
+                return None, len(coords), "Insufficient movement data"
+            with timings.stage("features"):
+                features = self.extract_features(coords, clicks)
+            movement_count = len(movements)
+        
+        if not features or len(features) != 18:
+            return None, movement_count, "Feature extraction failed"
+        return features, movement_count, None
+    
+    def prefilter_timestamps(self, movements, timestamps, timings: StageTimings):
+        """Timestamps for the cascade's timing checks; packed payloads arrive with them decoded"""
+        if timestamps is not None or self.prefilter is None:
+            return timestamps
+        with timings.stage("prefilter"):
+            return prefilter.timestamps_of(movements)
+    
+    def run_prefilter(self, coords, timestamps, timings: StageTimings):
+        """The cascade's (verdict, flags) for this call's points; verdict is None when the model decides
+        
+        Incremental calls pass the session's timestamp window, so the timing checks never judge one
+        call's points alone.
+        """
+        if self.prefilter is None:
+            return None, ()
+        with timings.stage("prefilter"):
+            return self.prefilter.evaluate(coords, timestamps)
+    
+    def predict_proba(self, batch):
+        """Class probabilities for a 2-D batch of feature vectors"""
+        return self.model.predict_proba(batch)
+    
+    def finalize_prediction(self, session_id: str, features, probabilities, movement_count: int,
+                            ip_address: str):
+        """Turn a probability row into a result and log it"""
+        # Same class predict() would pick, without a second pass over the forest
+        prediction = self.model.classes_[int(np.argmax(probabilities))]
+        confidence = max(probabilities) * 100
+        
+        result = {
+            "session_id": session_id,
+            "is_bot": bool(prediction),
+            "confidence": round(float(confidence), 2),
+            "classification": "Bot" if prediction else "Human",
+            "timestamp": datetime.now().isoformat(),
+            "movement_count": movement_count,
+            "features": features
+        }
+        
+        # Console logging for verification
+        events.info("detect.result",
+                    "🔍 DETECTION RESULT: {classification} ({confidence}%) | IP: {ip} | Session: {session}... | Movements: {movements}",
+                    classification=result['classification'], confidence=result['confidence'],
+                    ip=ip_address, session=session_id[:16], movements=movement_count)
+        
+        return result
+    
+    def finalize_prefiltered(self, session_id: str, verdict, movement_count: int, ip_address: str):
+        """Result for a trace the prefilter short-circuited as scripted; no features were extracted"""
+        bot_probability = verdict.confidence / 100
+        probabilities = np.where(np.asarray(self.model.classes_) == 1, bot_probability, 1 - bot_probability)
+        result = self.finalize_prediction(session_id, None, probabilities, movement_count, ip_address)
+        result["prefilter"] = verdict.stage
+        return result
+    
+    def predict(self, session_id: str, movements: List[Dict], clicks: int, ip_address: str, user_agent: str,
+                incremental: bool = False, timings: StageTimings = None, timestamps=None, reset: bool = False):
         """Make bot/human prediction"""
         try:
             if not self.model:
                 return {"error": "Model not loaded"}
             
-            coords = self.parse_mouse_behavior(movements)
-            if not coords or len(coords) < 3:
-                return {"error": "Insufficient movement data"}
+            timings = timings or StageTimings()
+            with timings.stage("parse"):
+                coords = feature_engine.to_coordinate_array(self.parse_mouse_behavior(movements))
+            timestamps = self.prefilter_timestamps(movements, timestamps, timings)
+            # Every incremental call folds its points in, whichever path decides it
+            update = None
+            if incremental:
+                update = self.extract_incremental_features(session_id, coords, clicks, reset, timings, timestamps)
+                timestamps = update.timestamps
+            verdict, flags = self.run_prefilter(coords, timestamps, timings)
+            if verdict is not None:
+                movement_count = update.count if incremental else len(movements)
+                result = self.finalize_prefiltered(session_id, verdict, movement_count, ip_address)
+            else:
+                model_started = time.perf_counter()
+                features, movement_count, error = self.prepare_features(session_id, coords, clicks, update, timings)
+                if error:
+                    return with_state_reset({"error": error}, update)
+                
+                with timings.stage("inference"):
+                    probabilities = self.predict_proba([features])[0]
+                model_ms = (time.perf_counter() - model_started) * 1000
+                result = self.finalize_prediction(session_id, features, probabilities,
+                                                  movement_count if incremental else len(movements), ip_address)
+                if self.prefilter is not None:
+                    self.prefilter.record_model_path(model_ms, flags, result["is_bot"])
+            if flags:
+                result["prefilter_flags"] = list(flags)
+            with_state_reset(result, update)
             
-            features = self.extract_features(coords, clicks)
-            if not features or len(features) != 18:
-                return {"error": "Feature extraction failed"}
-            
-            prediction = self.model.predict([features])[0]
-            probabilities = self.model.predict_proba([features])[0]
-            confidence = max(probabilities) * 100
+            # Save to database
+            with timings.stage("save"):
+                self.save_prediction(session_id, result, ip_address, user_agent)
+            return result
             
-            result = {
-                "session_id": session_id,
-                "is_bot": bool(prediction),
-                "confidence": round(confidence, 2),
-                "classification": "Bot" if prediction else "Human",
-                "timestamp": datetime.now().isoformat(),
-                "movement_count": len(movements),
-                "features": features
-            }
+        except Exception as e:
+            logger.error(f"❌ Prediction error: {e}")
+            return {"error": f"Prediction failed: {str(e)}"}
+    
+    async def predict_async(self, session_id: str, movements: List[Dict], clicks: int, ip_address: str,
+                            user_agent: str, incremental: bool = False, timings: StageTimings = None,
+                            timestamps=None, reset: bool = False):
+        """Make bot/human prediction, batching inference with other in-flight requests"""
+        try:
+            if not self.model:
+                return {"error": "Model not loaded"}
             
-            # Save to database
-            self.save_prediction(session_id, result, ip_address, user_agent)
+            timings = timings or StageTimings()
+            generation = self.results.generation
+            with timings.stage("parse"):
+                coords = feature_engine.to_coordinate_array(self.parse_mouse_behavior(movements))
+            cache_key = None
+            if RESULT_CACHE_ENABLED and not incremental:
+                with timings.stage("cache"):
+                    cache_key = window_key(session_id, coords, clicks)
+                    cached = self.results.get(cache_key)
+                if cached is not None:
+                    # Same window as a recent call: skip feature extraction and inference
+                    result = {**cached, "timestamp": datetime.now().isoformat(), "cached": True}
+                    await self.record_prediction(session_id, result, ip_address, user_agent, timings)
+                    return result
             
-            # Console logging for verification
-            logger.info(f"🔍 DETECTION RESULT: {result['classification']} ({result['confidence']}%)")
-            logger.info(f"📍 IP: {ip_address} | Session: {session_id[:16]}... | Movements: {len(movements)}")
+            timestamps = self.prefilter_timestamps(movements, timestamps, timings)
+            update = None
+            if incremental:
+                # Every incremental call folds its points in, whichever path decides it. The shared
+                # state transaction may wait for another worker's update to the session
+                update = await run_shared(self.extract_incremental_features, session_id, coords, clicks, reset,
+                                          timings, timestamps)
+                timestamps = update.timestamps
+            verdict, flags = self.run_prefilter(coords, timestamps, timings)
+            if verdict is not None:
+                movement_count = update.count if incremental else len(movements)
+                result = self.finalize_prefiltered(session_id, verdict, movement_count, ip_address)
+            else:
+                model_started = time.perf_counter()
+                features, movement_count, error = self.prepare_features(session_id, coords, clicks, update, timings)
+                if error:
+                    return with_state_reset({"error": error}, update)
+                
+                # Includes the wait for the micro-batch to fill
+                with timings.stage("inference"):
+                    probabilities = await self.scheduler.submit(features)
+                model_ms = (time.perf_counter() - model_started) * 1000
+                result = self.finalize_prediction(session_id, features, probabilities,
+                                                  movement_count if incremental else len(movements), ip_address)
+                if self.prefilter is not None:
+                    self.prefilter.record_model_path(model_ms, flags, result["is_bot"])
+            if flags:
+                # Timing checks that fired; on their own they never decide a trace
+                result["prefilter_flags"] = list(flags)
+            with_state_reset(result, update)
+            if cache_key is not None:
+                self.results.put(cache_key, result, generation)
             
+            await self.record_prediction(session_id, result, ip_address, user_agent, timings)
             return result
             
         except Exception as e:
             logger.error(f"❌ Prediction error: {e}")
             return {"error": f"Prediction failed: {str(e)}"}
     
-    def save_prediction(self, session_id: str, result: Dict, ip_address: str, user_agent: str):
-        """Save prediction to database"""
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
+    async def record_prediction(self, session_id: str, result: Dict, ip_address: str, user_agent: str,
+                                timings: StageTimings):
+        """Save a result without blocking the event loop and push it to open admin dashboards"""
+        with timings.stage("save"):
+            await execution.run_db(self.save_prediction, session_id, result, ip_address, user_agent)
         
+        live_feed.publish("prediction", {"session": [
+            session_id, result["timestamp"], result["classification"], result["confidence"], "active",
+            result["movement_count"], result["timestamp"], ip_address, user_agent
+        ]})
+    
+    def save_prediction(self, session_id: str, result: Dict, ip_address: str, user_agent: str):
+        """Queue the prediction for the batched database writer"""
         try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO sessions 
-                (session_id, created_at, user_type, confidence, movement_count, last_prediction, ip_address, user_agent, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            storage.enqueue_upsert((
                 session_id,
                 datetime.now(),
                 result['classification'],
@@ -240,36 +531,243 @@ class DetectionEngine:
                 user_agent,
                 'active'
             ))
-            
-            conn.commit()
-            logger.info(f"✅ Database: Session {session_id[:16]}... saved - {result['classification']} - IP: {ip_address}")
+            events.info("db.queued", "✅ Database: Session {session}... queued - {classification} - IP: {ip}",
+                        session=session_id[:16], classification=result['classification'], ip=ip_address)
             
         except Exception as e:
             logger.error(f"❌ Database save error: {e}")
-        finally:
-            conn.close()
 
 # Initialize components
+storage = SessionStore(
+    DB_FILE,
+    pool_size=db_config.DB_POOL_SIZE,
+    journal_mode=db_config.DB_JOURNAL_MODE,
+    synchronous=db_config.DB_SYNCHRONOUS,
+    busy_timeout_ms=db_config.DB_BUSY_TIMEOUT_MS,
+    batch_size=db_config.WRITE_BATCH_SIZE,
+    flush_interval_ms=db_config.WRITE_FLUSH_INTERVAL_MS,
+    queue_max=db_config.WRITE_QUEUE_MAX
+)
+execution = ExecutionLayer(
+    db_workers=DB_EXECUTOR_WORKERS,
+    inference_mode=INFERENCE_EXECUTOR,
+    inference_workers=INFERENCE_EXECUTOR_WORKERS,
+    model_path=MODEL_PATH,
+    compile_forest=USE_COMPILED_FOREST,
+    max_batch_rows=INFERENCE_MAX_BATCH_SIZE,
+    num_features=feature_engine.NUM_FEATURES,
+    forest_path=FOREST_PATH if USE_COMPILED_FOREST else None,
+    source_digest=model_digest,
+    precision=model_precision
+)
+live_feed = LiveFeed()
+retention = SessionRetention(
+    storage,
+    db_config.ARCHIVE_DIR,
+    db_config.SESSION_TTL_SECONDS,
+    batch_size=db_config.RETENTION_BATCH_SIZE,
+    max_batches=db_config.RETENTION_MAX_BATCHES,
+    vacuum_pages=db_config.VACUUM_PAGES_PER_PASS
+)
+shared_store = SharedStateStore(
+    db_config.SHARED_STATE_FILE,
+    busy_timeout_ms=db_config.DB_BUSY_TIMEOUT_MS
+) if SHARED_STATE_ENABLED else None
+# Always in the shared state file, so sticky single-worker instances follow a reload as well
+model_versions = SharedModelVersion(shared_store or SharedStateStore(db_config.SHARED_STATE_FILE,
+                                                                     busy_timeout_ms=db_config.DB_BUSY_TIMEOUT_MS))
+served_digest = model_digest   # pickle digest of the model this worker serves
+followed_digest = None         # last published digest this worker acted on
+model_checked_at = 0.0
+model_swap_lock = asyncio.Lock()
 detector = DetectionEngine()
+detections_in_flight = 0
+cadence_settings = dict(
+    base_interval=CADENCE_BASE_INTERVAL_S,
+    max_interval=CADENCE_MAX_INTERVAL_S,
+    min_new_movements=CADENCE_MIN_NEW_MOVEMENTS,
+    max_new_movements=CADENCE_MAX_NEW_MOVEMENTS,
+    load=lambda: detections_in_flight / CADENCE_LOAD_CAPACITY,
+    max_sessions=SESSION_STATE_MAX_SESSIONS,
+    idle_timeout=SESSION_STATE_IDLE_SECONDS
+)
+cadence = SharedCadencePolicy(shared_store, **cadence_settings) if shared_store else CadencePolicy(**cadence_settings)
+
+async def run_shared(fn, *args):
+    """Call fn inline, or on the DB pool when it reads or writes the shared state file"""
+    if shared_store is None:
+        return fn(*args)
+    return await execution.run_db(fn, *args)
+
+# Pipeline metrics served on /metrics
+metrics_registry = MetricsRegistry()
+detect_requests = metrics_registry.counter("touchguard_detect_requests_total", "Detection requests received")
+detect_blocked = metrics_registry.counter("touchguard_detect_blocked_total",
+                                          "Detection calls refused because an admin blocked the session")
+detect_deferred = metrics_registry.counter("touchguard_detect_deferred_total",
+                                           "Detection calls deferred because the session was not yet due")
+detect_movements = metrics_registry.histogram(
+    "touchguard_detect_movement_count", "Movement points per detection request",
+    buckets=[3, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+)
+metrics_registry.register("touchguard_inference_batch_size", "Rows per inference micro-batch",
+                          detector.scheduler.batch_sizes)
+metrics_registry.register("touchguard_inference_queue_wait_ms", "Time rows waited for their micro-batch",
+                          detector.scheduler.queue_wait_ms)
+metrics_registry.register("touchguard_db_write_batch_size", "Rows per database write transaction",
+                          storage.batch_sizes)
+metrics_registry.register("touchguard_cadence_interval_seconds", "Next-check intervals assigned to sessions",
+                          cadence.intervals)
+metrics_registry.register("touchguard_result_cache_lookups_total", "Result cache lookups for full-window detections",
+                          detector.results.hits, outcome="hit")
+metrics_registry.register("touchguard_result_cache_lookups_total", "Result cache lookups for full-window detections",
+                          detector.results.misses, outcome="miss")
+ready_gauge = metrics_registry.gauge("touchguard_ready", "1 once startup and warmup have finished")
+metrics_registry.register("touchguard_sessions_evicted_total", "Idle sessions archived and deleted by retention",
+                          retention.evicted)
+
+def record_detect_error(kind):
+    metrics_registry.counter("touchguard_detect_errors_total", "Failed detection requests by kind", kind=kind).inc()
+
+def record_detect_result(result):
+    if result.get("error"):
+        record_detect_error("rejected")
+        return
+    metrics_registry.counter("touchguard_detect_verdicts_total", "Detection verdicts by class",
+                             classification=result["classification"]).inc()
+    detect_movements.observe(result["movement_count"])
+
+def record_stage_timings(timings: StageTimings):
+    for stage, duration_ms in timings.stages.items():
+        metrics_registry.histogram("touchguard_detect_stage_ms", "Time spent in each /api/detect stage",
+                                   stage=stage).observe(duration_ms)
+
+class TimedRoute(APIRoute):
+    """Route that times the whole request, including body parsing and MouseData validation"""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request):
+            timings = StageTimings()
+            request.state.timings = timings
+            detect_requests.inc()
+            try:
+                response = await handler(request)
+            except RequestValidationError:
+                record_detect_error("validation")
+                raise
+            except HTTPException:
+                record_detect_error("exception")
+                raise
+            finally:
+                timings.since_start("total")
+                record_stage_timings(timings)
+            if SERVER_TIMING_HEADER:
+                response.headers["Server-Timing"] = timings.server_timing()
+            return response
+
+        return timed_handler
+
+detect_router = APIRouter(route_class=TimedRoute)
+
+def synthetic_warmup_traces():
+    """Random-walk movement traces, one per WARMUP_TRACE_LENGTHS entry"""
+    rng = np.random.default_rng(0)
+    return [np.cumsum(rng.integers(-25, 26, size=(n, 2)), axis=0).astype(np.float64) + 500
+            for n in WARMUP_TRACE_LENGTHS]
+
+async def warmup():
+    """Exercise feature extraction, batched inference and the DB pool; nothing is saved"""
+    features = [feature_engine.extract_features(coords, 1) for coords in synthetic_warmup_traces()]
+    if detector.model is not None:
+        # One full micro-batch, then a single row on every inference worker
+        rows = [features[i % len(features)] for i in range(INFERENCE_MAX_BATCH_SIZE)]
+        await asyncio.gather(*(detector.scheduler.submit(row) for row in rows))
+        await asyncio.gather(*(execution.run_inference(detector.predict_proba, np.array(features[:1]))
+                               for _ in range(max(INFERENCE_EXECUTOR_WORKERS, 1))))
+    await execution.run_db(read_counts)
 
 @app.on_event("startup")
 async def startup_event():
-    init_database()
-    logger.info("🚀 TouchGuard Bot Detection System started")
+    global followed_digest
+    with startup_timings.stage("database"):
+        init_database()
+        storage.start()
+    execution.start()
+    # A digest published before this worker started is already on disk, or was superseded
+    followed_digest = await execution.run_db(model_versions.current)
+    if WARMUP_ENABLED:
+        with startup_timings.stage("warmup"):
+            await warmup()
+    app.state.reconcile_task = asyncio.create_task(reconcile_stats_periodically())
+    app.state.counts_task = asyncio.create_task(live_feed.run_counts_ticker(read_live_counts))
+    app.state.retention_task = (asyncio.create_task(run_retention_periodically())
+                                if db_config.RETENTION_ENABLED else None)
+    startup_timings.since_start("ready")
+    for stage, duration_ms in startup_timings.stages.items():
+        metrics_registry.gauge("touchguard_startup_seconds", "Time spent in each startup stage; ready is the total",
+                               stage=stage).set(round(duration_ms / 1000, 6))
+    app.state.ready = detector.model is not None
+    ready_gauge.set(int(app.state.ready))
+    logger.info(f"🚀 TouchGuard Bot Detection System started, ready in {startup_timings.stages['ready']:.0f} ms")
+
+async def reconcile_stats_periodically():
+    """Recount the dashboard counters now and then in case a write bypassed the triggers"""
+    while True:
+        await asyncio.sleep(db_config.STATS_RECONCILE_SECONDS)
+        try:
+            counts = await execution.run_db(storage.run_write, dashboard_stats.reconcile)
+            logger.info(f"📊 Dashboard counters reconciled: {counts}")
+        except Exception as e:
+            logger.error(f"❌ Counter reconciliation failed: {e}")
+
+def run_retention_pass():
+    """One retention pass; workers take turns, so a batch is never archived twice"""
+    with file_lock(DB_FILE + ".retention"):
+        return retention.run_pass()
+
+async def run_retention_periodically():
+    """Archive and delete idle sessions, then compact the database, every retention interval"""
+    while True:
+        await asyncio.sleep(db_config.RETENTION_INTERVAL_SECONDS)
+        try:
+            result = await execution.run_db(run_retention_pass)
+            if result["evicted"]:
+                live_feed.publish("evict", {"sessions": result["evicted"]})
+                logger.info(f"🧹 Retention: {result['evicted']} idle sessions archived to {db_config.ARCHIVE_DIR} "
+                            f"in {result['seconds']:.2f}s, {result['freed_pages']} pages freed")
+        except Exception as e:
+            logger.error(f"❌ Retention pass failed: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.ready = False
+    ready_gauge.set(0)
+    app.state.reconcile_task.cancel()
+    app.state.counts_task.cancel()
+    if app.state.retention_task is not None:
+        app.state.retention_task.cancel()
+    execution.shutdown()
+    storage.close()
+    logger.info("🛑 TouchGuard Bot Detection System stopped")
 
 # Routes
 @app.get("/", response_class=HTMLResponse)
 async def homepage(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
-@app.get("/admin", response_class=HTMLResponse)
-async def admin_dashboard(request: Request):
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    
-    # Get recent sessions
-    cursor.execute('SELECT * FROM sessions ORDER BY last_prediction DESC LIMIT 50')
-    sessions = cursor.fetchall()
+def load_dashboard_stats():
+    """Recent sessions and per-class counts for the admin dashboard"""
+    with storage.connection() as conn:
+        cursor = conn.cursor()
+        
+        # Get recent sessions
+        cursor.execute('SELECT * FROM sessions ORDER BY last_prediction DESC LIMIT 50')
+        sessions = cursor.fetchall()
+        
+        # Get statistics from the trigger-maintained counters
+        counts = dashboard_stats.read_counts(conn)
     
     # Update session status based on last activity
     enhanced_sessions = []
@@ -284,86 +782,285 @@ async def admin_dashboard(request: Request):
                 session_list[4] = "inactive"
         enhanced_sessions.append(session_list)
     
-    # Get statistics
-    cursor.execute('SELECT COUNT(*) FROM sessions WHERE user_type = "Human"')
-    human_count = cursor.fetchone()[0]
-    
-    cursor.execute('SELECT COUNT(*) FROM sessions WHERE user_type = "Bot"')
-    bot_count = cursor.fetchone()[0]
-    
-    cursor.execute('SELECT COUNT(*) FROM sessions')
-    total_count = cursor.fetchone()[0]
-    
-    conn.close()
-    
-    stats = {
-        "total_sessions": total_count,
-        "human_sessions": human_count,
-        "bot_sessions": bot_count,
+    return {
+        **counts,
         "sessions": enhanced_sessions,
         "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "startup_time": "System online",
         "uptime": "Running",
         "last_activity_time": datetime.now().isoformat()
     }
+
+def read_counts():
+    with storage.connection() as conn:
+        return dashboard_stats.read_counts(conn)
+
+async def read_live_counts():
+    return await execution.run_db(read_counts)
+
+@app.get("/admin", response_class=HTMLResponse)
+async def admin_dashboard(request: Request):
+    stats = await execution.run_db(load_dashboard_stats)
     
-    logger.info(f"📊 Admin Dashboard loaded: {human_count} humans, {bot_count} bots, {total_count} total sessions")
+    logger.info(f"📊 Admin Dashboard loaded: {stats['human_sessions']} humans, {stats['bot_sessions']} bots, {stats['total_sessions']} total sessions")
     
     return templates.TemplateResponse("admin.html", {"request": request, "stats": stats})
 
-@app.post("/api/detect")
-async def detect_bot(data: MouseData, request: Request):
+async def swap_model():
+    """Load the model file again and serve it from this worker; returns its digest, None when it failed"""
+    global served_digest
+    async with model_swap_lock:
+        new_model, digest, precision = await execution.run_db(load_model)
+        if new_model is None:
+            return None
+        # Process-pool workers hold their own copy, so they are replaced before the cache is invalidated
+        execution.restart_inference(digest, precision)
+        detector.set_model(new_model)
+        served_digest = digest
+        return digest
+
+async def follow_model_reloads():
+    """Swap in a model another worker published through reload-model, checking every MODEL_SYNC_INTERVAL_S"""
+    global model_checked_at, followed_digest
+    now = time.monotonic()
+    if now - model_checked_at < MODEL_SYNC_INTERVAL_S:
+        return
+    model_checked_at = now
+    published = await execution.run_db(model_versions.current)
+    if published is None or published in (served_digest, followed_digest):
+        return
+    followed_digest = published
+    digest = await swap_model()
+    if digest is None:
+        logger.error("❌ Model reloaded by another worker could not be loaded here; serving the previous one")
+    else:
+        logger.info(f"🔄 Model reloaded by another worker: serving {digest[:12]}")
+
+async def run_detection(session_id: str, movements, clicks: int, incremental: bool, request: Request,
+                        timings: StageTimings, last_coordinates, timestamps=None, reset: bool = False):
+    """Shared body of the JSON and packed detection endpoints"""
+    global detections_in_flight
+    await follow_model_reloads()
+    # The sessions table is shared by every worker, so a block applies wherever the next call lands
+    if await execution.run_db(is_session_blocked, session_id):
+        detect_blocked.inc()
+        return JSONResponse(status_code=403, content={"error": "Session blocked", "blocked": True})
+    
+    # Sessions that are not due yet are turned away before any parsing or inference
+    if CADENCE_ENABLED:
+        # A full window is capped by the tracker, so only incremental payloads are held to min_new_movements
+        decision = await run_shared(cadence.check, session_id, len(movements) if incremental else None)
+        if not decision.allowed:
+            detect_deferred.inc()
+            return JSONResponse(
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(decision.retry_after))},
+                content={"error": "Detection deferred", "deferred": True,
+                         "next_check_ms": int(decision.retry_after * 1000),
+                         "min_new_movements": decision.min_new_movements}
+            )
+    
+    detections_in_flight += 1
     try:
         # Get real IP address
         client_ip = detector.get_real_ip(request)
         user_agent = request.headers.get("user-agent", "")
         
         # Log the detection request
-        logger.info(f"🖱️ MOUSE MOVEMENT DATA RECEIVED:")
-        logger.info(f"   📍 IP Address: {client_ip}")
-        logger.info(f"   🆔 Session: {data.session_id[:16]}...")
-        logger.info(f"   📊 Movements: {len(data.movements)}")
-        logger.info(f"   🖱️ Clicks: {data.clicks}")
-        logger.info(f"   🖥️ User Agent: {user_agent[:50]}...")
+        events.info("detect.request",
+                    "🖱️ MOUSE MOVEMENT DATA RECEIVED: IP {ip} | Session {session}... | Movements: {movements} | Clicks: {clicks} | User Agent: {user_agent}...",
+                    ip=client_ip, session=session_id[:16], movements=len(movements),
+                    clicks=clicks, user_agent=user_agent[:50])
         
-        # Log some sample coordinates for verification
-        if len(data.movements) >= 5:
-            sample_movements = data.movements[-5:]  # Last 5 movements
-            logger.info(f"   🎯 Last 5 coordinates: {[(m.get('x', 0), m.get('y', 0)) for m in sample_movements]}")
+        # Log some sample coordinates for verification; only built when the event is kept
+        if len(movements) >= 5:
+            events.info("detect.coordinates", "   🎯 Last 5 coordinates: {coordinates}",
+                        coordinates=last_coordinates)
         
-        result = detector.predict(
-            data.session_id,
-            data.movements,
-            data.clicks,
+        result = await detector.predict_async(
+            session_id,
+            movements,
+            clicks,
             client_ip,
-            user_agent
+            user_agent,
+            incremental=incremental,
+            timings=timings,
+            timestamps=timestamps,
+            reset=reset
         )
+        record_detect_result(result)
+        
+        # Tell the client when the next call is worth making
+        if CADENCE_ENABLED and not result.get("error"):
+            interval, min_new_movements = await run_shared(cadence.record, session_id, result["is_bot"],
+                                                           result["confidence"])
+            result["next_check_ms"] = int(interval * 1000)
+            result["min_new_movements"] = min_new_movements
         
         # Log the prediction result
         if not result.get("error"):
-            logger.info(f"🎯 PREDICTION COMPLETE:")
-            logger.info(f"   🤖 Classification: {result.get('classification', 'Unknown')}")
-            logger.info(f"   📈 Confidence: {result.get('confidence', 0)}%")
-            logger.info(f"   ⚡ Is Bot: {result.get('is_bot', False)}")
+            events.info("detect.response",
+                        "🎯 PREDICTION COMPLETE: {classification} | Confidence: {confidence}% | Is Bot: {is_bot}",
+                        classification=result.get('classification', 'Unknown'),
+                        confidence=result.get('confidence', 0), is_bot=result.get('is_bot', False))
         else:
-            logger.warning(f"⚠️ Prediction error: {result.get('error')}")
+            events.warning("detect.error", "⚠️ Prediction error: {error}", error=result.get('error'))
         
         return result
         
     except Exception as e:
         logger.error(f"❌ Detection endpoint error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        detections_in_flight -= 1
+
+@detect_router.post("/api/detect")
+async def detect_bot(data: MouseData, request: Request):
+    timings = getattr(request.state, "timings", None) or StageTimings()
+    # Body read, JSON decoding and MouseData validation all happen before the handler runs
+    timings.since_start("validation")
+    return await run_detection(
+        data.session_id, data.movements, data.clicks, data.incremental, request, timings,
+        lambda: [(m.get('x', 0), m.get('y', 0)) for m in data.movements[-5:]], reset=data.reset
+    )
+
+@detect_router.post("/api/detect/packed")
+async def detect_bot_packed(request: Request):
+    """Same as /api/detect, for an application/octet-stream body in the movement_codec format"""
+    timings = getattr(request.state, "timings", None) or StageTimings()
+    body = await request.body()
+    timings.since_start("validation")
+    try:
+        with timings.stage("decode"):
+            packed = movement_codec.decode(body)
+    except ValueError as e:
+        raise RequestValidationError([{"type": "value_error", "loc": ("body",), "msg": str(e), "input": None}])
+    return await run_detection(
+        packed.session_id, packed.coords, packed.clicks, packed.incremental, request, timings,
+        lambda: packed.coords[-5:].tolist(), timestamps=packed.timestamps, reset=packed.reset
+    )
+
+app.include_router(detect_router)
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "ok", "uptime_s": round(time.perf_counter() - startup_timings.started, 3), "pid": os.getpid(),
+            "model_digest": served_digest}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: model loaded, database open and warmup finished; 503 until then"""
+    startup_ms = {stage: round(duration_ms, 1) for stage, duration_ms in startup_timings.stages.items()}
+    if not app.state.ready:
+        reason = "model not loaded" if detector.model is None else "starting"
+        return JSONResponse(status_code=503, content={"status": reason, "startup_ms": startup_ms})
+    return {"status": "ready", "time_to_ready_ms": startup_ms.get("ready"), "startup_ms": startup_ms}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Request, verdict and per-stage latency metrics in the Prometheus text format"""
+    return metrics_registry.render()
+
+@app.get("/api/admin/pipeline-stats")
+async def pipeline_stats():
+    """The /metrics data as JSON, with p50/p95/p99 per stage"""
+    return metrics_registry.snapshot()
+
+@app.get("/api/admin/cadence-stats")
+async def cadence_stats():
+    """Accepted and deferred detection calls, and the intervals sessions were given"""
+    return cadence.stats()
+
+@app.get("/api/admin/cache-stats")
+async def cache_stats():
+    """Hit and miss ratios of the detection result cache"""
+    return detector.results.stats()
+
+@app.get("/api/admin/prefilter-stats")
+async def prefilter_stats():
+    """Share of detections each prefilter stage answered, and the model time that saved"""
+    if detector.prefilter is None:
+        return {"enabled": False}
+    return {"enabled": True, **detector.prefilter.stats()}
+
+@app.post("/api/admin/reload-model")
+async def reload_model():
+    """Load the model file again, e.g. after retraining, and swap it in without a restart
+    
+    The other workers pick the new digest up from the shared state file within MODEL_SYNC_INTERVAL_S.
+    """
+    global followed_digest
+    digest = await swap_model()
+    if digest is None:
+        raise HTTPException(status_code=500, detail="Model could not be loaded")
+    followed_digest = digest
+    await execution.run_db(model_versions.publish, digest)
+    logger.info(f"🔄 Model reloaded, result cache generation {detector.results.generation}")
+    return {"message": "Model reloaded", "model_digest": digest, "sync_interval_s": MODEL_SYNC_INTERVAL_S,
+            "cache": detector.results.stats()}
+
+@app.get("/api/admin/inference-stats")
+async def inference_stats():
+    """Batch-size and queue-wait histograms for the inference scheduler"""
+    return detector.scheduler.stats()
+
+def fetch_session(session_id: str):
+    with storage.connection() as conn:
+        cursor = conn.execute('SELECT * FROM sessions WHERE session_id = ?', (session_id,))
+        return cursor.fetchone()
+
+def is_session_blocked(session_id: str):
+    with storage.connection() as conn:
+        cursor = conn.execute('SELECT 1 FROM sessions WHERE session_id = ? AND status = "blocked"', (session_id,))
+        return cursor.fetchone() is not None
+
+def mark_session_blocked(session_id: str):
+    # Goes through the writer queue so it lands after any pending upsert for this session
+    storage.execute_write('UPDATE sessions SET status = "blocked" WHERE session_id = ?', (session_id,))
+
+def remove_session(session_id: str):
+    storage.execute_write('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+
+@app.get("/api/admin/storage-stats")
+async def storage_stats():
+    """Write throughput, batch sizes and queue depth of the database writer"""
+    return storage.stats()
+
+@app.get("/api/admin/retention-stats")
+async def retention_stats():
+    """Sessions evicted so far, the last retention pass and the database size"""
+    return await execution.run_db(retention.stats)
+
+@app.get("/api/admin/log-stats")
+async def log_stats():
+    """Emitted and sampled-out event counts, plus records dropped by a full log queue"""
+    dropped = sum(getattr(handler, "dropped", 0) for handler in logging.getLogger().handlers)
+    return {**events.stats(), "queue_dropped": dropped}
+
+@app.get("/api/admin/events")
+async def admin_events():
+    """Server-sent stream of prediction, block, delete and counter events"""
+    subscriber = live_feed.subscribe()
+    return StreamingResponse(
+        live_feed.stream(subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/admin/snapshot")
+async def admin_snapshot():
+    """Current dashboard data as JSON, used by live dashboards to resync"""
+    return await execution.run_db(load_dashboard_stats)
+
+@app.get("/api/admin/feed-stats")
+async def feed_stats():
+    return live_feed.stats()
 
 @app.get("/api/session/{session_id}")
 async def get_session(session_id: str):
     """Get session details"""
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM sessions WHERE session_id = ?', (session_id,))
-    session = cursor.fetchone()
-    
-    conn.close()
+    session = await execution.run_db(fetch_session, session_id)
     
     if session:
         logger.info(f"👀 Session details requested: {session_id[:16]}...")
@@ -376,12 +1073,8 @@ async def get_session(session_id: str):
 @app.post("/api/admin/block/{session_id}")
 async def block_session(session_id: str):
     """Block a specific session"""
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    
-    cursor.execute('UPDATE sessions SET status = "blocked" WHERE session_id = ?', (session_id,))
-    conn.commit()
-    conn.close()
+    await execution.run_db(mark_session_blocked, session_id)
+    live_feed.publish("block", {"session_id": session_id}, affects_counts=False)
     
     logger.info(f"🚫 Session blocked: {session_id[:16]}...")
     return {"message": f"Session {session_id[:16]}... blocked successfully"}
@@ -389,12 +1082,10 @@ async def block_session(session_id: str):
 @app.delete("/api/admin/delete/{session_id}")
 async def delete_session(session_id: str):
     """Delete a session"""
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    
-    cursor.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
-    conn.commit()
-    conn.close()
+    await execution.run_db(remove_session, session_id)
+    live_feed.publish("delete", {"session_id": session_id})
+    await run_shared(detector.session_states.discard, session_id)
+    await run_shared(cadence.discard, session_id)
     
     logger.info(f"🗑️ Session deleted: {session_id[:16]}...")
     return {"message": f"Session {session_id[:16]}... deleted successfully"}
@@ -411,4 +1102,8 @@ if __name__ == "__main__":
     print("🤖 AI model ready for predictions")
     print("=" * 60)
     
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if WORKERS > 1:
+        # Each worker imports the app itself; they share the forest export, the database and the state file
+        uvicorn.run("app:app", host="0.0.0.0", port=8000, workers=WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,195 @@
+import re
+import json
+from collections import namedtuple
+
+import numpy as np
+
+# The dataset's total_behaviour notation: [m(x,y)] for a movement, [c(l)] / [c(r)] for a click
+MOVE_PATTERN = r'\[m\((\d+),(\d+)\)\]'
+CLICK_PATTERN = r'\[c\([lr]\)\]'
+TOKEN_PATTERN = re.compile(r'\[(?:m\((\d+),(\d+)\)|c\(([lr])\))\]')
+
+# Longest digit run the byte scanner accumulates exactly in int64
+MAX_COORDINATE_DIGITS = 18
+INT32_MAX = np.iinfo(np.int32).max
+
+# Below this many characters the regex pass beats the byte scanner's fixed numpy overhead
+MIN_SCAN_CHARS = 1000
+
+# Characters per chunk for the streaming readers; longer strings are also scanned in chunks this size
+STREAM_CHUNK_SIZE = 1 << 20
+
+BEHAVIOUR_KEY = re.compile(r'"total_behaviour"\s*:\s*"')
+
+_L_BRACKET, _R_BRACKET, _L_PAREN, _R_PAREN = b'[]()'
+_COMMA, _M, _C, _LEFT, _RIGHT = b',mclr'
+# Padding around the scanned bytes, so neighbour lookups never leave the buffer
+_PAD = 5
+
+# coords: (n, 2) int32 (int64 if a coordinate needs it); click_positions: index of the movement
+# that follows each click; click_buttons: b'l' or b'r' per click
+BehaviourTokens = namedtuple("BehaviourTokens", "coords click_positions click_buttons")
+
+
+def empty_tokens():
+    return BehaviourTokens(np.empty((0, 2), np.int32), np.empty(0, np.int64), np.empty(0, 'S1'))
+
+
+def _narrow(coords):
+    """int32 unless a coordinate does not fit"""
+    if not len(coords) or coords.max() <= INT32_MAX:
+        return coords.astype(np.int32)
+    return coords
+
+
+def tokenize_regex(behaviour):
+    """Single regex pass; used for short strings and for non-ASCII digits the byte scanner skips"""
+    coords = []
+    click_positions = []
+    click_buttons = []
+    for x, y, button in TOKEN_PATTERN.findall(behaviour):
+        if button:
+            click_positions.append(len(coords))
+            click_buttons.append(button)
+        else:
+            coords.append((int(x), int(y)))
+    coords = np.array(coords, dtype=np.int64).reshape(-1, 2)
+    return BehaviourTokens(_narrow(coords), np.array(click_positions, dtype=np.int64),
+                           np.array(click_buttons, dtype='S1'))
+
+
+def _digit_values(buf, starts, ends):
+    """Integer value of each digit run buf[start:end], gathered as one (runs, digits) block"""
+    if not len(starts):
+        return np.zeros(0, dtype=np.int64)
+    lengths = ends - starts
+    place = np.arange(int(lengths.max()))
+    # Digit k of a run counts from its last character; places past the run's length read as 0
+    in_run = place < lengths[:, None]
+    digits = buf[np.where(in_run, ends[:, None] - 1 - place, 0)].astype(np.int64) - ord('0')
+    return (digits * in_run) @ (10 ** place)
+
+
+def scan(behaviour):
+    """Movements and clicks of an ASCII total_behaviour string in one vectorized scan
+
+    The string is viewed as bytes; digit runs are located once and accepted
+    as a movement when framed by "[m(" x "," y ")]". Coordinates land
+    directly in an (n, 2) integer array with no per-token Python objects.
+    """
+    raw = behaviour.encode('ascii')
+    buf = np.zeros(len(raw) + 2 * _PAD, dtype=np.uint8)
+    buf[_PAD:_PAD + len(raw)] = np.frombuffer(raw, dtype=np.uint8)
+
+    is_digit = (buf - ord('0')) < 10  # uint8 wraps everything below '0' past 9
+    edges = np.flatnonzero(is_digit[1:] != is_digit[:-1]) + 1
+    starts, ends = edges[0::2], edges[1::2]
+
+    # Run i is an x coordinate when "[m(" precedes it, "," follows it and run i + 1 is y, closed by ")]"
+    is_x = ((buf[starts - 1] == _L_PAREN) & (buf[starts - 2] == _M) & (buf[starts - 3] == _L_BRACKET)
+            & (buf[ends] == _COMMA))
+    if len(starts):
+        is_x[:-1] &= ((starts[1:] == ends[:-1] + 1) & (buf[ends[1:]] == _R_PAREN)
+                      & (buf[ends[1:] + 1] == _R_BRACKET))
+        is_x[-1] = False
+    x_runs = np.flatnonzero(is_x)
+    # Runs interleaved x, y, x, y... so the values reshape straight into (n, 2)
+    runs = np.column_stack([x_runs, x_runs + 1]).ravel()
+    if len(runs) and (ends[runs] - starts[runs]).max() > MAX_COORDINATE_DIGITS:
+        raise ValueError(f"coordinate longer than {MAX_COORDINATE_DIGITS} digits")
+    coords = _digit_values(buf, starts[runs], ends[runs]).reshape(-1, 2)
+
+    c = np.flatnonzero(buf == _C)
+    buttons = buf[c + 2]
+    c = c[(buf[c - 1] == _L_BRACKET) & (buf[c + 1] == _L_PAREN) & ((buttons == _LEFT) | (buttons == _RIGHT))
+          & (buf[c + 3] == _R_PAREN) & (buf[c + 4] == _R_BRACKET)]
+    click_positions = np.searchsorted(starts[x_runs], c)
+    return BehaviourTokens(_narrow(coords), click_positions.astype(np.int64), buf[c + 2].view('S1'))
+
+
+def _tokenize_piece(behaviour):
+    if len(behaviour) < MIN_SCAN_CHARS or not behaviour.isascii():
+        return tokenize_regex(behaviour)
+    return scan(behaviour)
+
+
+def tokenize(behaviour):
+    """Movements and clicks of a total_behaviour string, exactly as MOVE_PATTERN and CLICK_PATTERN find them"""
+    if len(behaviour) > STREAM_CHUNK_SIZE:
+        return tokenize_stream(behaviour[i:i + STREAM_CHUNK_SIZE]
+                               for i in range(0, len(behaviour), STREAM_CHUNK_SIZE))
+    return _tokenize_piece(behaviour)
+
+
+def iter_tokens(chunks):
+    """Tokenize a behaviour string delivered in pieces, yielding BehaviourTokens per piece
+
+    Every token ends in "]" and contains no other "]", so each piece is cut
+    after its last "]" and the remainder carried into the next one; no
+    token is lost or split. Click positions count movements across the
+    whole stream.
+    """
+    carry = ""
+    seen = 0
+    for chunk in chunks:
+        text = carry + chunk
+        cut = text.rfind("]") + 1
+        carry = text[cut:]
+        if cut:
+            tokens = _tokenize_piece(text[:cut])
+            yield tokens._replace(click_positions=tokens.click_positions + seen)
+            seen += len(tokens.coords)
+    if carry:
+        tokens = _tokenize_piece(carry)
+        yield tokens._replace(click_positions=tokens.click_positions + seen)
+
+
+def tokenize_stream(chunks):
+    """All tokens of a chunked behaviour string, holding only one chunk of text at a time"""
+    parts = list(iter_tokens(chunks))
+    if not parts:
+        return empty_tokens()
+    coords = np.concatenate([p.coords for p in parts])
+    return BehaviourTokens(_narrow(coords), np.concatenate([p.click_positions for p in parts]),
+                           np.concatenate([p.click_buttons for p in parts]))
+
+
+def read_behaviour_chunks(json_file, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield the total_behaviour value of a mouse_movements.json in pieces of about chunk_size characters
+
+    Expects the dataset layout, where the value is a plain string. A value
+    using JSON escapes falls back to decoding the whole file.
+    """
+    with open(json_file, 'r', encoding='utf-8') as f:
+        head = ""
+        while True:
+            block = f.read(chunk_size)
+            head += block
+            match = BEHAVIOUR_KEY.search(head)
+            if match or not block:
+                break
+        if not match:
+            return
+        pending = head[match.end():]
+        emitted = 0
+        while True:
+            end = pending.find('"')
+            if pending.find('\\', 0, end if end >= 0 else len(pending)) >= 0:
+                break
+            if end >= 0:
+                if end:
+                    yield pending[:end]
+                return
+            if pending:
+                yield pending
+                emitted += len(pending)
+            pending = f.read(chunk_size)
+            if not pending:
+                raise ValueError(f"unterminated total_behaviour string in {json_file}")
+
+    # Escaped content: decode the whole file and continue after what was already yielded,
+    # which had no escapes and so reads the same decoded
+    with open(json_file, 'r', encoding='utf-8') as f:
+        behaviour = json.load(f)['total_behaviour']
+    for i in range(emitted, len(behaviour), chunk_size):
+        yield behaviour[i:i + chunk_size]
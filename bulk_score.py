@@ -0,0 +1,295 @@
+import os
+import csv
+import json
+import time
+import pickle
+import hashlib
+import argparse
+import warnings
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import behaviour_tokenizer
+import feature_engine
+from compiled_forest import CompiledForest, PRECISIONS, profiled_precision
+
+MODEL_PATH = 'models/touchguard_improved_bot_detector.pkl'
+FOREST_PATH = os.environ.get("TOUCHGUARD_FOREST_PATH", 'models/touchguard_forest')
+# Same precision the app serves: the override, else what train.py --variants profiled for the pickle
+FOREST_PRECISION = os.environ.get("TOUCHGUARD_FOREST_PRECISION")
+VARIANTS_REPORT_PATH = os.environ.get("TOUCHGUARD_VARIANTS_REPORT", "model_variants.json")
+
+# Sessions per worker task; each chunk is featurized and scored with one predict_proba call
+CHUNK_SIZE = 512
+# Chunks queued or running per worker, which bounds how much of the input is held in memory
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+STATUS_OK = "ok"
+STATUS_UNREADABLE = "unreadable"
+STATUS_INSUFFICIENT = "insufficient_movement"
+
+COLUMNS = ["session_id", "source", "status", "movement_count", "click_count", "is_bot", "confidence",
+           "classification"]
+
+# Per-process model used by score_chunk
+_model = None
+
+
+def load_scoring_model(model_path=MODEL_PATH, forest_path=FOREST_PATH, precision=FOREST_PRECISION,
+                       variants_report=VARIANTS_REPORT_PATH):
+    """The app's compiled forest export when it matches model_path and the precision, else the pickle compiled
+
+    precision defaults, as in the app, to the one variants_report records for this pickle.
+    """
+    with open(model_path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    precision = precision or profiled_precision(variants_report, digest)
+    if forest_path:
+        forest = CompiledForest.load(forest_path, source_digest=digest, precision=precision)
+        if forest is not None:
+            return forest
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model = pickle.loads(data)
+    return CompiledForest.from_sklearn(model, precision=precision)
+
+
+def _init_scoring_worker(model_path, forest_path, precision, variants_report):
+    global _model
+    _model = load_scoring_model(model_path, forest_path, precision, variants_report)
+
+
+def iter_inputs(path):
+    """("file", path, None) per session JSON under a directory, or ("line", path:n, bytes) per JSONL line"""
+    if os.path.isdir(path):
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.endswith(".json"):
+                    yield "file", os.path.join(dirpath, name), None
+        return
+    with open(path, 'rb') as f:
+        for number, line in enumerate(f, 1):
+            if line.strip():
+                yield "line", f"{path}:{number}", line
+
+
+def iter_chunks(items, chunk_size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_session(data, default_id):
+    """(session_id, coords, clicks, movement_count) from an /api/detect body or a dataset mouse_movements.json
+
+    movement_count is what /api/detect reports for the body: every entry of
+    movements, including the ones without usable coordinates.
+    """
+    if "total_behaviour" in data:
+        tokens = behaviour_tokenizer.tokenize(data["total_behaviour"])
+        coords, clicks = tokens.coords, len(tokens.click_positions)
+        movement_count = len(coords)
+    else:
+        movements = data.get("movements") or []
+        coords = feature_engine.coordinates_of(movements)
+        clicks = int(data.get("clicks") or 0)
+        movement_count = len(movements)
+    return str(data.get("session_id") or default_id), coords, clicks, movement_count
+
+
+def default_session_id(kind, source):
+    """Dataset files are named after their session folder; other files and lines after their source"""
+    if kind == "file":
+        folder, name = os.path.split(source)
+        return os.path.basename(folder) if name == "mouse_movements.json" else os.path.splitext(name)[0]
+    return source
+
+
+def score_chunk(chunk, with_features=False):
+    """Column dict for a chunk of iter_inputs items, featurized and scored in one batch"""
+    n = len(chunk)
+    session_ids, sources = [], []
+    status = np.full(n, STATUS_UNREADABLE, dtype=object)
+    movement_count = np.zeros(n, dtype=np.int64)
+    click_count = np.zeros(n, dtype=np.int64)
+    features = np.zeros((n, feature_engine.NUM_FEATURES), dtype=np.float64)
+
+    for i, (kind, source, payload) in enumerate(chunk):
+        session_id = default_session_id(kind, source)
+        try:
+            if kind == "file":
+                with open(source, 'rb') as f:
+                    payload = f.read()
+            session_id, coords, clicks, movements = parse_session(json.loads(payload), session_id)
+            row = feature_engine.extract_features(coords, clicks)
+            movement_count[i], click_count[i] = movements, clicks
+            if row is None or len(row) != feature_engine.NUM_FEATURES:
+                status[i] = STATUS_INSUFFICIENT
+            else:
+                features[i] = row
+                status[i] = STATUS_OK
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass
+        session_ids.append(session_id)
+        sources.append(source)
+
+    scored = status == STATUS_OK
+    is_bot = np.zeros(n, dtype=bool)
+    confidence = np.zeros(n, dtype=np.float64)
+    if scored.any():
+        probabilities = np.asarray(_model.predict_proba(features[scored]))
+        # Same verdict and confidence DetectionEngine.finalize_prediction reports
+        is_bot[scored] = np.asarray(_model.classes_)[probabilities.argmax(axis=1)].astype(bool)
+        confidence[scored] = np.round(probabilities.max(axis=1) * 100, 2)
+
+    columns = {
+        "session_id": np.array(session_ids, dtype=str),
+        "source": np.array(sources, dtype=str),
+        "status": status.astype(str),
+        "movement_count": movement_count,
+        "click_count": click_count,
+        "is_bot": is_bot,
+        "confidence": confidence,
+        "classification": np.where(scored, np.where(is_bot, "Bot", "Human"), "")
+    }
+    if with_features:
+        columns["features"] = features
+    return columns
+
+
+class CsvWriter:
+    def __init__(self, path, with_features=False):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.with_features = with_features
+        self.writer.writerow(COLUMNS + (feature_engine.FEATURE_NAMES if with_features else []))
+
+    def write(self, columns):
+        rows = zip(*(columns[name].tolist() for name in COLUMNS))
+        if self.with_features:
+            rows = (row + tuple(values) for row, values in zip(rows, columns["features"].tolist()))
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class NpzPartsWriter:
+    """Columnar output: one part-NNNNN.npz of column arrays per chunk, indexed by meta.json
+
+    np.load(part)[column] reads a column back; concatenate the parts listed
+    in meta.json for the whole run.
+    """
+
+    def __init__(self, directory, with_features=False):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.columns = COLUMNS + (["features"] if with_features else [])
+        self.parts = []
+
+    def write(self, columns):
+        name = f"part-{len(self.parts):05d}.npz"
+        np.savez(os.path.join(self.directory, name), **columns)
+        self.parts.append({"file": name, "rows": len(columns["session_id"])})
+
+    def close(self):
+        meta = {"columns": self.columns, "feature_names": feature_engine.FEATURE_NAMES, "parts": self.parts,
+                "rows": sum(part["rows"] for part in self.parts)}
+        with open(os.path.join(self.directory, "meta.json"), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+
+
+def score_inputs(input_path, output_path, output_format=None, workers=None, chunk_size=CHUNK_SIZE,
+                 model_path=MODEL_PATH, forest_path=FOREST_PATH, with_features=False, progress=True,
+                 precision=FOREST_PRECISION, variants_report=VARIANTS_REPORT_PATH):
+    """Stream input_path through the model in chunks and write one row per session, in input order
+
+    Chunks are scored on a process pool (workers=1 runs in-process) with a
+    bounded number in flight, so memory stays flat however large the input
+    is. Returns a summary with the row counts and sessions per second.
+    """
+    workers = workers or os.cpu_count() or 1
+    output_format = output_format or ("csv" if output_path.endswith(".csv") else "npz")
+    writer = (CsvWriter if output_format == "csv" else NpzPartsWriter)(output_path, with_features)
+    counts = dict.fromkeys([STATUS_OK, STATUS_UNREADABLE, STATUS_INSUFFICIENT], 0)
+    bots = 0
+    chunks_done = 0
+    start = time.perf_counter()
+
+    def record(columns):
+        nonlocal bots, chunks_done
+        writer.write(columns)
+        for value, count in zip(*np.unique(columns["status"], return_counts=True)):
+            counts[str(value)] += int(count)
+        bots += int(columns["is_bot"].sum())
+        chunks_done += 1
+        if progress and chunks_done % 10 == 0:
+            done = sum(counts.values())
+            print(f"Scored {done} sessions ({done / max(time.perf_counter() - start, 1e-9):.0f} sessions/s)")
+
+    chunks = iter_chunks(iter_inputs(input_path), chunk_size)
+    try:
+        if workers <= 1:
+            _init_scoring_worker(model_path, forest_path, precision, variants_report)
+            for chunk in chunks:
+                record(score_chunk(chunk, with_features))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_scoring_worker,
+                                     initargs=(model_path, forest_path, precision, variants_report)) as executor:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(executor.submit(score_chunk, chunk, with_features))
+                    if len(pending) >= workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                        record(pending.popleft().result())
+                while pending:
+                    record(pending.popleft().result())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    sessions = sum(counts.values())
+    return {
+        "sessions": sessions,
+        "scored": counts[STATUS_OK],
+        "bots": bots,
+        "unreadable": counts[STATUS_UNREADABLE],
+        "insufficient_movement": counts[STATUS_INSUFFICIENT],
+        "seconds": round(elapsed, 3),
+        "sessions_per_second": round(sessions / elapsed, 1) if elapsed else 0.0,
+        "workers": workers
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score archived sessions offline with the TouchGuard model")
+    parser.add_argument("input", help="directory of session JSON files, or a JSONL capture of /api/detect bodies")
+    parser.add_argument("output", help="CSV file, or a directory for columnar .npz parts")
+    parser.add_argument("--format", choices=["csv", "npz"], help="default: csv for a .csv output, else npz")
+    parser.add_argument("--workers", type=int, help="scoring processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="sessions per predict_proba call")
+    parser.add_argument("--model", default=MODEL_PATH, help="pickled model to score with")
+    parser.add_argument("--forest", default=FOREST_PATH,
+                        help="compiled forest export to map when it matches --model ('' to always compile)")
+    parser.add_argument("--precision", choices=PRECISIONS, default=FOREST_PRECISION,
+                        help="forest precision (default: the one --variants-report records for --model)")
+    parser.add_argument("--variants-report", default=VARIANTS_REPORT_PATH, help="train.py --variants report")
+    parser.add_argument("--features", action="store_true", help="also write the 18 extracted features")
+    parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args()
+
+    summary = score_inputs(args.input, args.output, args.format, args.workers, args.chunk_size, args.model,
+                           args.forest or None, args.features, not args.quiet, args.precision, args.variants_report)
+    print(f"\n✅ {summary['sessions']} sessions in {summary['seconds']:.2f}s "
+          f"({summary['sessions_per_second']:.0f} sessions/s on {summary['workers']} worker(s)): "
+          f"{summary['scored']} scored, {summary['bots']} bots, {summary['unreadable']} unreadable, "
+          f"{summary['insufficient_movement']} with too little movement")
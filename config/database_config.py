@@ -0,0 +1,37 @@
+import os
+
+# SQLite database file shared by the app and the background writer
+DB_FILE = os.environ.get("TOUCHGUARD_DB_FILE", "touchguard.db")
+
+# Long-lived read connections kept open by the pool
+DB_POOL_SIZE = 4
+
+# WAL lets readers run alongside the writer; NORMAL sync is durable across app crashes in WAL mode
+DB_JOURNAL_MODE = "WAL"
+DB_SYNCHRONOUS = "NORMAL"
+DB_BUSY_TIMEOUT_MS = 5000
+
+# Write-behind queue for save_prediction: one transaction per N rows or T milliseconds
+WRITE_BATCH_SIZE = 256
+WRITE_FLUSH_INTERVAL_MS = 50
+WRITE_QUEUE_MAX = 10000
+
+# Full recount of the trigger-maintained dashboard counters, to repair any drift
+STATS_RECONCILE_SECONDS = 600
+
+# Delete the database on startup instead of keeping sessions across restarts
+DB_RESET_ON_START = os.environ.get("TOUCHGUARD_DB_RESET", "0") == "1"
+
+# Per-session feature state and cadence schedules shared by every worker in multi-worker mode
+SHARED_STATE_FILE = os.environ.get("TOUCHGUARD_SHARED_STATE_FILE", DB_FILE + ".state")
+
+# Retention: sessions idle longer than the TTL are archived to gzipped JSONL day partitions
+# under ARCHIVE_DIR and deleted, RETENTION_BATCH_SIZE rows per writer transaction
+RETENTION_ENABLED = os.environ.get("TOUCHGUARD_RETENTION", "1") == "1"
+SESSION_TTL_SECONDS = float(os.environ.get("TOUCHGUARD_SESSION_TTL_SECONDS", 30 * 24 * 3600))
+ARCHIVE_DIR = os.environ.get("TOUCHGUARD_ARCHIVE_DIR", "archive/sessions")
+RETENTION_INTERVAL_SECONDS = 300
+RETENTION_BATCH_SIZE = 500
+RETENTION_MAX_BATCHES = 200
+# Free pages handed back to the filesystem after each pass (new databases use incremental auto_vacuum)
+VACUUM_PAGES_PER_PASS = 1000
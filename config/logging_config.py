@@ -0,0 +1,37 @@
+import os
+
+# "production" applies PRODUCTION_SAMPLE_RATES; set "development" locally to log every event
+LOG_PROFILE = os.environ.get("TOUCHGUARD_LOG_PROFILE", "production")
+
+# "text" writes console lines; "json" writes one structured object per line
+LOG_FORMAT = os.environ.get("TOUCHGUARD_LOG_FORMAT", "text")
+
+# Hand records to a background thread instead of writing them on the request path
+LOG_USE_QUEUE = os.environ.get("TOUCHGUARD_LOG_QUEUE", "1") != "0"
+LOG_QUEUE_MAX = 10000
+
+# Fraction of INFO events kept per event type in production; warnings and errors are never sampled
+PRODUCTION_SAMPLE_RATES = {
+    "detect.request": 0.01,
+    "detect.coordinates": 0.0,
+    "detect.features": 0.0,
+    "detect.result": 0.05,
+    "detect.response": 0.0,
+    "db.queued": 0.0,
+}
+
+
+def parse_sample_rates(spec):
+    """Parse "event=rate,event=rate" overrides, e.g. TOUCHGUARD_LOG_SAMPLE_RATES="detect.result=1" """
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        event, _, rate = item.partition("=")
+        rates[event.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+def sample_rates():
+    """Per-event sample rates for the active profile, with environment overrides applied"""
+    rates = dict(PRODUCTION_SAMPLE_RATES) if LOG_PROFILE == "production" else {}
+    rates.update(parse_sample_rates(os.environ.get("TOUCHGUARD_LOG_SAMPLE_RATES", "")))
+    return rates
@@ -0,0 +1,64 @@
+# Per-class session counters kept in step with the sessions table by triggers, so the
+# dashboard reads a few summary rows instead of counting the whole table. INSERT OR
+# REPLACE removes the old row through conflict resolution, which only fires the delete
+# trigger with recursive_triggers on (storage.open_connection enables it).
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS session_stats (
+        user_type TEXT PRIMARY KEY,
+        session_count INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_sessions_last_prediction ON sessions(last_prediction)',
+    '''
+    CREATE TRIGGER IF NOT EXISTS session_stats_insert AFTER INSERT ON sessions
+    BEGIN
+        INSERT INTO session_stats (user_type, session_count) VALUES (COALESCE(NEW.user_type, ''), 1)
+        ON CONFLICT(user_type) DO UPDATE SET session_count = session_count + 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS session_stats_delete AFTER DELETE ON sessions
+    BEGIN
+        UPDATE session_stats SET session_count = session_count - 1
+        WHERE user_type = COALESCE(OLD.user_type, '');
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS session_stats_update AFTER UPDATE OF user_type ON sessions
+    WHEN COALESCE(OLD.user_type, '') IS NOT COALESCE(NEW.user_type, '')
+    BEGIN
+        UPDATE session_stats SET session_count = session_count - 1
+        WHERE user_type = COALESCE(OLD.user_type, '');
+        INSERT INTO session_stats (user_type, session_count) VALUES (COALESCE(NEW.user_type, ''), 1)
+        ON CONFLICT(user_type) DO UPDATE SET session_count = session_count + 1;
+    END
+    ''',
+]
+
+
+def install(conn):
+    """Create the summary table, triggers and the last_prediction index"""
+    for statement in SCHEMA:
+        conn.execute(statement)
+
+
+def reconcile(conn):
+    """Rebuild the counters with one full scan; returns the corrected counts"""
+    conn.execute('DELETE FROM session_stats')
+    conn.execute('''
+        INSERT INTO session_stats (user_type, session_count)
+        SELECT COALESCE(user_type, ''), COUNT(*) FROM sessions GROUP BY COALESCE(user_type, '')
+    ''')
+    return read_counts(conn)
+
+
+def read_counts(conn):
+    """Human, bot and total session counts from the summary table"""
+    counts = dict(conn.execute('SELECT user_type, session_count FROM session_stats').fetchall())
+    return {
+        "human_sessions": counts.get("Human", 0),
+        "bot_sessions": counts.get("Bot", 0),
+        "total_sessions": sum(counts.values())
+    }
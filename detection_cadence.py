@@ -0,0 +1,157 @@
+import time
+import threading
+from collections import OrderedDict, deque, namedtuple
+
+from metrics import Histogram
+
+INTERVAL_S_BUCKETS = [5, 7.5, 10, 15, 20, 30, 45, 60, 90, 120]
+
+# allowed: run the detection; retry_after: seconds until the session is due (0 once it is);
+# min_new_movements: points the next call must carry
+CadenceDecision = namedtuple("CadenceDecision", "allowed retry_after min_new_movements")
+
+
+class SessionCadence:
+    """Recent verdicts and the next permitted check for one session"""
+
+    __slots__ = ('verdicts', 'next_check_at', 'min_new_movements', 'last_seen')
+
+    def __init__(self, history):
+        self.verdicts = deque(maxlen=history)  # (is_bot, confidence), oldest first
+        self.next_check_at = 0.0
+        self.min_new_movements = 0
+        self.last_seen = time.monotonic()
+
+
+class CadencePolicy:
+    """Server-driven schedule for how often each session is worth re-checking
+
+    After every verdict the session is given a next-check interval and a
+    minimum number of new movement points. Both grow geometrically from
+    base_interval / min_new_movements towards max_interval / max_new_movements
+    as the session becomes both confident (above ambiguous_below percent)
+    and stable (the last `history` verdicts agree). Ambiguous or
+    flip-flopping sessions stay at the base cadence. Server load, a
+    callable returning 0..1, pushes already-settled sessions towards the
+    slow end sooner. Calls that arrive before the session is due are
+    deferred without any feature extraction or inference.
+    """
+
+    def __init__(self, base_interval=5.0, max_interval=60.0, min_new_movements=10, max_new_movements=200,
+                 history=5, ambiguous_below=70.0, load=None, load_stretch=1.0, grace=0.25, max_sessions=10000,
+                 idle_timeout=1800, sweep_every=256):
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.min_new_movements = min_new_movements
+        self.max_new_movements = max_new_movements
+        self.history = history
+        self.ambiguous_below = ambiguous_below
+        self.load = load or (lambda: 0.0)
+        self.load_stretch = load_stretch
+        self.grace = grace  # tolerance for client timer jitter and network delay
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sweep_every = sweep_every
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._records = 0
+        self.accepted = 0
+        self.deferred = 0
+        self.evictions = 0
+        self.intervals = Histogram(INTERVAL_S_BUCKETS)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def settledness(self, verdicts, load=0.0):
+        """0 for an ambiguous or unsettled session, 1 for a confident one whose recent verdicts all agree"""
+        if not verdicts:
+            return 0.0
+        is_bot, confidence = verdicts[-1]
+        certainty = min(max((confidence - self.ambiguous_below) / (100.0 - self.ambiguous_below), 0.0), 1.0)
+        stability = sum(1 for v in verdicts if v[0] == is_bot) / self.history
+        score = certainty * stability
+        return min(score * (1 + self.load_stretch * min(max(load, 0.0), 1.0)), 1.0)
+
+    def schedule(self, verdicts, load=0.0):
+        """(interval seconds, minimum new movements) for a session with these recent verdicts"""
+        score = self.settledness(verdicts, load)
+        interval = self.base_interval * (self.max_interval / self.base_interval) ** score
+        min_new = self.min_new_movements * (self.max_new_movements / self.min_new_movements) ** score
+        return interval, int(round(min_new))
+
+    def check(self, session_id, new_movements, now=None):
+        """Whether a detection call carrying new_movements points should run now
+
+        Pass None for full-window payloads: they resend the client's last
+        points rather than new ones, so only the interval applies to them.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return self._decide(self._sessions.get(session_id), new_movements, now)
+
+    def _decide(self, state, new_movements, now):
+        if state is None:
+            self.accepted += 1
+            return CadenceDecision(True, 0.0, self.min_new_movements)
+        wait = state.next_check_at - now
+        too_few = new_movements is not None and new_movements < state.min_new_movements
+        if wait > self.grace or too_few:
+            self.deferred += 1
+            return CadenceDecision(False, max(wait, 0.0), state.min_new_movements)
+        self.accepted += 1
+        return CadenceDecision(True, 0.0, state.min_new_movements)
+
+    def record(self, session_id, is_bot, confidence, now=None):
+        """Fold a verdict into the session's history and return its new (interval, min_new_movements)"""
+        now = time.monotonic() if now is None else now
+        load = self.load()
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = self._sessions[session_id] = SessionCadence(self.history)
+            else:
+                self._sessions.move_to_end(session_id)
+            interval, min_new = self._apply(state, is_bot, confidence, now, load)
+
+            self._records += 1
+            if self._records % self.sweep_every == 0:
+                self._evict_idle()
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        self.intervals.observe(interval)
+        return interval, min_new
+
+    def _apply(self, state, is_bot, confidence, now, load):
+        state.verdicts.append((bool(is_bot), float(confidence)))
+        interval, min_new = self.schedule(state.verdicts, load)
+        state.next_check_at = now + interval
+        state.min_new_movements = min_new
+        state.last_seen = time.monotonic()
+        return interval, min_new
+
+    def discard(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        # Sessions are kept in least-recently-recorded order, so stop at the first fresh one
+        while self._sessions:
+            session_id, state = next(iter(self._sessions.items()))
+            if state.last_seen >= cutoff:
+                break
+            del self._sessions[session_id]
+            self.evictions += 1
+
+    def stats(self):
+        checks = self.accepted + self.deferred
+        return {
+            "sessions": len(self),
+            "accepted": self.accepted,
+            "deferred": self.deferred,
+            "deferred_ratio": round(self.deferred / checks, 4) if checks else 0.0,
+            "evictions": self.evictions,
+            "intervals_s": self.intervals.snapshot()
+        }
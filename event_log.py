@@ -0,0 +1,152 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import time
+
+
+class EventMessage:
+    """Log message for a named event, rendered only when a handler writes it"""
+
+    __slots__ = ('event', 'template', 'fields', 'json_format')
+
+    def __init__(self, event, template, fields, json_format):
+        self.event = event
+        self.template = template
+        self.fields = fields
+        self.json_format = json_format
+
+    def __str__(self):
+        if self.json_format:
+            return json.dumps({"event": self.event, **self.fields}, default=str)
+        return self.template.format(**self.fields)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; event fields are merged in at the top level"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name
+        }
+        if isinstance(record.msg, EventMessage):
+            entry["event"] = record.msg.event
+            entry.update(record.msg.fields)
+        else:
+            entry["message"] = record.getMessage()
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue records unformatted so message rendering happens on the listener thread
+
+    The stock QueueHandler formats every record on the calling thread before
+    queueing it. Event fields are plain values captured at emit time, so the
+    record can cross threads as-is. A full queue drops the record and counts
+    it instead of blocking the request.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(level=logging.INFO, json_format=False, use_queue=True, queue_max=10000):
+    """Configure the root logger like basicConfig, optionally behind a background queue listener
+
+    Returns the QueueListener (or None); it is stopped at interpreter exit.
+    Like basicConfig, does nothing if the root logger already has handlers.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return None
+    root.setLevel(level)
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if json_format else logging.Formatter(logging.BASIC_FORMAT))
+    if not use_queue:
+        root.addHandler(handler)
+        return None
+
+    log_queue = queue.Queue(maxsize=queue_max)
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+class EventLogger:
+    """Structured, sampled logging for hot paths
+
+    Each call names an event type. INFO-level events are kept with the
+    probability configured for their type (default_rate when unlisted);
+    warnings and errors are always kept. The sampling check runs before
+    anything is built, and fields given as zero-argument callables are only
+    evaluated for events that are kept, so a suppressed event costs a dict
+    lookup and a random draw.
+    """
+
+    def __init__(self, logger, sample_rates=None, default_rate=1.0, json_format=False):
+        self.logger = logger
+        self.sample_rates = dict(sample_rates or {})
+        self.default_rate = default_rate
+        self.json_format = json_format
+        self.emitted = 0
+        self.suppressed = 0
+        self._started_at = time.monotonic()
+
+    def enabled(self, event, level=logging.INFO):
+        """Whether an event of this type should be built and logged this time"""
+        if not self.logger.isEnabledFor(level):
+            return False
+        if level >= logging.WARNING:
+            return True
+        rate = self.sample_rates.get(event, self.default_rate)
+        if rate >= 1.0:
+            return True
+        return rate > 0.0 and random.random() < rate
+
+    def emit(self, event, template, level=logging.INFO, **fields):
+        """Log event with fields; template renders the text form, e.g. "Session {session}" """
+        if not self.enabled(event, level):
+            self.suppressed += 1
+            return
+        for key, value in fields.items():
+            if callable(value):
+                fields[key] = value()
+        self.emitted += 1
+        self.logger.log(level, EventMessage(event, template, fields, self.json_format))
+
+    def info(self, event, template, **fields):
+        self.emit(event, template, logging.INFO, **fields)
+
+    def warning(self, event, template, **fields):
+        self.emit(event, template, logging.WARNING, **fields)
+
+    def error(self, event, template, **fields):
+        self.emit(event, template, logging.ERROR, **fields)
+
+    def stats(self):
+        return {
+            "emitted": self.emitted,
+            "suppressed": self.suppressed,
+            "sample_rates": self.sample_rates,
+            "default_rate": self.default_rate,
+            "format": "json" if self.json_format else "text"
+        }
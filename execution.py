@@ -0,0 +1,156 @@
+import asyncio
+import pickle
+import hashlib
+import warnings
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from compiled_forest import CompiledForest
+
+INFERENCE_MODES = ("inline", "thread", "process")
+
+# Per-process model and attached feature buffers used by inference workers in "process" mode
+_worker_model = None
+_worker_buffers = {}
+
+
+def _init_inference_worker(model_path, compile_forest, forest_path=None, source_digest=None, precision="float64"):
+    """Load the model the parent serves: same pickle digest, same forest precision"""
+    global _worker_model
+    if compile_forest and forest_path:
+        # Memory-mapped export: every worker shares the parent's page-cache copy of the nodes
+        _worker_model = CompiledForest.load(forest_path, source_digest=source_digest, precision=precision)
+        if _worker_model is not None:
+            return
+    with open(model_path, 'rb') as f:
+        data = f.read()
+    if source_digest is not None and hashlib.sha256(data).hexdigest() != source_digest:
+        # Workers start lazily, so the pickle may have been retrained since the parent loaded it
+        raise RuntimeError(f"{model_path} changed since the model was loaded; reload the model")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        _worker_model = pickle.loads(data)
+    if compile_forest:
+        _worker_model = CompiledForest.from_sklearn(_worker_model, precision=precision)
+
+
+def _worker_predict_proba(shm_name, n_rows, n_features):
+    """Score rows the parent wrote into a shared-memory feature buffer"""
+    shm = _worker_buffers.get(shm_name)
+    if shm is None:
+        # Attach once per worker; the parent owns and unlinks the block
+        shm = _worker_buffers[shm_name] = shared_memory.SharedMemory(name=shm_name)
+    batch = np.ndarray((n_rows, n_features), dtype=np.float64, buffer=shm.buf)
+    return np.array(_worker_model.predict_proba(batch))
+
+
+class ExecutionLayer:
+    """Runs blocking work off the event loop
+
+    SQLite calls go to a bounded thread pool. Inference runs inline, in a
+    thread pool, or in a process pool that reads feature batches from
+    preallocated shared-memory buffers, so only small probability arrays
+    cross the process boundary.
+    """
+
+    def __init__(self, db_workers=4, inference_mode="thread", inference_workers=2,
+                 model_path=None, compile_forest=True, max_batch_rows=32, num_features=18, forest_path=None,
+                 source_digest=None, precision="float64"):
+        if inference_mode not in INFERENCE_MODES:
+            raise ValueError(f"inference_mode must be one of {INFERENCE_MODES}, got {inference_mode!r}")
+        self.db_workers = db_workers
+        self.inference_mode = inference_mode
+        self.inference_workers = inference_workers
+        self.model_path = model_path
+        self.compile_forest = compile_forest
+        self.forest_path = forest_path
+        # Digest of the pickle the parent loaded and the precision it serves, checked by every worker
+        self.source_digest = source_digest
+        self.precision = precision
+        self.max_batch_rows = max_batch_rows
+        self.num_features = num_features
+        self.db_pool = None
+        self.inference_pool = None
+        self._buffers = []
+        self._free_buffers = None
+
+    def start(self):
+        """Create the pools; call from inside the running event loop"""
+        if self.db_workers > 0:
+            self.db_pool = ThreadPoolExecutor(max_workers=self.db_workers, thread_name_prefix="touchguard-db")
+
+        if self.inference_mode == "thread":
+            self.inference_pool = ThreadPoolExecutor(max_workers=self.inference_workers,
+                                                     thread_name_prefix="touchguard-inference")
+        elif self.inference_mode == "process":
+            self.inference_pool = self._new_process_pool()
+            # Two buffers per worker keeps every worker busy while the next batch is written
+            self._free_buffers = asyncio.Queue()
+            nbytes = self.max_batch_rows * self.num_features * np.dtype(np.float64).itemsize
+            for _ in range(2 * self.inference_workers):
+                shm = shared_memory.SharedMemory(create=True, size=nbytes)
+                self._buffers.append(shm)
+                self._free_buffers.put_nowait(shm)
+
+    def _new_process_pool(self):
+        return ProcessPoolExecutor(
+            max_workers=self.inference_workers,
+            initializer=_init_inference_worker,
+            initargs=(self.model_path, self.compile_forest, self.forest_path, self.source_digest, self.precision)
+        )
+
+    def restart_inference(self, source_digest=None, precision="float64"):
+        """Start fresh process-pool workers so they load the model again; batches in flight finish on the old ones"""
+        self.source_digest = source_digest
+        self.precision = precision
+        if self.inference_mode != "process" or self.inference_pool is None:
+            return
+        old_pool, self.inference_pool = self.inference_pool, self._new_process_pool()
+        old_pool.shutdown(wait=False)
+
+    def shutdown(self):
+        if self.db_pool is not None:
+            self.db_pool.shutdown(wait=True)
+            self.db_pool = None
+        if self.inference_pool is not None:
+            self.inference_pool.shutdown(wait=True)
+            self.inference_pool = None
+        for shm in self._buffers:
+            shm.close()
+            shm.unlink()
+        self._buffers = []
+
+    async def run_db(self, fn, *args, **kwargs):
+        """Run a blocking SQLite call on the DB thread pool"""
+        if self.db_pool is None:
+            return fn(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.db_pool, partial(fn, *args, **kwargs))
+
+    async def run_inference(self, predict_proba, batch):
+        """Class probabilities for a batch, computed according to inference_mode"""
+        if self.inference_pool is None:
+            return predict_proba(batch)
+        loop = asyncio.get_running_loop()
+        if self.inference_mode == "thread":
+            return await loop.run_in_executor(self.inference_pool, predict_proba, batch)
+
+        batch = np.asarray(batch, dtype=np.float64)
+        chunks = []
+        for start in range(0, len(batch), self.max_batch_rows):
+            chunks.append(await self._run_in_process(loop, batch[start:start + self.max_batch_rows]))
+        return np.concatenate(chunks) if len(chunks) > 1 else chunks[0]
+
+    async def _run_in_process(self, loop, chunk):
+        shm = await self._free_buffers.get()
+        try:
+            n_rows, n_features = chunk.shape
+            np.ndarray(chunk.shape, dtype=np.float64, buffer=shm.buf)[:] = chunk
+            return await loop.run_in_executor(
+                self.inference_pool, _worker_predict_proba, shm.name, n_rows, n_features
+            )
+        finally:
+            self._free_buffers.put_nowait(shm)
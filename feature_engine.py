@@ -0,0 +1,99 @@
+import numpy as np
+
+# Order of the 18-feature vector produced by DetectionEngine.extract_features
+FEATURE_NAMES = [
+    'velocity_mean', 'velocity_std', 'velocity_max', 'velocity_min', 'velocity_median',
+    'velocity_variance', 'acceleration_mean', 'acceleration_std', 'direction_mean',
+    'direction_std', 'total_points', 'total_distance', 'click_count', 'pause_count',
+    'x_range', 'y_range', 'movement_efficiency', 'avg_step_size'
+]
+
+NUM_FEATURES = len(FEATURE_NAMES)
+
+MIN_VELOCITY = 0.1
+PAUSE_VELOCITY = 2
+
+
+def coordinates_of(movements):
+    """(x, y) pairs of the well-formed {"x", "y", ...} dicts in an /api/detect movements list"""
+    if isinstance(movements, np.ndarray):
+        return movements  # already an (n, 2) array, decoded from a packed payload
+    coords = []
+    for move in movements:
+        if isinstance(move, dict) and 'x' in move and 'y' in move:
+            try:
+                coords.append((float(move['x']), float(move['y'])))
+            except (ValueError, TypeError):
+                continue
+    return coords
+
+
+def to_coordinate_array(movements):
+    """Convert a list of (x, y) pairs into a contiguous (n, 2) float64 array"""
+    coords = np.asarray(movements, dtype=np.float64)
+    if coords.ndim != 2 or coords.shape[1] != 2:
+        coords = coords.reshape(-1, 2)
+    return np.ascontiguousarray(coords)
+
+
+def movement_kinematics(coords):
+    """Per-step diffs, distances, velocities, accelerations and direction changes"""
+    x = coords[:, 0]
+    y = coords[:, 1]
+    dx = np.diff(x)
+    dy = np.diff(y)
+    distances = np.sqrt(dx * dx + dy * dy)
+    velocities = np.maximum(distances, MIN_VELOCITY)
+    accelerations = velocities[1:] - velocities[:-1]
+
+    # Angle delta between consecutive steps, skipping zero-length steps
+    angles = np.arctan2(dy, dx)
+    angle_diff = np.abs(angles[1:] - angles[:-1])
+    angle_diff = np.where(angle_diff > np.pi, 2 * np.pi - angle_diff, angle_diff)
+    turn_mask = (distances[1:] > 0) & ((dx[:-1] != 0) | (dy[:-1] != 0))
+    direction_changes = angle_diff[turn_mask]
+
+    return distances, velocities, accelerations, direction_changes
+
+
+def extract_features(movements, click_count):
+    """Extract the 18 behavioral features with whole-array operations
+
+    Returns None for traces shorter than 3 points, matching the loop-based
+    extractor in app.py value-for-value.
+    """
+    coords = to_coordinate_array(movements)
+    n = len(coords)
+    if n < 3:
+        return None
+
+    distances, velocities, accelerations, direction_changes = movement_kinematics(coords)
+
+    # cumsum keeps Python's left-to-right summation order for total_distance
+    total_distance = float(np.cumsum(distances)[-1])
+    x = coords[:, 0]
+    y = coords[:, 1]
+
+    features = np.array([
+        velocities.mean(),
+        velocities.std(),
+        velocities.max(),
+        velocities.min(),
+        np.median(velocities),
+        velocities.var(),
+        accelerations.mean(),
+        accelerations.std() if len(accelerations) > 1 else 0.0,
+        direction_changes.mean() if len(direction_changes) else 0.0,
+        direction_changes.std() if len(direction_changes) > 1 else 0.0,
+        n,
+        total_distance,
+        click_count,
+        np.count_nonzero(velocities < PAUSE_VELOCITY),
+        x.max() - x.min(),
+        y.max() - y.min(),
+        n / (total_distance + 1),
+        total_distance / n,
+    ], dtype=np.float64)
+
+    features[~np.isfinite(features)] = 0.0
+    return features.tolist()
@@ -0,0 +1,192 @@
+import os
+import json
+import hashlib
+import inspect
+from collections import namedtuple
+
+import numpy as np
+
+NUM_FEATURES = 18
+
+# Outcome of reading one session file
+STATUS_OK = 0           # features extracted
+STATUS_NO_FEATURES = 1  # parsed, but too few movements for the extractor
+STATUS_UNREADABLE = 2   # not valid JSON or otherwise failed to parse
+STATUS_MISSING = 3      # file does not exist; never cached
+
+SessionRecord = namedtuple("SessionRecord", "digest size mtime_ns status points behaviour_length features")
+
+# Columns stored one .npy file each, so any of them can be memory-mapped on its own
+COLUMNS = {
+    "features": (np.float64, (NUM_FEATURES,)),
+    "status": (np.int8, ()),
+    "points": (np.int64, ()),
+    "behaviour_length": (np.int64, ()),
+}
+
+
+def code_version(*functions):
+    """Version tag derived from the extractor's source, so editing it invalidates cached features"""
+    digest = hashlib.sha1()
+    for fn in functions:
+        digest.update(inspect.getsource(fn).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def read_session_record(json_file, parse, extract):
+    """Hash and featurize one mouse_movements.json; parse and extract are the caller's extractor pair"""
+    try:
+        with open(json_file, 'rb') as f:
+            raw = f.read()
+            stat = os.fstat(f.fileno())
+    except FileNotFoundError:
+        return SessionRecord(None, 0, 0, STATUS_MISSING, 0, 0, None)
+    digest = hashlib.sha256(raw).hexdigest()
+
+    try:
+        behavior = json.loads(raw.decode('utf-8')).get('total_behaviour', '')
+        movements, click_count = parse(behavior)
+        features = extract(movements, click_count) if movements else None
+    except Exception:
+        return SessionRecord(digest, stat.st_size, stat.st_mtime_ns, STATUS_UNREADABLE, 0, 0, None)
+
+    if features is None or len(features) != NUM_FEATURES:
+        return SessionRecord(digest, stat.st_size, stat.st_mtime_ns, STATUS_NO_FEATURES, len(movements),
+                             len(behavior), None)
+    return SessionRecord(digest, stat.st_size, stat.st_mtime_ns, STATUS_OK, len(movements), len(behavior),
+                         features)
+
+
+class FeatureStore:
+    """On-disk, content-addressed cache of per-session extracted features
+
+    Rows are keyed by the SHA-256 of the session file, so identical content
+    is stored once however many paths point at it. A path index remembers
+    each file's size, mtime and digest; an unchanged file is resolved from
+    the index without being opened. Each column lives in its own .npy file
+    and is memory-mapped on load. The whole store is discarded when the
+    extractor version changes. With cache_dir=None the store is in-memory
+    only, which gives callers one code path with or without caching.
+    """
+
+    def __init__(self, cache_dir, version):
+        self.cache_dir = cache_dir
+        self.version = version
+        self.paths = {}    # path -> [size, mtime_ns, digest]
+        self.rows = {}     # digest -> row
+        self.columns = {}  # name -> array, memory-mapped when read from disk
+        self._pending = []
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _empty_columns(self):
+        return {name: np.empty((0,) + shape, dtype) for name, (dtype, shape) in COLUMNS.items()}
+
+    def _load(self):
+        self.columns = self._empty_columns()
+        index_path = os.path.join(self.cache_dir, "index.json") if self.cache_dir else None
+        if not index_path or not os.path.exists(index_path):
+            return
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get("version") != self.version:
+                print(f"Feature cache built by extractor {index.get('version')}, now {self.version}: rebuilding")
+                return
+            columns = {name: np.load(os.path.join(self.cache_dir, f"{name}.npy"), mmap_mode="r")
+                       for name in COLUMNS}
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring unreadable feature cache in {self.cache_dir}: {e}")
+            return
+        if any(len(column) != index["rows"] for column in columns.values()):
+            print(f"Warning: feature cache in {self.cache_dir} is inconsistent, rebuilding")
+            return
+        self.columns = columns
+        self.paths = index["paths"]
+        self.rows = index["digests"]
+
+    def __len__(self):
+        return len(self.columns["status"]) + len(self._pending)
+
+    def lookup(self, path):
+        """Row for path if the file's size and mtime match what was cached, else None"""
+        path = os.path.abspath(path)
+        entry = self.paths.get(path)
+        if entry is not None:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+            if stat is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+                row = self.rows.get(entry[2])
+                if row is not None:
+                    self.hits += 1
+                    return row
+        self.misses += 1
+        return None
+
+    def add(self, path, record):
+        """Record a freshly read session and return its row; missing files get -1"""
+        path = os.path.abspath(path)
+        if record.status == STATUS_MISSING:
+            self._dirty |= self.paths.pop(path, None) is not None
+            return -1
+        self.paths[path] = [record.size, record.mtime_ns, record.digest]
+        self._dirty = True
+        row = self.rows.get(record.digest)
+        if row is None:
+            row = len(self)
+            self.rows[record.digest] = row
+            self._pending.append(record)
+        return row
+
+    def save(self):
+        """Append pending rows to the column files and rewrite the index"""
+        if self._pending:
+            new = {
+                "features": np.array([r.features if r.features is not None else [np.nan] * NUM_FEATURES
+                                      for r in self._pending], dtype=np.float64),
+                "status": np.array([r.status for r in self._pending], dtype=np.int8),
+                "points": np.array([r.points for r in self._pending], dtype=np.int64),
+                "behaviour_length": np.array([r.behaviour_length for r in self._pending], dtype=np.int64),
+            }
+            merged = {name: np.concatenate([np.asarray(self.columns[name]), new[name]]) for name in COLUMNS}
+            # Release the memory maps before the files underneath are replaced
+            self.columns = merged
+            self._pending = []
+        if not self.cache_dir or not self._dirty:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for name, column in self.columns.items():
+            if isinstance(column, np.memmap):
+                continue  # unchanged since it was loaded
+            tmp_path = os.path.join(self.cache_dir, f"{name}.tmp.npy")
+            np.save(tmp_path, column)
+            os.replace(tmp_path, os.path.join(self.cache_dir, f"{name}.npy"))
+        tmp_index = os.path.join(self.cache_dir, "index.json.tmp")
+        with open(tmp_index, 'w', encoding='utf-8') as f:
+            json.dump({"version": self.version, "rows": len(self.columns["status"]),
+                       "paths": self.paths, "digests": self.rows}, f)
+        os.replace(tmp_index, os.path.join(self.cache_dir, "index.json"))
+        self._dirty = False
+
+    def take(self, rows):
+        """Column arrays for the given rows; -1 rows come back as STATUS_MISSING"""
+        if self._pending:
+            self.save()
+        rows = np.asarray(rows, dtype=np.int64)
+        present = rows >= 0
+        safe_rows = np.where(present, rows, 0)
+        result = {}
+        for name, (dtype, shape) in COLUMNS.items():
+            column = self.columns[name]
+            values = np.asarray(column[safe_rows]) if len(column) else np.zeros((len(rows),) + shape, dtype)
+            result[name] = values
+        result["status"] = np.where(present, result["status"], STATUS_MISSING).astype(np.int8)
+        return result
+
+    def stats(self):
+        return {"rows": len(self), "paths": len(self.paths), "hits": self.hits, "misses": self.misses}
@@ -4,13 +4,16 @@ class AdminDashboard {
         this.stats = {};
         this.autoRefreshEnabled = true;
         this.refreshInterval = null;
+        this.eventSource = null;
+        this.needsResync = false;
+        this.maxRows = 50;
         this.init();
     }
 
     async init() {
         console.log('TouchGuard Admin Dashboard initializing...');
         this.loadInitialData();
-        this.setupAutoRefresh();
+        this.setupLiveFeed();
         this.initializeEventListeners();
         console.log('✅ TouchGuard Admin Dashboard initialized successfully');
     }
@@ -22,6 +25,235 @@ class AdminDashboard {
         console.log('📊 Initial data loaded');
     }
 
+    setupLiveFeed() {
+        // Browsers without server-sent events fall back to full-page refreshes
+        if (!window.EventSource) {
+            this.setupAutoRefresh();
+            return;
+        }
+
+        this.eventSource = new EventSource('/api/admin/events');
+
+        this.eventSource.addEventListener('prediction', (e) => {
+            this.applyLiveEvent(() => this.upsertSessionRow(JSON.parse(e.data).session));
+        });
+        this.eventSource.addEventListener('block', (e) => {
+            this.applyLiveEvent(() => this.updateSessionStatus(JSON.parse(e.data).session_id, 'blocked'));
+        });
+        this.eventSource.addEventListener('delete', (e) => {
+            this.applyLiveEvent(() => this.removeSessionFromTable(JSON.parse(e.data).session_id));
+        });
+        // Retention archived idle sessions in bulk; the event only carries a count, so reload the table
+        this.eventSource.addEventListener('evict', () => {
+            this.applyLiveEvent(() => this.resync());
+        });
+        this.eventSource.addEventListener('counts', (e) => {
+            this.applyLiveEvent(() => this.updateCounts(JSON.parse(e.data)));
+        });
+        this.eventSource.addEventListener('resync', () => {
+            this.needsResync = true;
+            this.applyLiveEvent(() => {});
+        });
+
+        // EventSource reconnects on its own; resync afterwards in case events were missed
+        this.eventSource.onopen = () => {
+            this.setLiveStatus(true);
+            if (this.needsResync) {
+                this.resync();
+            }
+        };
+        this.eventSource.onerror = () => {
+            this.setLiveStatus(false);
+            this.needsResync = true;
+        };
+
+        // Update time indicators every 30 seconds
+        setInterval(() => {
+            this.updateTimeAgo();
+        }, 30000);
+
+        console.log('📡 Live feed connected (server push)');
+    }
+
+    applyLiveEvent(apply) {
+        // While paused, drop events and reload a snapshot once updates resume
+        if (!this.autoRefreshEnabled) {
+            this.needsResync = true;
+            return;
+        }
+        if (this.needsResync) {
+            this.resync();
+            return;
+        }
+        apply();
+        this.touchLastUpdated();
+    }
+
+    async resync() {
+        this.needsResync = false;
+        try {
+            const response = await fetch('/api/admin/snapshot');
+            const stats = await response.json();
+            
+            const tbody = document.getElementById('sessions-tbody');
+            if (tbody) {
+                tbody.innerHTML = '';
+                stats.sessions.slice().reverse().forEach(session => this.upsertSessionRow(session, false));
+            }
+            this.updateCounts(stats);
+            this.touchLastUpdated();
+            console.log('🔄 Dashboard resynced from snapshot');
+        } catch (error) {
+            this.needsResync = true;
+            console.error('Dashboard resync failed:', error);
+        }
+    }
+
+    setLiveStatus(connected) {
+        const statusElement = document.getElementById('live-status');
+        if (statusElement) {
+            statusElement.textContent = connected ? 'Live' : 'Reconnecting...';
+        }
+    }
+
+    touchLastUpdated() {
+        const lastUpdatedElement = document.getElementById('last-updated');
+        if (lastUpdatedElement) {
+            lastUpdatedElement.textContent = new Date().toLocaleTimeString();
+        }
+    }
+
+    updateCounts(counts) {
+        const fields = {
+            'human-count': counts.human_sessions,
+            'bot-count': counts.bot_sessions,
+            'total-count': counts.total_sessions
+        };
+        Object.entries(fields).forEach(([id, value]) => {
+            const element = document.getElementById(id);
+            if (element && value !== undefined) {
+                element.textContent = value;
+            }
+        });
+    }
+
+    escapeHtml(value) {
+        return String(value ?? '').replace(/[&<>"']/g, (c) => ({
+            '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+        }[c]));
+    }
+
+    renderSessionRow(session) {
+        // Mirrors the server-rendered row in admin.html; session uses the sessions table column order
+        const [sessionId, createdAt, userType, confidence, status, movementCount, lastPrediction, ipAddress] = session;
+        const isBot = userType === 'Bot';
+        const row = document.createElement('tr');
+        row.className = `session-row ${isBot ? 'bot-session' : 'human-session'}`;
+        row.dataset.sessionId = sessionId;
+        row.innerHTML = `
+            <td class="session-id">
+                <span class="id-text">${this.escapeHtml(String(sessionId).slice(0, 16))}...</span>
+                <button class="copy-btn" data-session-id="${this.escapeHtml(sessionId)}" title="Copy Session ID">
+                    <i class="fas fa-copy"></i>
+                </button>
+            </td>
+            <td>
+                <span class="user-type ${this.escapeHtml(String(userType).toLowerCase())}">
+                    <i class="fas fa-${isBot ? 'robot' : 'user'}"></i>
+                    ${this.escapeHtml(userType)}
+                </span>
+            </td>
+            <td>
+                <div class="confidence-display">
+                    <div class="confidence-bar">
+                        <div class="confidence-fill" style="width: ${Number(confidence) || 0}%"></div>
+                    </div>
+                    <span class="confidence-text">${(Number(confidence) || 0).toFixed(1)}%</span>
+                </div>
+            </td>
+            <td class="movement-count">${Number(movementCount) || 0}</td>
+            <td>
+                ${status === 'blocked'
+                    ? '<span class="status-badge blocked"><i class="fas fa-ban"></i> Blocked</span>'
+                    : status === 'active'
+                        ? '<span class="status-badge active"><i class="fas fa-circle"></i> Active</span>'
+                        : '<span class="status-badge inactive"><i class="far fa-circle"></i> Inactive</span>'}
+            </td>
+            <td class="timestamp">
+                <span class="time-ago" data-time="${this.escapeHtml(lastPrediction)}">${this.escapeHtml(createdAt)}</span>
+            </td>
+            <td class="ip-address">
+                <code>${this.escapeHtml(ipAddress || 'N/A')}</code>
+            </td>
+            <td class="actions">
+                <button class="btn btn-sm btn-info view-session-btn" title="View Details">
+                    <i class="fas fa-eye"></i>
+                </button>
+                <button class="btn btn-sm btn-warning block-session-btn" title="Block Session">
+                    <i class="fas fa-ban"></i>
+                </button>
+                <button class="btn btn-sm btn-danger delete-session-btn" title="Delete Session">
+                    <i class="fas fa-trash"></i>
+                </button>
+            </td>
+        `;
+        return row;
+    }
+
+    upsertSessionRow(session, logActivity = true) {
+        const tbody = document.getElementById('sessions-tbody');
+        if (!tbody) return;
+
+        // Drop the "No Sessions Found" placeholder row
+        tbody.querySelectorAll('tr:not(.session-row)').forEach(row => row.remove());
+
+        const existing = tbody.querySelector(`tr[data-session-id="${CSS.escape(session[0])}"]`);
+        if (existing) {
+            existing.remove();
+        }
+        const row = this.renderSessionRow(session);
+        tbody.insertBefore(row, tbody.firstChild);
+
+        while (tbody.querySelectorAll('.session-row').length > this.maxRows) {
+            tbody.lastElementChild.remove();
+        }
+
+        this.updateTimeAgo();
+        if (logActivity) {
+            this.addActivityItem(session);
+        }
+    }
+
+    addActivityItem(session) {
+        const feed = document.getElementById('activity-feed');
+        if (!feed) return;
+
+        const [sessionId, createdAt, userType, confidence, , , , ipAddress] = session;
+        const isBot = userType === 'Bot';
+        const item = document.createElement('div');
+        item.className = 'activity-item';
+        item.innerHTML = `
+            <div class="activity-icon ${isBot ? 'bot' : 'human'}">
+                <i class="fas fa-${isBot ? 'robot' : 'user'}"></i>
+            </div>
+            <div class="activity-content">
+                <div class="activity-title">
+                    ${this.escapeHtml(userType)} session detected
+                    <span class="confidence-badge">${(Number(confidence) || 0).toFixed(1)}%</span>
+                </div>
+                <div class="activity-details">
+                    Session: ${this.escapeHtml(String(sessionId).slice(0, 16))}... | IP: ${this.escapeHtml(ipAddress || 'N/A')}
+                </div>
+                <div class="activity-time">${this.escapeHtml(createdAt)}</div>
+            </div>
+        `;
+        feed.insertBefore(item, feed.firstChild);
+
+        while (feed.children.length > 20) {
+            feed.removeChild(feed.lastChild);
+        }
+    }
+
     setupAutoRefresh() {
         // Auto-refresh every 10 seconds
         this.refreshInterval = setInterval(() => {
@@ -45,9 +277,12 @@ class AdminDashboard {
             autoRefreshCheckbox.addEventListener('change', (e) => {
                 this.autoRefreshEnabled = e.target.checked;
                 if (this.autoRefreshEnabled) {
-                    this.showNotification('Auto-refresh enabled', 'success');
+                    if (this.needsResync) {
+                        this.resync();
+                    }
+                    this.showNotification('Live updates enabled', 'success');
                 } else {
-                    this.showNotification('Auto-refresh disabled', 'info');
+                    this.showNotification('Live updates paused', 'info');
                 }
             });
         }
@@ -434,6 +669,9 @@ class AdminDashboard {
         if (this.refreshInterval) {
             clearInterval(this.refreshInterval);
         }
+        if (this.eventSource) {
+            this.eventSource.close();
+        }
         console.log('🔄 Admin dashboard destroyed');
     }
 }
@@ -501,10 +739,13 @@ document.addEventListener('visibilitychange', () => {
     if (window.adminDashboard) {
         if (document.hidden) {
             window.adminDashboard.autoRefreshEnabled = false;
-            console.log('⏸️ Auto-refresh paused (tab hidden)');
+            console.log('⏸️ Live updates paused (tab hidden)');
         } else {
             window.adminDashboard.autoRefreshEnabled = true;
-            console.log('▶️ Auto-refresh resumed (tab visible)');
+            if (window.adminDashboard.needsResync) {
+                window.adminDashboard.resync();
+            }
+            console.log('▶️ Live updates resumed (tab visible)');
         }
     }
 });
@@ -2,7 +2,15 @@ class TouchGuardTracker {
     constructor() {
         this.sessionId = this.generateSessionId();
         this.movements = [];
+        this.pendingMovements = [];  // points not yet sent to the server
+        this.incremental = true;     // send only new points; the server keeps per-session state
+        this.stateSynced = false;    // the server holds this session's earlier points
+        this.packedPayloads = true;  // binary body for /api/detect/packed instead of JSON for /api/detect
         this.clicks = 0;
+        this.newMovements = 0;       // points recorded since the last completed detection
+        this.nextCheckAt = 0;        // schedule set by the server after each detection
+        this.minNewMovements = 10;
+        this.detectionPending = false;
         this.isTracking = true;
         this.detectionInterval = null;
         this.lastDetection = null;
@@ -21,11 +29,13 @@ class TouchGuardTracker {
         // Track mouse movements
         document.addEventListener('mousemove', (e) => {
             if (this.isTracking) {
-                this.movements.push({
+                const point = {
                     x: e.clientX,
                     y: e.clientY,
                     timestamp: Date.now()
-                });
+                };
+                this.movements.push(point);
+                this.queuePending(point);
                 
                 // Limit movements array for performance
                 if (this.movements.length > 100) {
@@ -40,12 +50,14 @@ class TouchGuardTracker {
         document.addEventListener('click', (e) => {
             if (this.isTracking) {
                 this.clicks++;
-                this.movements.push({
+                const point = {
                     x: e.clientX,
                     y: e.clientY,
                     timestamp: Date.now(),
                     type: 'click'
-                });
+                };
+                this.movements.push(point);
+                this.queuePending(point);
             }
         });
         
@@ -55,6 +67,16 @@ class TouchGuardTracker {
         });
     }
     
+    queuePending(point) {
+        this.pendingMovements.push(point);
+        this.newMovements++;
+        
+        // Bound the backlog if the server is unreachable for a while
+        if (this.pendingMovements.length > 1000) {
+            this.pendingMovements = this.pendingMovements.slice(-500);
+        }
+    }
+    
     updateMovementCount() {
         const countElement = document.getElementById('movement-count');
         if (countElement) {
@@ -63,30 +85,84 @@ class TouchGuardTracker {
     }
     
     startRealTimeDetection() {
-        // Perform detection every 5 seconds when sufficient data available
+        // Check locally every second; the server decides how often a detection is worth running
         this.detectionInterval = setInterval(() => {
-            if (this.movements.length >= 10) {
+            if (Date.now() >= this.nextCheckAt && this.newMovements >= this.minNewMovements) {
                 this.performDetection();
             }
-        }, 5000);
+        }, 1000);
+    }
+    
+    followSchedule(result) {
+        // Settled sessions are given longer intervals; responses without a schedule fall back to 5 seconds
+        const nextCheckMs = result.next_check_ms ?? 5000;
+        this.nextCheckAt = Date.now() + nextCheckMs;
+        this.minNewMovements = result.min_new_movements ?? 10;
     }
     
     async performDetection() {
+        if (this.detectionPending) return;
+        this.detectionPending = true;
+        // Until the server holds this session's points, an incremental call resends the whole window
+        // and asks the server to start its state over from it
+        const reset = this.incremental && !this.stateSynced;
+        // A copy: points captured while the request is in flight must not count as sent
+        const sent = (this.incremental && !reset ? this.pendingMovements : this.movements).slice();
+        const counted = this.newMovements;
+        
         try {
-            const response = await fetch('/api/detect', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    session_id: this.sessionId,
-                    movements: this.movements,
-                    clicks: this.clicks,
-                    timestamp: new Date().toISOString()
+            const response = this.packedPayloads
+                ? await fetch('/api/detect/packed', {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/octet-stream',
+                        'X-TouchGuard-Session': this.sessionId,  // sticky routing key for the proxy
+                    },
+                    body: this.encodePacked(sent, reset)
                 })
-            });
+                : await fetch('/api/detect', {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                        'X-TouchGuard-Session': this.sessionId,
+                    },
+                    body: JSON.stringify({
+                        session_id: this.sessionId,
+                        movements: sent,
+                        clicks: this.clicks,
+                        timestamp: new Date().toISOString(),
+                        incremental: this.incremental,
+                        reset: reset
+                    })
+                });
             
             const result = await response.json();
+            this.followSchedule(result);
+            
+            // Called before the session was due: keep the points for the next check
+            if (response.status === 429) {
+                return;
+            }
+            
+            if (response.ok) {
+                this.newMovements = Math.max(0, this.newMovements - counted);
+                
+                // state_reset on a plain incremental call means the server lost the earlier points
+                // (idle eviction, restart, another worker): resend the window on the next call
+                if (this.incremental) {
+                    this.stateSynced = reset || !result.state_reset;
+                }
+                
+                // The server has folded these points into its session state. Drop up to the last
+                // point sent rather than by count, since the backlog cap may have trimmed the
+                // front of pendingMovements in the meantime
+                if (this.incremental && sent.length) {
+                    const lastSent = this.pendingMovements.lastIndexOf(sent[sent.length - 1]);
+                    if (lastSent >= 0) {
+                        this.pendingMovements = this.pendingMovements.slice(lastSent + 1);
+                    }
+                }
+            }
             
             if (result.error) {
                 console.warn('Detection error:', result.error);
@@ -99,9 +175,66 @@ class TouchGuardTracker {
             
         } catch (error) {
             console.error('Detection request failed:', error);
+        } finally {
+            this.detectionPending = false;
         }
     }
     
+    encodePacked(points, reset = false) {
+        // Delta-encoded columns in the movement_codec.py layout: header, padded session id,
+        // first point, dx/dy/dt columns (int16, or int32 when a step does not fit) and a click bitmap
+        const sessionId = new TextEncoder().encode(this.sessionId);
+        const n = points.length;
+        const columns = [
+            points.map(p => Math.round(p.x)),
+            points.map(p => Math.round(p.y)),
+            points.map(p => Math.round(p.timestamp))
+        ];
+        const wide = columns.some(column => column.some((value, i) => {
+            const delta = i ? value - column[i - 1] : 0;
+            return delta < -32768 || delta > 32767;
+        }));
+        const deltaBytes = wide ? 4 : 2;
+        const sessionIdBytes = (sessionId.length + 3) & ~3;
+        const size = 16 + sessionIdBytes + (n ? 16 + 3 * (n - 1) * deltaBytes + Math.ceil(n / 8) : 0);
+        
+        const buffer = new ArrayBuffer(size);
+        const view = new DataView(buffer);
+        new Uint8Array(buffer, 0, 4).set([0x54, 0x47, 0x4d, 0x56]);  // "TGMV"
+        view.setUint8(4, 1);  // format version
+        view.setUint8(5, (this.incremental ? 1 : 0) | (wide ? 2 : 0) | (reset ? 4 : 0));
+        view.setUint16(6, sessionId.length, true);
+        view.setUint32(8, n, true);
+        view.setUint32(12, this.clicks, true);
+        new Uint8Array(buffer, 16, sessionId.length).set(sessionId);
+        if (n === 0) {
+            return buffer;
+        }
+        
+        let offset = 16 + sessionIdBytes;
+        view.setInt32(offset, columns[0][0], true);
+        view.setInt32(offset + 4, columns[1][0], true);
+        view.setFloat64(offset + 8, columns[2][0], true);
+        offset += 16;
+        for (const column of columns) {
+            for (let i = 1; i < n; i++) {
+                if (wide) {
+                    view.setInt32(offset, column[i] - column[i - 1], true);
+                } else {
+                    view.setInt16(offset, column[i] - column[i - 1], true);
+                }
+                offset += deltaBytes;
+            }
+        }
+        const clickBitmap = new Uint8Array(buffer, offset);
+        points.forEach((point, i) => {
+            if (point.type === 'click') {
+                clickBitmap[i >> 3] |= 1 << (i & 7);
+            }
+        });
+        return buffer;
+    }
+    
     updateUI(result) {
         // Update desktop indicator
         const statusElement = document.getElementById('detection-status');
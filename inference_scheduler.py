@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+import numpy as np
+
+from metrics import Histogram
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+QUEUE_WAIT_MS_BUCKETS = [0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100]
+
+
+class InferenceScheduler:
+    """Micro-batches feature vectors from concurrent requests into one predict_proba call
+
+    A batch is flushed as soon as it holds max_batch_size rows, or max_wait_ms
+    after its first row was queued, whichever comes first.
+    """
+
+    def __init__(self, predict_proba, max_batch_size=32, max_wait_ms=2.0, execution=None):
+        self.predict_proba = predict_proba
+        self.execution = execution  # optional ExecutionLayer that runs the batch off the loop
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending = []
+        self._timer = None
+        self._in_flight = set()
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_MS_BUCKETS)
+
+    async def submit(self, features):
+        """Queue one feature vector and wait for its class-probability row"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((features, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        now = time.perf_counter()
+        self.batch_sizes.observe(len(batch))
+        for _, _, queued_at in batch:
+            self.queue_wait_ms.observe((now - queued_at) * 1000)
+
+        rows = np.array([row for row, _, _ in batch])
+        if self.execution is None:
+            self._resolve(batch, rows)
+        else:
+            task = asyncio.ensure_future(self._resolve_async(batch, rows))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    def _resolve(self, batch, rows):
+        try:
+            probabilities = self.predict_proba(rows)
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        self._deliver(batch, probabilities)
+
+    async def _resolve_async(self, batch, rows):
+        try:
+            probabilities = await self.execution.run_inference(self.predict_proba, rows)
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        self._deliver(batch, probabilities)
+
+    @staticmethod
+    def _deliver(batch, probabilities):
+        for (_, future, _), row in zip(batch, probabilities):
+            if not future.done():
+                future.set_result(row)
+
+    @staticmethod
+    def _fail(batch, error):
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queued": len(self._pending),
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot()
+        }
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import time
+
+SSE_HEARTBEAT_SECONDS = 15
+
+
+class Subscriber:
+    """One dashboard connection with its own bounded event queue"""
+
+    def __init__(self, max_queue):
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.connected_at = time.time()
+
+    def offer(self, message):
+        """Queue a pre-encoded message without ever blocking the publisher
+
+        A subscriber that falls behind has its backlog replaced by a single
+        resync message, telling the client to reload a snapshot instead of
+        replaying every event it missed.
+        """
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(encode_event("resync", {"reason": "subscriber fell behind"}))
+
+
+def encode_event(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class LiveFeed:
+    """Fans prediction, block, delete and counter events out to dashboard subscribers
+
+    Each event is JSON-encoded once and handed to every subscriber's queue,
+    so publishing costs one encode plus a queue put per open dashboard.
+    Counter updates are coalesced: publishers mark the counts dirty and a
+    single ticker reads the summary table at most once per interval, no
+    matter how many dashboards are watching.
+    """
+
+    def __init__(self, max_queue=256, counts_interval=1.0):
+        self.max_queue = max_queue
+        self.counts_interval = counts_interval
+        self.subscribers = set()
+        self.events_published = 0
+        self._counts_dirty = False
+
+    def subscribe(self):
+        subscriber = Subscriber(self.max_queue)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    def publish(self, event_type, data, affects_counts=True):
+        """Broadcast an event; call from the event loop thread"""
+        self.events_published += 1
+        if affects_counts:
+            self._counts_dirty = True
+        if not self.subscribers:
+            return
+        message = encode_event(event_type, data)
+        for subscriber in self.subscribers:
+            subscriber.offer(message)
+
+    async def run_counts_ticker(self, read_counts):
+        """Push fresh counters after any change, at most once per counts_interval"""
+        while True:
+            await asyncio.sleep(self.counts_interval)
+            if not self._counts_dirty or not self.subscribers:
+                continue
+            self._counts_dirty = False
+            counts = await read_counts()
+            self.publish("counts", counts, affects_counts=False)
+
+    async def stream(self, subscriber):
+        """Server-sent event stream for one subscriber, with keep-alive comments"""
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    message = ": keep-alive\n\n"
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self):
+        return {
+            "subscribers": len(self.subscribers),
+            "events_published": self.events_published,
+            "dropped_events": sum(s.dropped for s in self.subscribers),
+            "max_queue": self.max_queue
+        }
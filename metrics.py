@@ -0,0 +1,189 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Millisecond buckets for request and pipeline stage latencies
+LATENCY_MS_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+
+
+class Histogram:
+    """Fixed-bucket histogram with cheap observe() and bucket-resolution percentiles"""
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is the +Inf bucket
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (0 < q <= 1)
+
+        A quantile in the +Inf bucket reports the largest finite bound, so the
+        value stays JSON-serializable; the snapshot's "overflow" count shows
+        how many observations were above it.
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return bound
+        return self.buckets[-1]
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "overflow": self.counts[-1],
+            "buckets": {str(bound): c for bound, c in zip(self.buckets + ['+Inf'], self.counts)}
+        }
+
+
+class Counter:
+    """Monotonic counter safe to increment from any thread"""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    """Point-in-time value that is set rather than accumulated"""
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == float('inf') else repr(float(bound))
+
+
+class MetricsRegistry:
+    """Named counters, gauges and histograms rendered in the Prometheus text exposition format
+
+    A metric is identified by its name plus label values; asking for the same
+    pair again returns the same object, so call sites can look metrics up once
+    and keep the reference. Histograms owned elsewhere (the inference
+    scheduler, the database writer) can be registered as-is.
+    """
+
+    def __init__(self):
+        self._families = {}  # name -> (type, help, {labels: metric})
+        self._lock = threading.Lock()
+
+    def _get(self, kind, name, help_text, labels, factory):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._families.setdefault(name, (kind, help_text, {}))
+            if family[0] != kind:
+                raise ValueError(f"metric {name} already registered as a {family[0]}")
+            series = family[2]
+            if key not in series:
+                series[key] = factory()
+            return series[key]
+
+    def counter(self, name, help_text, **labels):
+        return self._get("counter", name, help_text, labels, Counter)
+
+    def gauge(self, name, help_text, **labels):
+        return self._get("gauge", name, help_text, labels, Gauge)
+
+    def histogram(self, name, help_text, buckets=LATENCY_MS_BUCKETS, **labels):
+        return self._get("histogram", name, help_text, labels, lambda: Histogram(buckets))
+
+    def register(self, name, help_text, metric, **labels):
+        """Expose an existing Counter, Gauge or Histogram under name"""
+        kind = "histogram" if isinstance(metric, Histogram) else "gauge" if isinstance(metric, Gauge) else "counter"
+        return self._get(kind, name, help_text, labels, lambda: metric)
+
+    def snapshot(self):
+        """JSON-friendly view: counter and gauge values, histogram snapshots with percentiles"""
+        with self._lock:
+            families = [(name, list(series.items())) for name, (_, _, series) in self._families.items()]
+        return {
+            name: {
+                ",".join(f"{key}={value}" for key, value in labels) or "all":
+                    metric.snapshot() if isinstance(metric, Histogram) else metric.value
+                for labels, metric in series
+            }
+            for name, series in families
+        }
+
+    def render(self):
+        with self._lock:
+            families = [(name, kind, help_text, list(series.items()))
+                        for name, (kind, help_text, series) in self._families.items()]
+        lines = []
+        for name, kind, help_text, series in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, metric in series:
+                if kind != "histogram":
+                    lines.append(f"{name}{_format_labels(labels)} {metric.value}")
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(metric.buckets + [float('inf')], metric.counts):
+                    cumulative += bucket_count
+                    le = ("le", _format_bound(bound))
+                    lines.append(f"{name}_bucket{_format_labels(labels, le)} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {metric.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {metric.count}")
+        return "\n".join(lines) + "\n"
+
+
+class StageTimings:
+    """Durations of the stages one request went through, in milliseconds"""
+
+    __slots__ = ('started', 'stages')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def record(self, name, duration_ms):
+        self.stages[name] = self.stages.get(name, 0.0) + duration_ms
+
+    def since_start(self, name):
+        """Record the time from construction until now as stage name"""
+        self.record(name, (time.perf_counter() - self.started) * 1000)
+
+    def server_timing(self):
+        """Value for a Server-Timing response header"""
+        return ", ".join(f"{name};dur={duration:.3f}" for name, duration in self.stages.items())
@@ -0,0 +1,141 @@
+import time
+import pickle
+from collections import namedtuple
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+
+from compiled_forest import CompiledForest, PRECISIONS
+
+# Grid of smaller forests around the production 75-tree, depth-10 shape
+TREE_COUNTS = (10, 25, 50, 75)
+DEPTHS = (4, 6, 8, 10)
+# Minimal cost-complexity pruning strengths applied to the production shape
+PRUNING_ALPHAS = (0.002, 0.005, 0.01)
+# (trees, depth) of forests trained to reproduce the production forest's verdicts
+DISTILLED_SHAPES = ((5, 6), (10, 6), (25, 8))
+# Jittered copies of each training row the teacher labels for distillation, and the jitter
+DISTILL_COPIES = 8
+DISTILL_NOISE = 0.15
+
+# name: unique label; kind: how it was derived; forest: fitted sklearn forest
+Candidate = namedtuple("Candidate", "name kind forest")
+
+
+def build_candidates(X_train, y_train, base_params, seed=42):
+    """Fit the shrunk, pruned and distilled forests, the production shape first
+
+    base_params are the RandomForestClassifier arguments production trains
+    with; every candidate overrides only its own shape or pruning settings.
+    """
+    base = RandomForestClassifier(**base_params)
+    candidates = []
+    for n_estimators in reversed(TREE_COUNTS):
+        for max_depth in reversed(DEPTHS):
+            forest = clone(base).set_params(n_estimators=n_estimators, max_depth=max_depth)
+            kind = ("baseline" if (n_estimators, max_depth) == (base.n_estimators, base.max_depth)
+                    else "shrunk")
+            candidates.append(Candidate(f"rf-{n_estimators}x{max_depth}", kind, forest.fit(X_train, y_train)))
+    teacher = next((c.forest for c in candidates if c.kind == "baseline"), candidates[0].forest)
+
+    for alpha in PRUNING_ALPHAS:
+        forest = clone(base).set_params(ccp_alpha=alpha)
+        candidates.append(Candidate(f"pruned-{alpha:g}", "pruned", forest.fit(X_train, y_train)))
+
+    X_distill, y_distill = distillation_set(teacher, X_train, seed)
+    for n_estimators, max_depth in DISTILLED_SHAPES:
+        # The teacher's labels are already balanced out, and the jittered rows have no OOB meaning
+        forest = clone(base).set_params(n_estimators=n_estimators, max_depth=max_depth, class_weight=None,
+                                        oob_score=False)
+        candidates.append(Candidate(f"distilled-{n_estimators}x{max_depth}", "distilled",
+                                    forest.fit(X_distill, y_distill)))
+    return candidates
+
+
+def distillation_set(teacher, X_train, seed=42):
+    """Training rows plus multiplicatively jittered copies, all labelled by the teacher"""
+    rng = np.random.default_rng(seed)
+    jittered = np.repeat(X_train, DISTILL_COPIES, axis=0)
+    jittered = jittered * rng.normal(1.0, DISTILL_NOISE, jittered.shape)
+    X = np.vstack([X_train, jittered])
+    return X, teacher.predict(X)
+
+
+def median_ms(fn, repeats):
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return float(np.median(durations)) * 1000, float(np.percentile(durations, 95)) * 1000
+
+
+def profile_candidate(candidate, precision, X_test, y_test, repeats=200, batch_size=256, seed=0):
+    """Latency, memory and held-out accuracy of a candidate as the app serves it, compiled"""
+    compiled = CompiledForest.from_sklearn(candidate.forest, precision=precision)
+    rng = np.random.default_rng(seed)
+    rows = X_test[rng.integers(0, len(X_test), repeats)]
+    batch = X_test[rng.integers(0, len(X_test), batch_size)]
+    compiled.predict_proba(rows[:1])  # first call pays for allocation
+
+    row_iter = iter(rows)
+    single_ms, single_p95_ms = median_ms(lambda: compiled.predict_proba(next(row_iter)[None, :]), repeats)
+    batch_ms, _ = median_ms(lambda: compiled.predict_proba(batch), max(repeats // 10, 5))
+    estimators = candidate.forest.estimators_
+    return {
+        "name": candidate.name if precision == "float64" else f"{candidate.name}-{precision}",
+        "candidate": candidate.name,
+        "kind": candidate.kind,
+        "precision": precision,
+        "trees": len(estimators),
+        "depth": compiled.depth,
+        "nodes": int(sum(e.tree_.node_count for e in estimators)),
+        "single_row_ms": round(single_ms, 4),
+        "single_row_p95_ms": round(single_p95_ms, 4),
+        "batch_size": batch_size,
+        "batch_ms": round(batch_ms, 4),
+        "batch_row_us": round(batch_ms / batch_size * 1000, 3),
+        "forest_bytes": int(compiled.nbytes),
+        "pickle_bytes": len(pickle.dumps(candidate.forest)),
+        "accuracy": round(float(accuracy_score(y_test, compiled.predict(X_test))), 4)
+    }
+
+
+def profile_candidates(candidates, X_test, y_test, precisions=PRECISIONS, **kwargs):
+    return [profile_candidate(candidate, precision, X_test, y_test, **kwargs)
+            for candidate in candidates for precision in precisions]
+
+
+def mark_pareto(profiles):
+    """Flag profiles no other profile beats on both single-row p95 latency and accuracy"""
+    points = [(p["single_row_p95_ms"], -p["accuracy"]) for p in profiles]
+    for profile, point in zip(profiles, points):
+        profile["pareto"] = not any(other[0] <= point[0] and other[1] <= point[1] and other != point
+                                    for other in points)
+    return profiles
+
+
+def select_for_budget(profiles, budget_ms):
+    """Most accurate profile whose p95 single-row latency fits budget_ms, or None
+
+    Ties go to the faster, then the smaller, model.
+    """
+    fitting = [p for p in profiles if p["single_row_p95_ms"] <= budget_ms]
+    if not fitting:
+        return None
+    return min(fitting, key=lambda p: (-p["accuracy"], p["single_row_p95_ms"], p["forest_bytes"]))
+
+
+def format_report(profiles, selected=None):
+    """Text table of the profiles, fastest first; * marks the Pareto front, > the selection"""
+    lines = [f"  {'variant':26s} {'trees':>5s} {'depth':>5s} {'nodes':>6s} {'row ms':>7s} {'p95 ms':>7s} "
+             f"{'batch µs/row':>12s} {'forest kB':>9s} {'accuracy':>8s}"]
+    for p in sorted(profiles, key=lambda p: (p["single_row_p95_ms"], -p["accuracy"])):
+        marker = ">" if selected is not None and p["name"] == selected["name"] else " "
+        marker += "*" if p.get("pareto") else " "
+        lines.append(f"{marker}{p['name']:26s} {p['trees']:5d} {p['depth']:5d} {p['nodes']:6d} "
+                     f"{p['single_row_ms']:7.3f} {p['single_row_p95_ms']:7.3f} {p['batch_row_us']:12.2f} "
+                     f"{p['forest_bytes'] / 1024:9.1f} {p['accuracy']:8.2%}")
+    return lines
@@ -0,0 +1,118 @@
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+# Packed movement payload for POST /api/detect/packed, all little-endian:
+#
+#   header       magic "TGMV", version u8, flags u8, session id length u16, points u32, clicks u32
+#   session id   UTF-8, zero-padded to a multiple of 4 bytes
+#   origin       first x i32, first y i32, first timestamp f64 (ms); omitted when there are no points
+#   deltas       dx[n-1], dy[n-1], dt[n-1] as three int16 columns, or int32 with FLAG_WIDE
+#   click bitmap ceil(n / 8) bytes, bit i (least significant first) set when point i was a click
+#
+# The columns decode straight into NumPy arrays, with no per-point objects on the server.
+MAGIC = b"TGMV"
+VERSION = 1
+FLAG_INCREMENTAL = 0x01  # points holds only what was sent since the last call
+FLAG_WIDE = 0x02         # deltas are int32; set when a step does not fit int16
+FLAG_RESET = 0x04        # incremental, but the server starts the session state over from these points
+KNOWN_FLAGS = FLAG_INCREMENTAL | FLAG_WIDE | FLAG_RESET
+
+HEADER = struct.Struct("<4sBBHII")
+ORIGIN = struct.Struct("<iid")
+INT16_MIN, INT16_MAX = -(1 << 15), (1 << 15) - 1
+
+MAX_POINTS = 1 << 20
+MAX_SESSION_ID_BYTES = 1024
+
+PackedMovements = namedtuple("PackedMovements", "session_id clicks incremental coords timestamps click_mask reset")
+
+
+def _padded(length):
+    return (length + 3) & ~3
+
+
+def payload_size(session_id_bytes, points, wide=False):
+    """Exact byte length of a payload with these dimensions"""
+    size = HEADER.size + _padded(session_id_bytes)
+    if points:
+        size += ORIGIN.size + 3 * (points - 1) * (4 if wide else 2) + (points + 7) // 8
+    return size
+
+
+def _round(values):
+    """Half-up rounding to int64, like JavaScript's Math.round"""
+    return np.floor(np.asarray(values, dtype=np.float64) + 0.5).astype(np.int64)
+
+
+def encode(session_id, coords, clicks, incremental=False, timestamps=None, click_mask=None, reset=False):
+    """Pack (n, 2) coordinates, optional timestamps (ms) and click flags into the wire format
+
+    The server-side counterpart of the encoder in mouse-tracker.js, used by
+    the benchmarks and tests. Coordinates and timestamps are rounded to
+    integers the way the browser encoder rounds them.
+    """
+    coords = _round(coords).reshape(-1, 2)
+    n = len(coords)
+    if n > MAX_POINTS:
+        raise ValueError(f"{n} points exceeds the {MAX_POINTS} point limit")
+    timestamps = np.zeros(n, dtype=np.int64) if timestamps is None else _round(timestamps)
+    sid = session_id.encode("utf-8")
+    if len(sid) > MAX_SESSION_ID_BYTES:
+        raise ValueError(f"session id is longer than {MAX_SESSION_ID_BYTES} bytes")
+
+    deltas = np.stack([np.diff(coords[:, 0]), np.diff(coords[:, 1]), np.diff(timestamps)])
+    wide = bool(deltas.size) and (deltas.min() < INT16_MIN or deltas.max() > INT16_MAX)
+    flags = (FLAG_INCREMENTAL if incremental else 0) | (FLAG_WIDE if wide else 0) | (FLAG_RESET if reset else 0)
+
+    parts = [HEADER.pack(MAGIC, VERSION, flags, len(sid), n, clicks), sid.ljust(_padded(len(sid)), b"\0")]
+    if n:
+        parts.append(ORIGIN.pack(int(coords[0, 0]), int(coords[0, 1]), float(timestamps[0])))
+        parts.append(deltas.astype("<i4" if wide else "<i2").tobytes())
+        mask = np.zeros(n, dtype=bool) if click_mask is None else np.asarray(click_mask, dtype=bool)
+        parts.append(np.packbits(mask, bitorder="little").tobytes())
+    return b"".join(parts)
+
+
+def decode(payload):
+    """Unpack a payload into PackedMovements; raises ValueError on anything malformed"""
+    if len(payload) < HEADER.size:
+        raise ValueError("payload is shorter than the packed movement header")
+    magic, version, flags, sid_length, n, clicks = HEADER.unpack_from(payload)
+    if magic != MAGIC:
+        raise ValueError("not a packed movement payload")
+    if version != VERSION:
+        raise ValueError(f"unsupported packed movement format version {version}")
+    if flags & ~KNOWN_FLAGS:
+        raise ValueError(f"unknown packed movement flags {flags:#04x}")
+    if n > MAX_POINTS:
+        raise ValueError(f"{n} points exceeds the {MAX_POINTS} point limit")
+    wide = bool(flags & FLAG_WIDE)
+    expected = payload_size(sid_length, n, wide)
+    if len(payload) != expected:
+        raise ValueError(f"payload is {len(payload)} bytes, expected {expected}")
+
+    offset = HEADER.size
+    session_id = bytes(payload[offset:offset + sid_length]).decode("utf-8")
+    offset += _padded(sid_length)
+
+    coords = np.empty((n, 2), dtype=np.float64)
+    timestamps = np.empty(n, dtype=np.float64)
+    click_mask = np.zeros(n, dtype=bool)
+    if n:
+        x0, y0, t0 = ORIGIN.unpack_from(payload, offset)
+        offset += ORIGIN.size
+        deltas = np.frombuffer(payload, dtype="<i4" if wide else "<i2", count=3 * (n - 1),
+                               offset=offset).reshape(3, n - 1)
+        offset += deltas.nbytes
+        coords[0] = x0, y0
+        timestamps[0] = t0
+        # Running sums in int64 so long int16 delta runs cannot overflow
+        coords[1:, 0] = x0 + np.cumsum(deltas[0], dtype=np.int64)
+        coords[1:, 1] = y0 + np.cumsum(deltas[1], dtype=np.int64)
+        timestamps[1:] = t0 + np.cumsum(deltas[2], dtype=np.int64)
+        bits = np.frombuffer(payload, dtype=np.uint8, offset=offset)
+        click_mask = np.unpackbits(bits, count=n, bitorder="little").astype(bool)
+    return PackedMovements(session_id, clicks, bool(flags & FLAG_INCREMENTAL), coords, timestamps, click_mask,
+                           bool(flags & FLAG_RESET))
@@ -0,0 +1,168 @@
+import os
+import time
+import warnings
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import GridSearchCV, StratifiedKFold
+
+# Values searched for each RandomForestClassifier argument; the rest come from the base parameters
+SEARCH_SPACE = {
+    "n_estimators": (25, 50, 75, 150),
+    "max_depth": (6, 10, 14),
+    "min_samples_leaf": (2, 4, 8, 16),
+    "max_features": ("sqrt", "log2", 0.5),
+}
+CV_FOLDS = 5
+# Folds every candidate is scored on before it can be stopped early
+MIN_FOLDS = 2
+# After that, a candidate whose mean accuracy trails the leader's by more than this is stopped
+EARLY_STOP_MARGIN = 0.03
+
+# Feature matrix and labels, sent to each worker process once by the pool initializer
+_X = None
+_y = None
+
+
+def _init_search_worker(X, y):
+    global _X, _y
+    _X, _y = X, y
+
+
+def score_tree_counts(params, tree_counts, train_index, test_index):
+    """Fold accuracy at each tree count, from one forest grown with warm_start
+
+    Returns ({n_estimators: accuracy}, CPU seconds spent).
+    """
+    start = time.process_time()
+    forest = RandomForestClassifier(**{**params, "warm_start": True, "oob_score": False, "n_jobs": 1})
+    X_train, y_train = _X[train_index], _y[train_index]
+    X_test, y_test = _X[test_index], _y[test_index]
+    scores = {}
+    with warnings.catch_warnings():
+        # Balanced class weights are only unsafe under warm_start when the data changes between fits
+        warnings.filterwarnings("ignore", message=".*warm_start.*", category=UserWarning)
+        for n_estimators in sorted(tree_counts):
+            forest.set_params(n_estimators=n_estimators).fit(X_train, y_train)
+            scores[n_estimators] = accuracy_score(y_test, forest.predict(X_test))
+    return scores, time.process_time() - start
+
+
+def shapes(space):
+    """Every combination of the non-n_estimators arguments in space, as parameter dicts"""
+    names = [name for name in space if name != "n_estimators"]
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def search(X, y, base_params, space=SEARCH_SPACE, workers=None, folds=CV_FOLDS, min_folds=MIN_FOLDS,
+           margin=EARLY_STOP_MARGIN, seed=42):
+    """Cross-validated search over space, racing candidates fold by fold on a process pool
+
+    Candidates that differ only in n_estimators share one warm-started
+    forest per fold, scored as it grows. After min_folds folds, candidates
+    trailing the leader by more than margin are dropped, and shapes with no
+    candidate left stop being fitted. workers=1 runs in-process.
+    """
+    workers = workers or os.cpu_count() or 1
+    tree_counts = tuple(sorted(space["n_estimators"]))
+    splits = list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed).split(X, y))
+    shape_params = [{**base_params, **shape} for shape in shapes(space)]
+    alive = {index: set(tree_counts) for index in range(len(shape_params))}
+    scores = {(index, n): [] for index in alive for n in tree_counts}
+    cpu_seconds = 0.0
+    trees_grown = 0
+
+    start = time.perf_counter()
+    executor = (ProcessPoolExecutor(max_workers=workers, initializer=_init_search_worker, initargs=(X, y))
+                if workers > 1 else None)
+    if executor is None:
+        _init_search_worker(X, y)
+    try:
+        # The first min_folds folds go out together, then one fold per round so stragglers can be dropped
+        rounds = [range(min_folds)] + [[fold] for fold in range(min_folds, folds)]
+        for fold_round in rounds:
+            tasks = [(index, fold) for fold in fold_round for index, counts in alive.items() if counts]
+            if executor is None:
+                results = ((task, score_tree_counts(shape_params[task[0]], alive[task[0]], *splits[task[1]]))
+                           for task in tasks)
+            else:
+                futures = {executor.submit(score_tree_counts, shape_params[index], alive[index], *splits[fold]):
+                           (index, fold) for index, fold in tasks}
+                results = ((futures[future], future.result()) for future in as_completed(futures))
+            for (index, _), (fold_scores, seconds) in results:
+                cpu_seconds += seconds
+                trees_grown += max(fold_scores)
+                for n_estimators, accuracy in fold_scores.items():
+                    scores[index, n_estimators].append(accuracy)
+
+            means = {key: np.mean(values) for key, values in scores.items()
+                     if values and key[1] in alive[key[0]]}
+            leader = max(means.values())
+            for (index, n_estimators), mean in means.items():
+                if mean < leader - margin:
+                    alive[index].discard(n_estimators)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    wall_seconds = time.perf_counter() - start
+
+    candidates = sorted(
+        ({"params": {**{name: shape_params[index][name] for name in space}, "n_estimators": n_estimators},
+          "mean_accuracy": round(float(np.mean(values)), 4),
+          "std_accuracy": round(float(np.std(values)), 4),
+          "folds": len(values)}
+         for (index, n_estimators), values in scores.items()),
+        # Fully scored first; among equals, fewer and shallower trees
+        key=lambda c: (-c["folds"], -c["mean_accuracy"], c["params"]["n_estimators"], c["params"]["max_depth"])
+    )
+    cold_grid_trees = len(shape_params) * sum(tree_counts) * folds
+    return {
+        "best_params": candidates[0]["params"],
+        "best_accuracy": candidates[0]["mean_accuracy"],
+        "candidates": candidates,
+        "stopped_early": sum(c["folds"] < folds for c in candidates),
+        "workers": workers,
+        "wall_seconds": round(wall_seconds, 3),
+        "cpu_seconds": round(cpu_seconds, 3),
+        # Share of the pool's CPU time spent fitting; not a speedup over any baseline
+        "parallel_efficiency": round(cpu_seconds / (wall_seconds * workers), 3) if wall_seconds else 0.0,
+        "trees_grown": int(trees_grown),
+        "cold_grid_trees": cold_grid_trees
+    }
+
+
+def grid_search(X, y, base_params, space=SEARCH_SPACE, workers=None, folds=CV_FOLDS, seed=42):
+    """sklearn's exhaustive GridSearchCV over the same space and folds, every candidate cold-started
+
+    Returns (fitted GridSearchCV, wall seconds), the baseline search() is
+    compared against.
+    """
+    params = {**base_params, "oob_score": False}
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    grid = GridSearchCV(RandomForestClassifier(**params), {name: list(values) for name, values in space.items()},
+                        cv=splitter, scoring="accuracy", n_jobs=workers or os.cpu_count() or 1)
+    start = time.perf_counter()
+    grid.fit(X, y)
+    return grid, time.perf_counter() - start
+
+
+def format_report(result, top=10, baseline_seconds=None):
+    lines = [f"  {'n_estimators':>12s} {'max_depth':>9s} {'min_leaf':>8s} {'max_features':>12s} "
+             f"{'folds':>5s} {'accuracy':>15s}"]
+    for rank, c in enumerate(result["candidates"][:top]):
+        p = c["params"]
+        lines.append(f"{'>' if rank == 0 else ' '} {p['n_estimators']:12d} {str(p['max_depth']):>9s} "
+                     f"{p['min_samples_leaf']:8d} {str(p['max_features']):>12s} {c['folds']:5d} "
+                     f"{c['mean_accuracy']:7.2%} ± {c['std_accuracy']:5.2%}")
+    lines.append(f"{len(result['candidates'])} candidates, {result['stopped_early']} stopped early; "
+                 f"{result['trees_grown']} trees grown vs {result['cold_grid_trees']} for a cold grid search")
+    lines.append(f"{result['wall_seconds']:.2f}s wall on {result['workers']} worker(s) for "
+                 f"{result['cpu_seconds']:.2f} CPU-seconds of fitting "
+                 f"({result['parallel_efficiency']:.0%} parallel efficiency)")
+    if baseline_seconds:
+        lines.append(f"GridSearchCV over the same grid: {baseline_seconds:.2f}s wall, "
+                     f"{baseline_seconds / result['wall_seconds']:.2f}x speedup")
+    return lines
@@ -0,0 +1,167 @@
+import time
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+# stage: the check that fired; confidence: bot confidence in percent reported for the verdict;
+# flags: the timing stages that agreed with it
+PrefilterVerdict = namedtuple("PrefilterVerdict", "stage confidence flags")
+
+# Cheapest first: the timestamp checks look at one column, the path check at both coordinates
+STAGES = ("duplicate_timestamps", "metronome", "linear_path")
+# Clock-resolution artefacts (100 ms rounding under Tor/Firefox resistFingerprinting, steady
+# 50 Hz pointer events) trip these on human input, so they only flag a trace on their own
+TIMING_STAGES = ("duplicate_timestamps", "metronome")
+
+
+def timestamps_of(movements):
+    """Timestamps of JSON movement dicts as a float array, or None when any is missing"""
+    if isinstance(movements, np.ndarray):
+        return None
+    try:
+        return np.fromiter((m['timestamp'] for m in movements), dtype=np.float64, count=len(movements))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class PrefilterCascade:
+    """Microsecond checks that recognise scripted movement before feature extraction
+
+    Each stage looks for a pattern that scripted input produces over
+    min_points points:
+
+    duplicate_timestamps  at least duplicate_ratio of the steps share a timestamp
+    metronome             at least metronome_ratio of the intervals are the same
+                          value of min_interval_ms or more (a fixed sleep() timer)
+    linear_path           at least linear_ratio of consecutive step pairs keep the
+                          same direction and length to within step_tolerance_px
+
+    Only linear_path returns a bot verdict that skips the model. The timing
+    stages also fire on coarse or steady browser clocks, so they flag the
+    trace and the model decides; the flags ride along on a linear_path
+    verdict, and stats() reports how often the model agreed with each.
+    Steps shorter than min_step_px are ignored by linear_path, since slow
+    human drags are trivially straight at pixel resolution. The cascade
+    never says "human".
+    """
+
+    def __init__(self, stages=STAGES, min_points=12, duplicate_ratio=0.5, metronome_ratio=0.95,
+                 min_interval_ms=20.0, linear_ratio=0.9, step_tolerance_px=1.5, min_step_px=8.0,
+                 confidence=99.0):
+        unknown = set(stages) - set(STAGES)
+        if unknown:
+            raise ValueError(f"unknown prefilter stages {sorted(unknown)}; expected some of {STAGES}")
+        self.stages = tuple(stages)
+        self.min_points = min_points
+        self.duplicate_ratio = duplicate_ratio
+        self.metronome_ratio = metronome_ratio
+        self.min_interval_ms = min_interval_ms
+        self.linear_ratio = linear_ratio
+        self.step_tolerance_px = step_tolerance_px
+        self.min_step_px = min_step_px
+        self.confidence = confidence
+        self._checks = {name: getattr(self, f"_{name}") for name in self.stages}
+        self._lock = threading.Lock()
+        self.evaluated = 0
+        self.passed = 0
+        self.short_circuited = dict.fromkeys(self.stages, 0)
+        self.flagged = dict.fromkeys(self.stages, 0)
+        self.model_checked = dict.fromkeys(self.stages, 0)  # flagged traces that went on to the model
+        self.model_agreed = dict.fromkeys(self.stages, 0)   # ... and that it also called a bot
+        self.prefilter_ms = 0.0
+        self.model_path_ms = 0.0  # feature extraction + inference for traces that went on to the model
+
+    def evaluate(self, coords, timestamps=None):
+        """Returns (verdict, flags): a PrefilterVerdict to skip the model or None, and the timing stages that fired
+
+        timestamps may cover more points than coords, e.g. the session's
+        recent window on an incremental call.
+        """
+        start = time.perf_counter()
+        flags = tuple(name for name, check in self._checks.items()
+                      if name in TIMING_STAGES and check(coords, timestamps))
+        verdict = None
+        for name, check in self._checks.items():
+            if name not in TIMING_STAGES and check(coords, timestamps):
+                verdict = PrefilterVerdict(name, self.confidence, flags)
+                break
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.evaluated += 1
+            self.prefilter_ms += elapsed_ms
+            for name in flags:
+                self.flagged[name] += 1
+            if verdict is None:
+                self.passed += 1
+            else:
+                self.flagged[verdict.stage] += 1
+                self.short_circuited[verdict.stage] += 1
+        return verdict, flags
+
+    def record_model_path(self, duration_ms, flags=(), is_bot=False):
+        """Time a trace that passed the cascade spent in feature extraction and inference
+
+        flags are the timing stages that fired on it, tallied against the model's answer.
+        """
+        with self._lock:
+            self.model_path_ms += duration_ms
+            for name in flags:
+                self.model_checked[name] += 1
+                self.model_agreed[name] += is_bot
+
+    def _duplicate_timestamps(self, coords, timestamps):
+        if timestamps is None or len(timestamps) < self.min_points:
+            return False
+        return np.count_nonzero(np.diff(timestamps) == 0) >= self.duplicate_ratio * (len(timestamps) - 1)
+
+    def _metronome(self, coords, timestamps):
+        if timestamps is None or len(timestamps) < self.min_points:
+            return False
+        intervals = np.diff(timestamps)
+        values, counts = np.unique(intervals, return_counts=True)
+        mode = counts.argmax()
+        return values[mode] >= self.min_interval_ms and counts[mode] >= self.metronome_ratio * len(intervals)
+
+    def _linear_path(self, coords, timestamps):
+        steps = np.diff(coords, axis=0)
+        lengths = np.hypot(steps[:, 0], steps[:, 1])
+        moving = lengths >= self.min_step_px
+        steps, lengths = steps[moving], lengths[moving]
+        if len(steps) < self.min_points - 1:
+            return False
+        a, b = steps[:-1], steps[1:]
+        # Distance of each step's end from the line of the step before it, and the change in length
+        cross = a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]
+        forward = (a * b).sum(axis=1) > 0
+        aligned = forward & (np.abs(cross) <= self.step_tolerance_px * lengths[:-1])
+        steady = np.abs(np.diff(lengths)) <= self.step_tolerance_px
+        return np.count_nonzero(aligned & steady) >= self.linear_ratio * len(a)
+
+    def stats(self):
+        with self._lock:
+            short_circuited = sum(self.short_circuited.values())
+            mean_model_ms = self.model_path_ms / self.passed if self.passed else 0.0
+            mean_prefilter_ms = self.prefilter_ms / self.evaluated if self.evaluated else 0.0
+            return {
+                "evaluated": self.evaluated,
+                "passed_to_model": self.passed,
+                "short_circuited": short_circuited,
+                "short_circuit_ratio": round(short_circuited / self.evaluated, 4) if self.evaluated else 0.0,
+                "stages": {
+                    name: {
+                        "short_circuited": count,
+                        "ratio": round(count / self.evaluated, 4) if self.evaluated else 0.0,
+                        "flagged": self.flagged[name],
+                        "flagged_to_model": self.model_checked[name],
+                        # Of the flagged traces sent on to the model, the share it also called a bot
+                        "model_agreement": (round(self.model_agreed[name] / self.model_checked[name], 4)
+                                            if self.model_checked[name] else None)
+                    }
+                    for name, count in self.short_circuited.items()
+                },
+                "mean_prefilter_ms": round(mean_prefilter_ms, 4),
+                "mean_model_path_ms": round(mean_model_ms, 4),
+                # Model time the short-circuited traces would have cost, at the mean of those that paid it
+                "estimated_saved_ms": round(short_circuited * mean_model_ms, 2)
+            }
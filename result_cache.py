@@ -0,0 +1,92 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from metrics import Counter
+
+# Coordinates are rounded to this many pixels before hashing; browsers report whole pixels
+COORDINATE_QUANTUM = 1.0
+
+
+def window_key(session_id, coords, clicks, quantum=COORDINATE_QUANTUM):
+    """16-byte digest of a session id, its quantized (n, 2) coordinate window and click count"""
+    quantized = np.floor(np.asarray(coords, dtype=np.float64) / quantum + 0.5).astype(np.int64)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(session_id.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(int(clicks).to_bytes(8, "little", signed=True))
+    digest.update(quantized.tobytes())
+    return digest.digest()
+
+
+class ResultCache:
+    """Bounded LRU of detection results with a time-to-live
+
+    Entries belong to a model generation. invalidate() drops every entry
+    and starts a new generation, and put() ignores results computed under
+    an older one, so a detection still in flight when the model is swapped
+    cannot repopulate the cache with the old model's verdict.
+    """
+
+    def __init__(self, max_entries=10000, ttl=60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation = 0
+        self._entries = OrderedDict()  # key -> (expires_at, result)
+        self._lock = threading.Lock()
+        self.hits = Counter()
+        self.misses = Counter()
+        self.evictions = 0
+        self.expired = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """The cached result for key, or None when it is missing or has expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses.inc()
+                return None
+            self._entries.move_to_end(key)
+        self.hits.inc()
+        return entry[1]
+
+    def put(self, key, result, generation):
+        """Store a copy of result, unless the model changed since generation was read"""
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Forget every result, e.g. because the model that produced them was replaced"""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        lookups = self.hits.value + self.misses.value
+        return {
+            "entries": len(self._entries),
+            "generation": self.generation,
+            "hits": self.hits.value,
+            "misses": self.misses.value,
+            "hit_ratio": round(self.hits.value / lookups, 4) if lookups else 0.0,
+            "miss_ratio": round(self.misses.value / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expired": self.expired
+        }
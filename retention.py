@@ -0,0 +1,216 @@
+import os
+import gzip
+import json
+import time
+import argparse
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from metrics import Counter
+from config import database_config as db_config
+
+# Oldest idle sessions first; blocked sessions are kept, since the block lives in their row
+SELECT_EXPIRED_SQL = '''
+    SELECT session_id, created_at, user_type, confidence, status, movement_count, last_prediction,
+           ip_address, user_agent
+    FROM sessions
+    WHERE last_prediction < ? AND status != 'blocked'
+    ORDER BY last_prediction
+    LIMIT ?
+'''
+ARCHIVE_COLUMNS = ["session_id", "created_at", "user_type", "confidence", "status", "movement_count",
+                   "last_prediction", "ip_address", "user_agent"]
+
+# Only deletes rows that have not been written since they were read, and returns them for the archive
+DELETE_EXPIRED_SQL = f'''
+    DELETE FROM sessions WHERE session_id = ? AND last_prediction = ? AND status != 'blocked'
+    RETURNING {", ".join(ARCHIVE_COLUMNS)}
+'''
+
+# selected: expired rows read for the batch; deleted: those still idle at the delete, and archived
+EvictedBatch = namedtuple("EvictedBatch", "selected deleted")
+
+
+def partition_of(row):
+    """Archive partition (the last_prediction day) of a session row"""
+    return str(row["last_prediction"])[:10]
+
+
+def write_archive(archive_dir, rows, publish=True):
+    """Write rows as gzipped JSON lines, one new file per day partition; returns the paths
+
+    Files are written under a temporary name and renamed, so a reader never
+    sees a partial file. With publish=False the temporary paths are returned
+    instead, for publish_archive once the rows' delete has committed.
+    """
+    by_day = {}
+    for row in rows:
+        by_day.setdefault(partition_of(row), []).append(row)
+    paths = []
+    for day, day_rows in sorted(by_day.items()):
+        directory = os.path.join(archive_dir, day)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"sessions-{time.time_ns()}-{os.getpid()}.jsonl.gz")
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            for row in day_rows:
+                f.write(json.dumps(row) + "\n")
+        if publish:
+            os.replace(tmp_path, path)
+        paths.append(path if publish else tmp_path)
+    return paths
+
+
+def publish_archive(tmp_paths):
+    """Rename files staged by write_archive(publish=False) to the names iter_archive reads"""
+    for tmp_path in tmp_paths:
+        os.replace(tmp_path, tmp_path[:-len(".tmp")])
+
+
+def iter_archive(archive_dir, since=None, until=None, session_id=None):
+    """Archived session rows from the day partitions between since and until (YYYY-MM-DD, inclusive)
+
+    A session evicted more than once, after coming back, appears once per
+    eviction with its own last_prediction.
+    """
+    if not os.path.isdir(archive_dir):
+        return
+    for day in sorted(os.listdir(archive_dir)):
+        if (since and day < since) or (until and day > until):
+            continue
+        directory = os.path.join(archive_dir, day)
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".jsonl.gz"):
+                continue
+            with gzip.open(os.path.join(directory, name), 'rt', encoding='utf-8') as f:
+                for line in f:
+                    row = json.loads(line)
+                    if session_id is None or row["session_id"] == session_id:
+                        yield row
+
+
+class SessionRetention:
+    """Archives and deletes sessions idle for longer than ttl, a small batch at a time
+
+    Expired rows are read on a pooled connection, then deleted through the
+    storage writer queue as one short transaction per batch, so detection
+    upserts are never held behind a long purge. The delete only removes rows
+    whose last_prediction is unchanged, so a session that came back in
+    between keeps its row, and only the rows it returns are archived: the
+    files are staged inside the delete's transaction and published once it
+    commits. After a pass, freed pages are returned with incremental_vacuum
+    and the WAL is checkpointed passively.
+    """
+
+    def __init__(self, storage, archive_dir, ttl_seconds, batch_size=500, max_batches=200,
+                 vacuum_pages=1000):
+        self.storage = storage
+        self.archive_dir = archive_dir
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.vacuum_pages = vacuum_pages
+        self.evicted = Counter()
+        self.archived_files = 0
+        self.passes = 0
+        self.last_pass = None
+
+    def expired_rows(self, now=None):
+        """Up to batch_size sessions idle past the TTL, oldest first, as dicts"""
+        cutoff = (now or datetime.now()) - self.ttl
+        with self.storage.connection() as conn:
+            rows = conn.execute(SELECT_EXPIRED_SQL, (cutoff, self.batch_size)).fetchall()
+        return [dict(zip(ARCHIVE_COLUMNS, row)) for row in rows]
+
+    def evict_batch(self, now=None):
+        """Delete one batch and archive exactly the rows deleted; returns an EvictedBatch"""
+        rows = self.expired_rows(now)
+        if not rows:
+            return EvictedBatch(0, 0)
+        keys = [(row["session_id"], row["last_prediction"]) for row in rows]
+        staged = []
+
+        def delete_and_stage(conn):
+            deleted = [dict(zip(ARCHIVE_COLUMNS, row)) for key in keys
+                       for row in conn.execute(DELETE_EXPIRED_SQL, key).fetchall()]
+            # A write error rolls this back and runs it again, so each attempt stages its own files
+            paths = write_archive(self.archive_dir, deleted, publish=False)
+            staged.extend(paths)
+            return len(deleted), paths
+
+        # On an error the staged files stay behind: whether the delete committed is unknown
+        deleted, paths = self.storage.run_write(delete_and_stage)
+        publish_archive(paths)
+        for path in staged:
+            if path not in paths:
+                os.remove(path)  # from an attempt that was rolled back
+        self.archived_files += len(paths)
+        self.evicted.inc(deleted)
+        return EvictedBatch(len(rows), deleted)
+
+    def compact(self):
+        """Return up to vacuum_pages free pages to the filesystem and checkpoint the WAL"""
+        freed = self.storage.run_write(self._incremental_vacuum)
+        with self.storage.connection() as conn:
+            busy, wal_pages, checkpointed = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        return {"freed_pages": freed, "wal_pages": wal_pages, "checkpointed_pages": checkpointed}
+
+    def _incremental_vacuum(self, conn):
+        before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        conn.execute(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)})").fetchall()
+        return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def run_pass(self, now=None):
+        """Evict batches until none are left or max_batches ran, then compact"""
+        started = time.perf_counter()
+        evicted = 0
+        batches = 0
+        while batches < self.max_batches:
+            batch = self.evict_batch(now)
+            if not batch.selected:
+                break
+            evicted += batch.deleted
+            batches += 1
+            # A batch whose sessions all came back deletes nothing, but there may be more behind it
+            if batch.selected < self.batch_size:
+                break
+        compaction = self.compact()
+        self.passes += 1
+        self.last_pass = {
+            "evicted": evicted,
+            "batches": batches,
+            "seconds": round(time.perf_counter() - started, 4),
+            "finished_at": datetime.now().isoformat(),
+            **compaction
+        }
+        return self.last_pass
+
+    def stats(self):
+        with self.storage.connection() as conn:
+            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+            freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        return {
+            "ttl_seconds": self.ttl.total_seconds(),
+            "evicted": self.evicted.value,
+            "archived_files": self.archived_files,
+            "passes": self.passes,
+            "last_pass": self.last_pass,
+            "database_bytes": page_count * page_size,
+            "free_pages": freelist,
+            # 0 = none: freed pages are reused but the file does not shrink until a full VACUUM
+            "auto_vacuum": {0: "none", 1: "full", 2: "incremental"}.get(auto_vacuum, auto_vacuum)
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query archived TouchGuard sessions")
+    parser.add_argument("--archive-dir", default=db_config.ARCHIVE_DIR)
+    parser.add_argument("--since", help="first day to read, YYYY-MM-DD")
+    parser.add_argument("--until", help="last day to read, YYYY-MM-DD")
+    parser.add_argument("--session", help="only this session id")
+    args = parser.parse_args()
+
+    for row in iter_archive(args.archive_dir, args.since, args.until, args.session):
+        print(json.dumps(row))
@@ -10,6 +10,8 @@ from datetime import datetime
 import random
 import math
 
+import movement_patterns
+
 class AdvancedBotSimulator:
     def __init__(self, target_url="http://localhost:8000"):
         self.target_url = target_url
@@ -36,62 +38,11 @@ class AdvancedBotSimulator:
     
     def generate_bezier_curve(self, start_x, start_y, end_x, end_y, steps=50):
         """Generate curved, human-like movements using Bézier curves"""
-        movements = []
-        current_time = int(time.time() * 1000)
-        
-        # Add control points for natural curve
-        mid_x = (start_x + end_x) / 2 + random.randint(-100, 100)
-        mid_y = (start_y + end_y) / 2 + random.randint(-50, 50)
-        
-        for i in range(steps):
-            t = i / (steps - 1) if steps > 1 else 1
-            
-            # Quadratic Bézier curve
-            x = (1-t)**2 * start_x + 2*(1-t)*t * mid_x + t**2 * end_x
-            y = (1-t)**2 * start_y + 2*(1-t)*t * mid_y + t**2 * end_y
-            
-            # Add subtle random noise (human imperfection)
-            x += random.uniform(-3, 3)
-            y += random.uniform(-3, 3)
-            
-            # Variable timing (human-like acceleration/deceleration)
-            base_delay = random.uniform(15, 35)  # Variable timing
-            timestamp_offset = int(base_delay * i)
-            
-            movements.append({
-                'x': int(max(0, min(x, 1920))),  # Keep within screen bounds
-                'y': int(max(0, min(y, 1080))),
-                'timestamp': current_time + timestamp_offset
-            })
-            
-        return movements
+        return movement_patterns.generate_bezier_curve(start_x, start_y, end_x, end_y, steps)
     
     def add_human_like_pauses(self, movements):
         """Add realistic pauses and micro-movements"""
-        enhanced_movements = []
-        
-        for i, move in enumerate(movements):
-            enhanced_movements.append(move)
-            
-            # Random pauses (thinking time)
-            if random.random() < 0.08:  # 8% chance of pause
-                pause_duration = random.uniform(200, 800)  # 200-800ms pause
-                pause_move = move.copy()
-                pause_move['timestamp'] += int(pause_duration)
-                enhanced_movements.append(pause_move)
-            
-            # Micro-movements (small adjustments)
-            if random.random() < 0.03:  # 3% chance of micro-movement
-                micro_x = move['x'] + random.randint(-5, 5)
-                micro_y = move['y'] + random.randint(-5, 5)
-                micro_move = {
-                    'x': micro_x,
-                    'y': micro_y,
-                    'timestamp': move['timestamp'] + random.randint(20, 100)
-                }
-                enhanced_movements.append(micro_move)
-                
-        return enhanced_movements
+        return movement_patterns.add_human_like_pauses(movements)
     
     def simulate_human_shopping_pattern(self):
         """Simulate more human-like shopping behavior"""
@@ -8,6 +8,8 @@ from selenium.webdriver.chrome.options import Options
 from datetime import datetime
 import numpy as np
 
+import movement_patterns
+
 class BasicBotSimulator:
     def __init__(self, target_url="http://localhost:8000"):
         self.target_url = target_url
@@ -27,21 +29,7 @@ class BasicBotSimulator:
         
     def generate_linear_movements(self, start_x, start_y, end_x, end_y, steps=20):
         """Generate straight-line bot movements"""
-        movements = []
-        current_time = int(time.time() * 1000)
-        
-        for i in range(steps):
-            progress = i / (steps - 1) if steps > 1 else 1
-            x = int(start_x + (end_x - start_x) * progress)
-            y = int(start_y + (end_y - start_y) * progress)
-            
-            movements.append({
-                'x': x,
-                'y': y,
-                'timestamp': current_time + i * 50  # Fixed 50ms intervals
-            })
-            
-        return movements
+        return movement_patterns.generate_linear_movements(start_x, start_y, end_x, end_y, steps)
     
     def simulate_bot_shopping(self):
         """Simulate bot shopping behavior"""
@@ -0,0 +1,134 @@
+import os
+import sys
+import csv
+import json
+import random
+import hashlib
+import argparse
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import bulk_score
+from benchmark_suite import load_app
+from benchmark_ingestion import make_dataset
+from benchmark_feature_extraction import synthetic_trace
+
+
+def write_capture(path, n_requests, seed=5):
+    """A JSONL capture of /api/detect bodies, with a malformed line and a too-short trace mixed in"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(n_requests):
+            if i == 3:
+                f.write("{truncated\n")
+                continue
+            n = 2 if i == 7 else rng.randint(10, 400)
+            movements = [{"x": x, "y": y, "timestamp": t * 16}
+                         for t, (x, y) in enumerate(synthetic_trace(n, seed=seed + i))]
+            if i % 4 == 0:
+                movements.insert(n // 2, {"type": "scroll", "timestamp": n * 8})  # counted, no coordinates
+            f.write(json.dumps({"session_id": f"capture_{i}", "movements": movements, "clicks": rng.randint(0, 4),
+                                "timestamp": 0}) + "\n")
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def check_against_detection_engine(capture, rows):
+    """Every scored line gets the verdict and confidence DetectionEngine.predict gives it"""
+    os.environ["TOUCHGUARD_PREFILTER"] = "0"  # the offline scorer re-runs the model only
+    with tempfile.TemporaryDirectory() as tmp:
+        app = load_app(os.path.join(tmp, "bench.db"))
+        by_id = {row["session_id"]: row for row in rows}
+        with open(capture, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    body = json.loads(line)
+                except ValueError:
+                    continue
+                expected = app.detector.predict(body["session_id"], body["movements"], body["clicks"],
+                                                "203.0.113.7", "bench")
+                row = by_id[body["session_id"]]
+                if "error" in expected:
+                    assert row["status"] == bulk_score.STATUS_INSUFFICIENT, (row, expected)
+                    continue
+                assert row["status"] == bulk_score.STATUS_OK, row
+                assert (row["is_bot"] == "True") == expected["is_bot"], (row, expected)
+                assert float(row["confidence"]) == expected["confidence"], (row, expected)
+                assert int(row["movement_count"]) == expected["movement_count"], (row, expected)
+        app.storage.close()
+
+
+def check_precision(tmp):
+    """The scorer serves the precision the variants report records for the pickle, as the app does"""
+    with open(bulk_score.MODEL_PATH, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    report = os.path.join(tmp, "model_variants.json")
+    forest_path = os.path.join(tmp, "forest")
+    # A float64 export of this very pickle must not be served when float32 was selected
+    bulk_score.load_scoring_model(forest_path=None, precision="float64").save(forest_path, source_digest=digest)
+    for report_digest, expected in [(digest, "float32"), ("retrained", "float64")]:
+        with open(report, 'w', encoding='utf-8') as f:
+            json.dump({"model_digest": report_digest, "selected_precision": "float32"}, f)
+        model = bulk_score.load_scoring_model(forest_path=forest_path, precision=None, variants_report=report)
+        assert model.precision == expected, (report_digest, model.precision)
+
+
+def check_formats(dataset, tmp):
+    """CSV and npz parts hold the same rows, in input order, for any worker count"""
+    csv_path = os.path.join(tmp, "dataset.csv")
+    bulk_score.score_inputs(dataset, csv_path, workers=1, chunk_size=64, progress=False)
+    parts_dir = os.path.join(tmp, "dataset_npz")
+    bulk_score.score_inputs(dataset, parts_dir, workers=2, chunk_size=64, progress=False, with_features=True)
+    rows = read_csv(csv_path)
+    with open(os.path.join(parts_dir, "meta.json"), encoding='utf-8') as f:
+        meta = json.load(f)
+    parts = [np.load(os.path.join(parts_dir, part["file"])) for part in meta["parts"]]
+    session_ids = np.concatenate([part["session_id"] for part in parts]).tolist()
+    confidence = np.concatenate([part["confidence"] for part in parts])
+    assert meta["rows"] == len(rows) and session_ids == [row["session_id"] for row in rows]
+    assert np.array_equal(confidence, [float(row["confidence"]) for row in rows])
+    assert np.concatenate([part["features"] for part in parts]).shape == (len(rows), 18)
+    assert {row["status"] for row in rows} == {bulk_score.STATUS_OK, bulk_score.STATUS_UNREADABLE}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline bulk scorer: parity with /api/detect and throughput")
+    parser.add_argument("--sessions", type=int, default=4000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    os.chdir(ROOT)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        capture = os.path.join(tmp, "capture.jsonl")
+        write_capture(capture, 300)
+        capture_csv = os.path.join(tmp, "capture.csv")
+        bulk_score.score_inputs(capture, capture_csv, workers=1, chunk_size=64, progress=False)
+        check_against_detection_engine(capture, read_csv(capture_csv))
+        check_precision(tmp)
+        print("✅ Bulk verdicts, confidences and movement counts match DetectionEngine.predict for every captured "
+              "request, at the precision the variants report selects")
+
+        dataset = os.path.join(tmp, "dataset")
+        make_dataset(dataset, 300)
+        check_formats(dataset, tmp)
+        print("✅ CSV and columnar outputs agree and keep input order; bad files are reported, not fatal")
+
+        write_capture(capture, args.sessions, seed=9)
+        print(f"\n{args.sessions} captured requests")
+        print(f"{'workers':>7s} {'chunk':>6s} {'seconds':>8s} {'sessions/s':>11s}")
+        for workers, chunk_size in [(1, 1), (1, 64), (1, bulk_score.CHUNK_SIZE),
+                                    (args.workers, bulk_score.CHUNK_SIZE)]:
+            summary = bulk_score.score_inputs(capture, os.path.join(tmp, "out.csv"), workers=workers,
+                                              chunk_size=chunk_size, progress=False)
+            print(f"{workers:7d} {chunk_size:6d} {summary['seconds']:8.2f} {summary['sessions_per_second']:11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import pickle
+import statistics
+import warnings
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import feature_engine
+from compiled_forest import CompiledForest
+from benchmark_feature_extraction import synthetic_trace
+
+MODEL_PATH = os.path.join(ROOT, 'models', 'touchguard_improved_bot_detector.pkl')
+
+
+def load_model(path=MODEL_PATH):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+
+def sample_features(n_rows, seed=0):
+    """Realistic feature rows from synthetic traces plus random rows that reach unusual leaves"""
+    rng = np.random.default_rng(seed)
+    rows = [feature_engine.extract_features(synthetic_trace(int(rng.integers(10, 300)), seed + i),
+                                            int(rng.integers(0, 10)))
+            for i in range(n_rows // 2)]
+    rows = np.array(rows)
+    noise = rng.normal(0, 1, size=(n_rows - len(rows), rows.shape[1])) * rows.std(axis=0) + rows.mean(axis=0)
+    return np.vstack([rows, noise])
+
+
+def check_parity(model, compiled, X):
+    expected = model.predict_proba(X)
+    actual = compiled.predict_proba(X)
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+    for row in X[:50]:
+        np.testing.assert_allclose(compiled.predict_proba([row]), model.predict_proba([row]), rtol=0, atol=1e-12)
+
+
+def median_us(fn, arg, repeat=7, number=50):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(arg)
+        samples.append((time.perf_counter() - start) / number * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    model = load_model()
+    compiled = CompiledForest.from_sklearn(model)
+    X = sample_features(2000)
+    check_parity(model, compiled, X)
+    print(f"✅ Compiled forest ({compiled.n_estimators} trees, depth {compiled.depth}) "
+          f"matches sklearn predict_proba on {len(X)} rows")
+    print()
+    print(f"{'batch':>6s} | {'sklearn (µs)':>13s} | {'compiled (µs)':>14s} | {'speedup':>8s}")
+    print("-" * 50)
+    for batch in [1, 8, 32, 256]:
+        rows = X[:batch]
+        sk_us = median_us(model.predict_proba, rows, number=20)
+        co_us = median_us(compiled.predict_proba, rows)
+        print(f"{batch:6d} | {sk_us:13.1f} | {co_us:14.1f} | {sk_us / co_us:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
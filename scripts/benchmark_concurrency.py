@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+import numpy as np
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from benchmark_feature_extraction import synthetic_trace
+
+# (label, environment) pairs: everything on the event loop vs. the offloaded execution layer
+CONFIGURATIONS = [
+    ("inline (before)", {"TOUCHGUARD_DB_WORKERS": "0", "TOUCHGUARD_INFERENCE_EXECUTOR": "inline"}),
+    ("thread pools", {"TOUCHGUARD_DB_WORKERS": "4", "TOUCHGUARD_INFERENCE_EXECUTOR": "thread"}),
+    ("process pool + shm", {"TOUCHGUARD_DB_WORKERS": "4", "TOUCHGUARD_INFERENCE_EXECUTOR": "process"}),
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, env_overrides):
+    # Every client resends one payload, which the result cache would otherwise answer
+    env = dict(os.environ, TOUCHGUARD_RESULT_CACHE="0", **env_overrides)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/api/admin/inference-stats", timeout=1)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+async def client(http, client_id, requests_per_client, latencies, errors):
+    trace = synthetic_trace(100, seed=client_id)
+    payload = {
+        "session_id": f"bench_{client_id}",
+        "movements": [{"x": x, "y": y, "timestamp": i * 16} for i, (x, y) in enumerate(trace)],
+        "clicks": 1,
+        "timestamp": time.time()
+    }
+    for i in range(requests_per_client):
+        start = time.perf_counter()
+        try:
+            # One admin lookup for every four detections, like an operator watching live traffic
+            if i % 5 == 4:
+                response = await http.get(f"/api/session/bench_{client_id}")
+            else:
+                response = await http.post("/api/detect", json=payload)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run_load(port, clients, requests_per_client):
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*[client(http, i, requests_per_client, latencies, errors)
+                               for i in range(clients)])
+        elapsed = time.perf_counter() - start
+    return np.array(latencies), errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="p99 latency of the API under concurrent clients")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=10, help="requests per client")
+    args = parser.parse_args()
+
+    print(f"{args.clients} concurrent clients x {args.requests} requests")
+    print(f"{'configuration':>20s} | {'req/s':>7s} | {'p50 ms':>7s} | {'p95 ms':>7s} | {'p99 ms':>7s} | errors")
+    print("-" * 70)
+    for label, env in CONFIGURATIONS:
+        port = free_port()
+        proc = start_server(port, env)
+        try:
+            asyncio.run(run_load(port, min(args.clients, 10), 2))  # warmup
+            latencies, errors, elapsed = asyncio.run(run_load(port, args.clients, args.requests))
+        finally:
+            proc.terminate()
+            proc.wait()
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"{label:>20s} | {len(latencies) / elapsed:7.0f} | {p50:7.1f} | {p95:7.1f} | {p99:7.1f} | {len(errors)}")
+
+
+if __name__ == "__main__":
+    main()
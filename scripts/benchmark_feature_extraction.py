@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+import statistics
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import feature_engine
+
+
+def loop_extract_features(movements, click_count):
+    """Original per-point loop extractor from app.py, kept as the parity reference"""
+    if len(movements) < 3:
+        return None
+
+    x_coords = [m[0] for m in movements]
+    y_coords = [m[1] for m in movements]
+
+    velocities = []
+    accelerations = []
+    direction_changes = []
+    distances = []
+    pauses = []
+
+    for i in range(1, len(movements)):
+        dx = x_coords[i] - x_coords[i-1]
+        dy = y_coords[i] - y_coords[i-1]
+        distance = np.sqrt(dx**2 + dy**2)
+        distances.append(distance)
+        velocity = max(distance, 0.1)
+        velocities.append(velocity)
+
+        if velocity < 2:
+            pauses.append(1)
+
+        if i > 1:
+            prev_velocity = velocities[-2] if len(velocities) > 1 else velocity
+            acceleration = velocity - prev_velocity
+            accelerations.append(acceleration)
+
+        if i > 1 and distance > 0:
+            prev_dx = x_coords[i-1] - x_coords[i-2]
+            prev_dy = y_coords[i-1] - y_coords[i-2]
+            if prev_dx != 0 or prev_dy != 0:
+                angle_current = np.arctan2(dy, dx)
+                angle_prev = np.arctan2(prev_dy, prev_dx)
+                angle_diff = abs(angle_current - angle_prev)
+                if angle_diff > np.pi:
+                    angle_diff = 2*np.pi - angle_diff
+                direction_changes.append(angle_diff)
+
+    features = [
+        np.mean(velocities) if velocities else 0,
+        np.std(velocities) if len(velocities) > 1 else 0,
+        np.max(velocities) if velocities else 0,
+        np.min(velocities) if velocities else 0,
+        np.median(velocities) if velocities else 0,
+        np.var(velocities) if len(velocities) > 1 else 0,
+        np.mean(accelerations) if accelerations else 0,
+        np.std(accelerations) if len(accelerations) > 1 else 0,
+        np.mean(direction_changes) if direction_changes else 0,
+        np.std(direction_changes) if len(direction_changes) > 1 else 0,
+        len(movements),
+        sum(distances) if distances else 0,
+        click_count,
+        len(pauses),
+        (max(x_coords) - min(x_coords)) if x_coords else 0,
+        (max(y_coords) - min(y_coords)) if y_coords else 0,
+        len(movements) / (sum(distances) + 1) if distances else 0,
+        (sum(distances) / len(movements)) if movements and distances else 0
+    ]
+    return [float(f) if not np.isnan(f) and not np.isinf(f) else 0.0 for f in features]
+
+
+def synthetic_trace(n_points, seed=0):
+    """Human-ish random walk with occasional pauses, as (x, y) tuples"""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 6, size=(n_points, 2))
+    steps[rng.random(n_points) < 0.1] = 0
+    coords = np.clip(np.cumsum(steps, axis=0) + 500, 0, 1920).round()
+    return [(float(x), float(y)) for x, y in coords]
+
+
+def time_call(fn, *args, repeat=7, number=None):
+    """Median per-call latency in microseconds"""
+    if number is None:
+        start = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - start
+        number = max(1, int(0.05 / max(elapsed, 1e-7)))
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(*args)
+        samples.append((time.perf_counter() - start) / number * 1e6)
+    return statistics.median(samples)
+
+
+def check_parity(sizes):
+    """Assert the vectorized engine matches the loop extractor on every size"""
+    for n in sizes:
+        for seed in range(3):
+            trace = synthetic_trace(n, seed)
+            expected = loop_extract_features(trace, 3)
+            actual = feature_engine.extract_features(trace, 3)
+            np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-12)
+    # Degenerate traces: stationary cursor and a perfectly straight line
+    for trace in ([(5.0, 5.0)] * 10, [(float(i), 2.0 * i) for i in range(10)]):
+        np.testing.assert_allclose(feature_engine.extract_features(trace, 0),
+                                   loop_extract_features(trace, 0), rtol=1e-12, atol=1e-12)
+
+
+def main():
+    sizes = [10, 100, 1_000, 10_000]
+    check_parity(sizes)
+    print("✅ Vectorized features match the loop extractor")
+    print()
+    print(f"{'points':>8s} | {'loop (µs)':>12s} | {'vectorized (µs)':>16s} | {'speedup':>8s}")
+    print("-" * 54)
+    for n in sizes:
+        trace = synthetic_trace(n)
+        loop_us = time_call(loop_extract_features, trace, 3)
+        vec_us = time_call(feature_engine.extract_features, trace, 3)
+        print(f"{n:8d} | {loop_us:12.1f} | {vec_us:16.1f} | {loop_us / vec_us:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
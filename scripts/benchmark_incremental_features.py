@@ -0,0 +1,111 @@
+import os
+import sys
+import time
+import pickle
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import feature_engine
+from session_state import EXACT_MEDIAN_STEPS, MEDIAN_BIN_GROWTH, SessionFeatureState, SessionStateStore
+from shared_state import SharedStateStore, SharedSessionStates
+from benchmark_feature_extraction import synthetic_trace
+
+
+def check_parity(total_points=5000, seed=0):
+    """Feed a trace in uneven chunks and compare against a full recompute after every chunk
+
+    velocity_median is exact up to EXACT_MEDIAN_STEPS steps and within
+    MEDIAN_BIN_GROWTH of it after; the pickled state stops growing there.
+    """
+    rng = np.random.default_rng(seed)
+    trace = synthetic_trace(total_points, seed)
+    state = SessionFeatureState()
+    median = feature_engine.FEATURE_NAMES.index('velocity_median')
+    pos = 0
+    pickled_sizes = []
+    while pos < total_points:
+        chunk = int(rng.integers(1, 40))
+        state.update(trace[pos:pos + chunk])
+        pos = min(pos + chunk, total_points)
+        expected = feature_engine.extract_features(trace[:pos], 4)
+        actual = state.features(4)
+        if expected is None:
+            assert actual is None, f"expected no features at {pos} points"
+            continue
+        if pos - 1 > EXACT_MEDIAN_STEPS:
+            assert abs(actual[median] / expected[median] - 1) <= MEDIAN_BIN_GROWTH - 1, (pos, actual, expected)
+            actual[median] = expected[median]
+            pickled_sizes.append(len(pickle.dumps(state)))
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9)
+    # Only the integer counters still grow
+    assert max(pickled_sizes) - min(pickled_sizes) <= 16, (min(pickled_sizes), max(pickled_sizes))
+
+
+def check_eviction():
+    store = SessionStateStore(max_sessions=3, idle_timeout=0.05)
+    for i in range(5):
+        store.update(f"s{i}", [(0, 0), (1, 1)])
+    assert len(store) == 3 and "s0" not in store and "s4" in store
+    time.sleep(0.06)
+    store.update("fresh", [(0, 0)])  # over capacity: drops least recent s2
+    assert store.evict_idle() == 2 and list(store._states) == ["fresh"]
+
+
+def check_state_reset():
+    """Both stores report a lost state to the caller, and a reset call rebuilds it from the resent window"""
+    trace = synthetic_trace(60)
+    with tempfile.TemporaryDirectory() as tmp:
+        shared = SharedStateStore(os.path.join(tmp, "shared.db"))
+        shared.install()
+        for store in (SessionStateStore(max_sessions=1), SharedSessionStates(shared, max_sessions=1)):
+            first = store.update("s", trace[:20], 2)
+            second = store.update("s", trace[20:40], 2)
+            assert first.state_reset and not second.state_reset and second.count == 40
+            store.update("other", trace[:5], 2)
+            if isinstance(store, SharedSessionStates):
+                store.evict_idle()
+            lost = store.update("s", trace[40:], 2)
+            assert lost.state_reset and lost.count == 20, lost.count
+            # The tracker resends its window with reset, which must not be added to the fragment
+            resynced = store.update("s", trace, 2, reset=True)
+            assert resynced.count == 60
+            assert np.allclose(resynced.features, feature_engine.extract_features(trace, 2))
+
+
+def main():
+    check_parity()
+    check_eviction()
+    check_state_reset()
+    print("✅ Incremental features match a full recompute (velocity_median within 2% past "
+          f"{EXACT_MEDIAN_STEPS} steps); eviction policy holds; lost states are reported and rebuilt")
+    print()
+
+    # Simulate the tracker: a 5s detection cadence adding ~40 new points per call
+    new_per_call = 40
+    print(f"{'session points':>14s} | {'full recompute (µs)':>20s} | {'incremental (µs)':>17s}")
+    print("-" * 58)
+    for history in [100, 1_000, 10_000, 50_000]:
+        trace = synthetic_trace(history + new_per_call)
+        state = SessionFeatureState()
+        state.update(trace[:history])
+        new_points = trace[history:]
+
+        repeat = 200
+        start = time.perf_counter()
+        for _ in range(repeat):
+            feature_engine.extract_features(trace, 2)
+        full_us = (time.perf_counter() - start) / repeat * 1e6
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            state.update(new_points)
+            state.features(2)
+        incremental_us = (time.perf_counter() - start) / repeat * 1e6
+
+        print(f"{history:14d} | {full_us:20.1f} | {incremental_us:17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+import io
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import train
+
+FOLDERS = ["humans_and_moderate_bots", "humans_and_advanced_bots"]
+
+
+def behaviour_string(rng, n_points):
+    """A total_behaviour capture in the dataset's [m(x,y)] / [c(l)] notation"""
+    x, y = rng.randint(0, 1200), rng.randint(0, 800)
+    parts = []
+    for _ in range(n_points):
+        x = max(0, x + rng.randint(-25, 25))
+        y = max(0, y + rng.randint(-25, 25))
+        parts.append(f"[m({x},{y})]")
+        if rng.random() < 0.02:
+            parts.append(f"[c({rng.choice('lr')})]")
+    return "".join(parts)
+
+
+def make_dataset(root, n_sessions, seed=11):
+    """Write a synthetic phase1 tree, including a few unreadable and too-short sessions"""
+    rng = random.Random(seed)
+    base = os.path.join(root, "phase1", "data", "mouse_movements")
+    annotated = list(train.KNOWN_ANNOTATIONS)
+    for i in range(n_sessions):
+        folder = FOLDERS[i % 2]
+        session_id = annotated[i] if i < len(annotated) else f"session{i:07d}"
+        session_dir = os.path.join(base, folder, session_id)
+        os.makedirs(session_dir)
+        path = os.path.join(session_dir, "mouse_movements.json")
+        if i % 97 == 5:
+            with open(path, "w") as f:
+                f.write("{not json")
+            continue
+        n_points = 3 if i % 89 == 7 else rng.randint(50, 1500)
+        with open(path, "w") as f:
+            json.dump({"total_behaviour": behaviour_string(rng, n_points)}, f)
+
+
+def timed_load(root, workers, cache_dir=None):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = train.load_all_touchguard_data(root, workers=workers, cache_dir=cache_dir)
+    return result, time.perf_counter() - start
+
+
+def assert_same(expected, actual, what):
+    assert np.array_equal(expected[0], actual[0]), f"{what} features differ from the serial load"
+    assert np.array_equal(expected[1], actual[1]), f"{what} labels differ from the serial load"
+    assert expected[2] == actual[2], f"{what} session order differs from the serial load"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial, process-pool and cached dataset ingestion")
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        make_dataset(root, args.sessions)
+        cache_dir = os.path.join(root, "feature_cache")
+        expected, serial = timed_load(root, workers=1)
+        parallel_result, parallel = timed_load(root, workers=args.workers)
+        assert_same(expected, parallel_result, "parallel")
+
+        cold_result, cold = timed_load(root, workers=1, cache_dir=cache_dir)
+        assert_same(expected, cold_result, "cold cache")
+        warm_result, warm = timed_load(root, workers=1, cache_dir=cache_dir)
+        assert_same(expected, warm_result, "warm cache")
+
+        # Touch one session: only that file is re-extracted, and the result follows the new content
+        session_dir = os.path.join(root, "phase1", "data", "mouse_movements", FOLDERS[1])
+        changed = os.path.join(session_dir, sorted(os.listdir(session_dir))[-1], "mouse_movements.json")
+        with open(changed, "w") as f:
+            json.dump({"total_behaviour": behaviour_string(random.Random(99), 400)}, f)
+        store = train.feature_store.FeatureStore(cache_dir, train.FEATURE_EXTRACTOR_VERSION)
+        stale = [p for p in store.paths if store.lookup(p) is None]
+        assert stale == [os.path.abspath(changed)], stale
+        assert_same(timed_load(root, workers=1)[0], timed_load(root, workers=1, cache_dir=cache_dir)[0],
+                    "updated cache")
+
+    print(f"{args.sessions} sessions ({len(expected[0])} usable), outputs identical")
+    print(f"  serial               : {args.sessions / serial:8.0f} sessions/s")
+    print(f"  {args.workers:2d} worker process(es): {args.sessions / parallel:8.0f} sessions/s "
+          f"({serial / parallel:.2f}x)")
+    print(f"  cold feature cache   : {args.sessions / cold:8.0f} sessions/s")
+    print(f"  warm feature cache   : {args.sessions / warm:8.0f} sessions/s ({serial / warm:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import argparse
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from benchmark_feature_extraction import synthetic_trace
+
+# (label, environment) pairs; each runs in its own interpreter because logging is configured at import
+CONFIGURATIONS = [
+    ("every line, synchronous (before)", {"TOUCHGUARD_LOG_PROFILE": "development", "TOUCHGUARD_LOG_QUEUE": "0"}),
+    ("every line, queue handler", {"TOUCHGUARD_LOG_PROFILE": "development", "TOUCHGUARD_LOG_QUEUE": "1"}),
+    ("production text, synchronous", {"TOUCHGUARD_LOG_PROFILE": "production", "TOUCHGUARD_LOG_QUEUE": "0"}),
+    ("production text, queue handler", {"TOUCHGUARD_LOG_PROFILE": "production", "TOUCHGUARD_LOG_QUEUE": "1"}),
+    ("production json, queue handler", {"TOUCHGUARD_LOG_PROFILE": "production", "TOUCHGUARD_LOG_QUEUE": "1",
+                                        "TOUCHGUARD_LOG_FORMAT": "json"}),
+]
+
+
+def make_request(app_module):
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/detect",
+        "query_string": b"",
+        "headers": [(b"user-agent", b"Mozilla/5.0 (X11; Linux x86_64) benchmark")],
+        "client": ("203.0.113.7", 50000),
+    }
+    return app_module.Request(scope)
+
+
+async def drive(n_requests, concurrency, n_points):
+    """Call detect_bot directly, skipping HTTP, so logging is a visible share of the work"""
+    import app as app_module
+
+    for handler in app_module.app.router.on_startup:
+        await handler()
+    request = make_request(app_module)
+    movements = [{"x": x, "y": y, "timestamp": i * 16} for i, (x, y) in enumerate(synthetic_trace(n_points, seed=3))]
+    payloads = [app_module.MouseData(session_id=f"bench_{i}", movements=movements, clicks=2, timestamp="0")
+                for i in range(concurrency)]
+
+    async def wave():
+        results = await asyncio.gather(*(app_module.detect_bot(p, request) for p in payloads))
+        assert all("classification" in r for r in results)
+
+    for _ in range(3):
+        await wave()
+    waves = max(1, n_requests // concurrency)
+    start = time.perf_counter()
+    for _ in range(waves):
+        await wave()
+    elapsed = time.perf_counter() - start
+
+    stats = app_module.events.stats()
+    for handler in app_module.app.router.on_shutdown:
+        await handler()
+    return {"requests_per_second": waves * concurrency / elapsed, "emitted": stats["emitted"],
+            "suppressed": stats["suppressed"]}
+
+
+def run_child(args):
+    result = asyncio.run(drive(args.requests, args.concurrency, args.points))
+    print(json.dumps(result))
+
+
+def run_config(label, env_overrides, args, tmp):
+    env = dict(os.environ, TOUCHGUARD_DB_FILE=os.path.join(tmp, "bench.db"), PYTHONWARNINGS="ignore",
+               **env_overrides)
+    log_path = os.path.join(tmp, "bench.log")
+    with open(log_path, "w") as log_file:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", "--requests", str(args.requests),
+             "--concurrency", str(args.concurrency), "--points", str(args.points)],
+            cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=log_file, text=True, check=True
+        )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["log_bytes"] = os.path.getsize(log_path)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="detect_bot throughput under each logging configuration")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--points", type=int, default=60)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    print(f"detect_bot, {args.requests} requests x {args.points} points, {args.concurrency} concurrent")
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = None
+        for label, env_overrides in CONFIGURATIONS:
+            result = run_config(label, env_overrides, args, tmp)
+            baseline = baseline or result["requests_per_second"]
+            print(f"  {label:34s} {result['requests_per_second']:8.0f} req/s "
+                  f"({result['requests_per_second'] / baseline:4.2f}x)  "
+                  f"{result['emitted']:6d} events logged, {result['suppressed']:6d} sampled out, "
+                  f"{result['log_bytes'] / 1024:8.1f} KiB written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import hashlib
+import pickle
+import argparse
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import train
+import execution
+import model_variants
+from compiled_forest import CompiledForest
+from benchmark_ingestion import make_dataset
+
+
+def threshold_probes(forest):
+    """Rows sitting exactly on, and one float32 step either side of, split thresholds"""
+    rng = np.random.default_rng(3)
+    thresholds = np.asarray(forest.threshold, dtype=np.float64)
+    features = np.asarray(forest.feature)
+    internal = forest.left != np.arange(len(forest.left))
+    values = thresholds[internal].astype(np.float32)
+    steps = [values, np.nextafter(values, np.float32(np.inf)), np.nextafter(values, np.float32(-np.inf))]
+    rows = np.zeros((3 * len(values), forest.n_features_in_), dtype=np.float32)
+    for i, probe in enumerate(np.concatenate(steps)):
+        # Other features at random on-threshold values, so deep splits get reached too
+        rows[i] = rng.choice(values, forest.n_features_in_)
+        rows[i, features[internal][i % len(values)]] = probe
+    return rows
+
+
+def check_float32(candidates, X_test):
+    """float32 thresholds must send every row to the same leaves as float64"""
+    for candidate in candidates:
+        wide = CompiledForest.from_sklearn(candidate.forest)
+        narrow = CompiledForest.from_sklearn(candidate.forest, precision="float32")
+        for X in (X_test, threshold_probes(wide)):
+            assert np.array_equal(wide.apply(X), narrow.apply(X)), candidate.name
+            assert np.allclose(wide.predict_proba(X), narrow.predict_proba(X), atol=1e-6), candidate.name
+        assert narrow.nbytes < wide.nbytes
+
+
+def check_export(candidate, directory):
+    """float32 exports map back as float32, and a precision mismatch rebuilds instead"""
+    forest = CompiledForest.from_sklearn(candidate.forest, precision="float32")
+    forest.save(directory, source_digest="d")
+    loaded = CompiledForest.load(directory, source_digest="d", precision="float32")
+    assert loaded is not None and loaded.threshold.dtype == np.float32 and loaded.precision == "float32"
+    assert CompiledForest.load(directory, source_digest="d", precision="float64") is None
+
+
+def check_worker_init(candidate, directory):
+    """Process-pool workers serve the parent's digest and precision, from the export or the pickle"""
+    os.makedirs(directory, exist_ok=True)
+    model_path = os.path.join(directory, "model.pkl")
+    with open(model_path, 'wb') as f:
+        pickle.dump(candidate.forest, f)
+    with open(model_path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    forest_path = os.path.join(directory, "forest")
+    CompiledForest.from_sklearn(candidate.forest, precision="float32").save(forest_path, source_digest=digest)
+    for precision in ("float32", "float64"):
+        # float64 does not match the float32 export, so the worker compiles the pickle itself
+        execution._init_inference_worker(model_path, True, forest_path, digest, precision)
+        assert execution._worker_model.precision == precision
+    try:
+        execution._init_inference_worker(model_path, True, forest_path, "stale", "float64")
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("a worker loaded a pickle whose digest differs from the parent's")
+
+
+def check_selection(profiles, budget_ms, selected):
+    fitting = [p for p in profiles if p["single_row_p95_ms"] <= budget_ms]
+    if not fitting:
+        assert selected is None
+        return
+    assert selected["single_row_p95_ms"] <= budget_ms
+    assert selected["accuracy"] == max(p["accuracy"] for p in fitting)
+    assert any(p["pareto"] for p in profiles if p["name"] == selected["name"])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Model variants: float32 parity, budget selection and the Pareto report")
+    parser.add_argument("--sessions", type=int, default=800)
+    parser.add_argument("--budget-ms", type=float, help="latency budget (default: half the baseline's p95)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        make_dataset(tmp, args.sessions)
+        X, y, _ = train.load_all_touchguard_data(tmp, workers=1, cache_dir=None)
+        X_train, X_test, y_train, y_test = train.train_test_split(X, y, test_size=0.25, random_state=42, stratify=y)
+
+        candidates = model_variants.build_candidates(X_train, y_train, train.RF_PARAMS)
+        check_float32(candidates, X_test)
+        check_export(candidates[0], os.path.join(tmp, "forest"))
+        check_worker_init(candidates[0], os.path.join(tmp, "worker"))
+        print("✅ float32 forests reach the same leaves as float64, including at split thresholds")
+
+        baseline = next(c for c in candidates if c.kind == "baseline")
+        budget_ms = args.budget_ms or model_variants.profile_candidate(
+            baseline, "float64", X_test, y_test)["single_row_p95_ms"] / 2
+
+        # End to end through the training CLI entry point, writing into the scratch directory
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            forest, profiles = train.train_model_variants(tmp, workers=1, cache_dir=None,
+                                                          latency_budget_ms=budget_ms)
+            with open(train.VARIANTS_REPORT_PATH, encoding='utf-8') as f:
+                report = json.load(f)
+            if forest is not None:
+                with open(train.MODEL_OUTPUT_PATH, 'rb') as f:
+                    saved = f.read()
+                assert len(pickle.loads(saved).estimators_) == len(forest.estimators_)
+                # What the app reads to serve the saved model at its profiled precision
+                selected = next(p for p in profiles if p["name"] == report["selected"])
+                assert report["model_digest"] == hashlib.sha256(saved).hexdigest()
+                assert report["selected_precision"] == selected["precision"]
+        finally:
+            os.chdir(cwd)
+        assert report["latency_budget_ms"] == budget_ms and len(report["variants"]) == 2 * len(candidates)
+
+    baseline = next(p for p in profiles if p["kind"] == "baseline" and p["precision"] == "float64")
+    for budget in (budget_ms, baseline["single_row_p95_ms"], 1e-6):
+        check_selection(profiles, budget, model_variants.select_for_budget(profiles, budget))
+    print("\n✅ Budget selection picks the most accurate variant that fits, and nothing when none does")
+
+    print(f"\nbaseline {baseline['name']}: p95 {baseline['single_row_p95_ms']:.3f} ms, "
+          f"{baseline['forest_bytes'] / 1024:.0f} kB, accuracy {baseline['accuracy']:.2%}")
+    for budget in sorted({p["single_row_p95_ms"] for p in profiles if p["pareto"]}):
+        choice = model_variants.select_for_budget(profiles, budget)
+        print(f"budget {budget:6.3f} ms -> {choice['name']:26s} accuracy {choice['accuracy']:.2%}, "
+              f"{choice['forest_bytes'] / 1024:.0f} kB")
+
+
+if __name__ == "__main__":
+    main()
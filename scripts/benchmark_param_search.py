@@ -0,0 +1,68 @@
+import os
+import sys
+import argparse
+import tempfile
+import contextlib
+import io
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import train
+import param_search
+from benchmark_ingestion import make_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm-started, early-stopped parallel search vs GridSearchCV")
+    parser.add_argument("--sessions", type=int, default=800)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--skip-grid", action="store_true", help="skip the exhaustive GridSearchCV baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        make_dataset(tmp, args.sessions)
+        with contextlib.redirect_stdout(io.StringIO()):
+            X, y, _ = train.load_all_touchguard_data(tmp, workers=1, cache_dir=None)
+    X_train, _, y_train, _ = train.train_test_split(X, y, test_size=0.25, random_state=42, stratify=y)
+    print(f"{len(X_train)} training rows, {np.prod([len(v) for v in param_search.SEARCH_SPACE.values()])} "
+          f"candidates, {param_search.CV_FOLDS} folds\n")
+
+    serial = param_search.search(X_train, y_train, train.RF_PARAMS, workers=1)
+    runs = [("search, 1 worker", serial)]
+    if args.workers > 1:
+        parallel = param_search.search(X_train, y_train, train.RF_PARAMS, workers=args.workers)
+        assert parallel["candidates"] == serial["candidates"], "results must not depend on the worker count"
+        runs.append((f"search, {args.workers} workers", parallel))
+
+    rows = [(label, result["wall_seconds"], result["trees_grown"], result["best_params"], result["best_accuracy"])
+            for label, result in runs]
+    grid_seconds = None
+    if not args.skip_grid:
+        grid, grid_seconds = param_search.grid_search(X_train, y_train, train.RF_PARAMS, workers=args.workers)
+        # Warm-started forests match cold ones of the same size, so fully scored candidates agree exactly
+        grid_scores = {tuple(sorted(p.items(), key=str)): s
+                       for p, s in zip(grid.cv_results_["params"], grid.cv_results_["mean_test_score"])}
+        for candidate in serial["candidates"]:
+            if candidate["folds"] == param_search.CV_FOLDS:
+                expected = grid_scores[tuple(sorted(candidate["params"].items(), key=str))]
+                assert abs(candidate["mean_accuracy"] - expected) < 1e-4, (candidate, expected)
+        assert serial["best_accuracy"] >= round(grid.best_score_, 4) - 1e-4, "early stopping dropped the winner"
+        print("\n✅ Fully scored candidates match GridSearchCV, and the search kept the best configuration")
+        rows.insert(0, (f"GridSearchCV, {args.workers} job(s)", grid_seconds,
+                        param_search.CV_FOLDS * int(np.prod([len(v) for k, v in param_search.SEARCH_SPACE.items()
+                                                             if k != "n_estimators"]))
+                        * sum(param_search.SEARCH_SPACE["n_estimators"]),
+                        grid.best_params_, round(grid.best_score_, 4)))
+
+    print("\n" + "\n".join(param_search.format_report(runs[-1][1], baseline_seconds=grid_seconds)))
+
+    print(f"\n{'':26s} {'wall s':>7s} {'trees':>7s} {'speedup':>8s}  best")
+    for label, seconds, trees, best, accuracy in rows:
+        print(f"{label:26s} {seconds:7.2f} {trees:7d} {rows[0][1] / seconds:7.2f}x  {best} {accuracy:.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import os
+import sys
+import json
+import base64
+import random
+import asyncio
+import argparse
+import tempfile
+import timeit
+
+import numpy as np
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import movement_codec
+from benchmark_suite import load_app
+from movement_patterns import generate_bezier_curve, add_human_like_pauses
+
+POINT_COUNTS = [10, 100, 1000, 10000]
+
+
+def recorded_points(n_points, seed):
+    """Browser-like points: Bézier strokes with pauses, epoch-millisecond timestamps and a few clicks"""
+    rng = random.Random(seed)
+    points = []
+    x, y, t = 400, 300, 1_760_000_000_000
+    while len(points) < n_points:
+        stroke = add_human_like_pauses(generate_bezier_curve(x, y, rng.randint(0, 1920), rng.randint(0, 1080),
+                                                             start_time=t, rng=rng), rng=rng)
+        if rng.random() < 0.3:
+            stroke[-1] = {**stroke[-1], "type": "click"}
+        points += stroke
+        x, y, t = stroke[-1]["x"], stroke[-1]["y"], stroke[-1]["timestamp"] + rng.randint(50, 2000)
+    return points[:n_points]
+
+
+def json_body(session_id, points, clicks):
+    return json.dumps({"session_id": session_id, "movements": points, "clicks": clicks,
+                       "timestamp": "2026-01-01T00:00:00", "incremental": False}).encode("utf-8")
+
+
+def packed_body(session_id, points, clicks):
+    return movement_codec.encode(session_id, [(p["x"], p["y"]) for p in points], clicks,
+                                 timestamps=[p["timestamp"] for p in points],
+                                 click_mask=[p.get("type") == "click" for p in points])
+
+
+def decode_json(app, body):
+    """What /api/detect does before feature extraction: JSON decode, MouseData validation, coordinate walk"""
+    data = app.MouseData(**json.loads(body))
+    return app.feature_engine.to_coordinate_array(app.detector.parse_mouse_behavior(data.movements))
+
+
+def decode_packed(app, body):
+    return app.feature_engine.to_coordinate_array(
+        app.detector.parse_mouse_behavior(movement_codec.decode(body).coords))
+
+
+def per_call_us(fn, min_time=0.2):
+    number = 1
+    while True:
+        elapsed = timeit.timeit(fn, number=number)
+        if elapsed >= min_time:
+            break
+        number *= 2
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+async def end_to_end(app, points, clicks):
+    """Both endpoints return the same verdict for the same integer-coordinate trace"""
+    for handler in app.app.router.on_startup:
+        await handler()
+    transport = httpx.ASGITransport(app=app.app, client=("203.0.113.7", 50000))
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://touchguard.local") as client:
+            via_json = (await client.post("/api/detect", content=json_body("bench_json", points, clicks),
+                                          headers={"content-type": "application/json"})).json()
+            via_packed = (await client.post("/api/detect/packed", content=packed_body("bench_packed", points, clicks),
+                                            headers={"content-type": "application/octet-stream"})).json()
+            rejected = await client.post("/api/detect/packed", content=b"TGMV\x01\x00",
+                                         headers={"content-type": "application/octet-stream"})
+    finally:
+        for handler in app.app.router.on_shutdown:
+            await handler()
+    for key in ("classification", "confidence", "movement_count", "features"):
+        assert via_json[key] == via_packed[key], f"{key}: {via_json[key]} != {via_packed[key]}"
+    assert rejected.status_code == 422, rejected.status_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes on the wire and server decode time: JSON vs packed movements")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing loop")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = load_app(os.path.join(tmp, "bench.db"))
+
+        # Decoded payloads match the JSON path exactly, including every header field
+        for n in POINT_COUNTS:
+            points = recorded_points(n, seed=n)
+            packed = movement_codec.decode(packed_body("session_é", points, 7))
+            assert (packed.session_id, packed.clicks, packed.incremental) == ("session_é", 7, False)
+            assert np.array_equal(decode_packed(app, packed_body("s", points, 7)),
+                                  decode_json(app, json_body("s", points, 7)))
+            assert np.array_equal(packed.timestamps, [p["timestamp"] for p in points])
+            assert np.array_equal(packed.click_mask, [p.get("type") == "click" for p in points])
+        for bad in [b"", b"XXXX" + bytes(12), packed_body("s", points, 7)[:-1]]:
+            try:
+                movement_codec.decode(bad)
+                raise AssertionError("malformed payload accepted")
+            except ValueError:
+                pass
+        asyncio.run(end_to_end(app, recorded_points(300, seed=1), 3))
+        print("✅ Packed payloads decode to the same coordinates and verdicts as JSON")
+
+        print(f"\n{'points':>7s} {'JSON B':>9s} {'packed B':>9s} {'base64 B':>9s} {'ratio':>6s} "
+              f"{'JSON µs':>9s} {'packed µs':>10s} {'speedup':>8s}")
+        for n in POINT_COUNTS:
+            points = recorded_points(n, seed=n)
+            as_json = json_body("session_1760000000000_k3j5h2l9q", points, 7)
+            as_packed = packed_body("session_1760000000000_k3j5h2l9q", points, 7)
+            json_us = per_call_us(lambda: decode_json(app, as_json), args.min_time)
+            packed_us = per_call_us(lambda: decode_packed(app, as_packed), args.min_time)
+            print(f"{n:7d} {len(as_json):9d} {len(as_packed):9d} {len(base64.b64encode(as_packed)):9d} "
+                  f"{len(as_json) / len(as_packed):5.1f}x {json_us:9.1f} {packed_us:10.1f} "
+                  f"{json_us / packed_us:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from prefilter import PrefilterCascade
+from benchmark_suite import load_app
+from movement_patterns import generate_linear_movements, generate_bezier_curve, add_human_like_pauses
+
+
+def linear_bot(rng):
+    """BasicBotSimulator: straight segments at a fixed 50 ms step"""
+    points = [(rng.randint(0, 1900), rng.randint(0, 1000)) for _ in range(3)]
+    start = 1_760_000_000_000
+    first = generate_linear_movements(*points[0], *points[1], steps=rng.randint(20, 40), start_time=start)
+    second = generate_linear_movements(*points[1], *points[2], steps=rng.randint(20, 40),
+                                       start_time=first[-1]["timestamp"] + rng.randint(100, 1000))
+    return first + second
+
+
+def jittered_linear_bot(rng):
+    """Straight segments with randomised sleeps between steps, so only the path gives it away"""
+    t = 1_760_000_000_000
+    points = []
+    for p in linear_bot(rng):
+        t += rng.randint(10, 40)
+        points.append({**p, "timestamp": t})
+    return points
+
+
+def burst_bot(rng):
+    """Synthetic events dispatched in a tight loop: curved path, a handful of distinct timestamps"""
+    path = generate_bezier_curve(rng.randint(0, 1900), rng.randint(0, 1000), rng.randint(0, 1900),
+                                 rng.randint(0, 1000), steps=60, start_time=0, rng=rng)
+    return [{**p, "timestamp": 1_760_000_000_000 + (i // 10)} for i, p in enumerate(path)]
+
+
+def human(rng):
+    path = []
+    x, y, t = rng.randint(0, 1900), rng.randint(0, 1000), 1_760_000_000_000
+    for _ in range(rng.randint(1, 3)):
+        stroke = add_human_like_pauses(generate_bezier_curve(x, y, rng.randint(0, 1900), rng.randint(0, 1000),
+                                                             start_time=t, rng=rng), rng=rng)
+        path += stroke
+        x, y, t = stroke[-1]["x"], stroke[-1]["y"], stroke[-1]["timestamp"] + rng.randint(50, 1500)
+    return path
+
+
+def coarse_clock_human(rng):
+    """Human input at 60-125 Hz under Tor/Firefox resistFingerprinting: timestamps rounded to 100 ms"""
+    path, t = human(rng), 1_760_000_000_000
+    points = []
+    for p in path:
+        t += rng.randint(8, 16) if rng.random() > 0.05 else rng.randint(200, 800)
+        points.append({**p, "timestamp": t // 100 * 100})
+    return points
+
+
+def steady_clock_human(rng):
+    """Human input from a browser delivering pointer events at a steady 50 Hz"""
+    path = human(rng)
+    return [{**p, "timestamp": 1_760_000_000_000 + 20 * i} for i, p in enumerate(path)]
+
+
+# name -> (generator, share of traffic, share the cascade must short-circuit). Bots whose segments
+# are too short for min_step_px are rightly left to the model. Burst bots are only
+# flagged by the timing checks, which also fire on the coarse and steady clock humans
+TRAFFIC = {
+    "linear_bot": (linear_bot, 0.30, 0.98),
+    "jittered_bot": (jittered_linear_bot, 0.10, 0.95),
+    "burst_bot": (burst_bot, 0.10, 0.0),
+    "human": (human, 0.35, 0.0),
+    "coarse_human": (coarse_clock_human, 0.10, 0.0),
+    "steady_human": (steady_clock_human, 0.05, 0.0),
+}
+HUMAN_TRAFFIC = ("human", "coarse_human", "steady_human")
+
+
+async def score(app, traces, prefilter_on):
+    detector = app.detector
+    cascade = detector.prefilter
+    if not prefilter_on:
+        detector.prefilter = None
+    results, latencies = [], []
+    try:
+        for i, (kind, movements) in enumerate(traces):
+            start = time.perf_counter()
+            result = await detector.predict_async(f"{kind}_{i}", movements, 2, "203.0.113.7", "bench")
+            latencies.append((time.perf_counter() - start) * 1000)
+            results.append(result)
+    finally:
+        detector.prefilter = cascade
+    return results, latencies
+
+
+async def check_incremental(app, rng, chunk=6):
+    """Incremental calls are judged on the session's timestamp window, not on each call's few points"""
+    detector = app.detector
+    movements = burst_bot(rng)
+    flags = []
+    for start in range(0, len(movements), chunk):
+        result = await detector.predict_async("incremental_burst", movements[start:start + chunk], 2,
+                                              "203.0.113.7", "bench", incremental=True)
+        assert "prefilter" not in result, result
+        flags.append("duplicate_timestamps" in result.get("prefilter_flags", ()))
+    # Every call holds fewer than min_points points; the window passes it by the third
+    assert not any(flags[:1]) and all(flags[2:]), flags
+
+
+async def run(app, traces, rng):
+    for handler in app.app.router.on_startup:
+        await handler()
+    try:
+        await check_incremental(app, rng)
+        await score(app, traces[:50], True)  # warm caches before either timed pass
+        app.detector.prefilter = PrefilterCascade(stages=app.detector.prefilter.stages)  # fresh counters
+        with_cascade = await score(app, traces, True)
+        without = await score(app, traces, False)
+        return with_cascade, without
+    finally:
+        for handler in app.app.router.on_shutdown:
+            await handler()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Traffic short-circuited by the prefilter cascade and time saved")
+    parser.add_argument("--traces", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    kinds = list(TRAFFIC)
+    weights = [TRAFFIC[k][1] for k in kinds]
+    traces = [(kind, TRAFFIC[kind][0](rng)) for kind in rng.choices(kinds, weights, k=args.traces)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = load_app(os.path.join(tmp, "bench.db"))
+        (results, latencies), (model_results, model_latencies) = asyncio.run(run(app, traces, rng))
+        stats = app.detector.prefilter.stats()
+
+    print(f"\n{'traffic':12s} {'traces':>7s} {'caught':>7s} {'model agrees':>13s} {'flagged':>8s} "
+          f"{'flag→bot':>9s} {'ms on':>7s} {'ms off':>7s}")
+    for kind in kinds:
+        rows = [i for i, (k, _) in enumerate(traces) if k == kind]
+        caught = [i for i in rows if "prefilter" in results[i]]
+        agrees = sum(model_results[i]["is_bot"] for i in caught)
+        # Flagged by a timing check and decided by the model
+        flagged = [i for i in rows if "prefilter_flags" in results[i] and "prefilter" not in results[i]]
+        flagged_bots = sum(results[i]["is_bot"] for i in flagged)
+        assert len(caught) >= TRAFFIC[kind][2] * len(rows), (kind, len(caught), len(rows))
+        # Human input is never short-circuited, whatever its clock looks like
+        assert kind not in HUMAN_TRAFFIC or not caught, (kind, len(caught))
+        if kind == "burst_bot":
+            assert len(flagged) == len(rows), (kind, len(flagged), len(rows))
+        print(f"{kind:12s} {len(rows):7d} {len(caught):7d} "
+              f"{(f'{agrees / len(caught):.0%}' if caught else '-'):>13s} {len(flagged):8d} "
+              f"{(f'{flagged_bots / len(flagged):.0%}' if flagged else '-'):>9s} "
+              f"{statistics.mean(latencies[i] for i in rows):7.3f} "
+              f"{statistics.mean(model_latencies[i] for i in rows):7.3f}")
+
+    print(f"\nshort-circuited {stats['short_circuit_ratio']:.1%} of traffic: " +
+          ", ".join(f"{name} {stage['ratio']:.1%}" for name, stage in stats["stages"].items()))
+    print("model agreement with timing flags: " +
+          ", ".join(f"{name} {stage['model_agreement']:.0%} of {stage['flagged_to_model']}"
+                    for name, stage in stats["stages"].items() if stage["model_agreement"] is not None))
+    print(f"cascade {stats['mean_prefilter_ms'] * 1000:.0f} µs per trace; model path "
+          f"{stats['mean_model_path_ms']:.2f} ms; estimated saved {stats['estimated_saved_ms']:.0f} ms in total")
+    print(f"mean per detection: {statistics.mean(latencies):.3f} ms with the cascade, "
+          f"{statistics.mean(model_latencies):.3f} ms without")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from result_cache import ResultCache, window_key
+from benchmark_suite import load_app
+from benchmark_feature_extraction import synthetic_trace
+
+
+class InvertedModel:
+    """Stand-in for a retrained model: the loaded one with its class probabilities swapped"""
+
+    def __init__(self, model):
+        self.model = model
+        self.classes_ = model.classes_
+
+    def predict_proba(self, batch):
+        return np.asarray(self.model.predict_proba(batch))[:, ::-1]
+
+
+def window(seed, n=50):
+    return [{"x": x, "y": y, "timestamp": i * 16} for i, (x, y) in enumerate(synthetic_trace(n, seed=seed))]
+
+
+def check_cache_unit():
+    """TTL, LRU bound and the generation guard, without the app"""
+    cache = ResultCache(max_entries=2, ttl=0.05)
+    coords = np.array([[1.0, 2.0], [3.0, 4.0]])
+    key = window_key("s", coords, 1)
+    assert key == window_key("s", coords + 0.2, 1), "sub-pixel jitter quantizes to the same window"
+    assert key != window_key("s", coords, 2) and key != window_key("t", coords, 1)
+    assert key != window_key("s", coords[::-1], 1)
+
+    cache.put(key, {"v": 1}, cache.generation)
+    assert cache.get(key) == {"v": 1}
+    time.sleep(0.06)
+    assert cache.get(key) is None and cache.expired == 1
+
+    stale_generation = cache.generation
+    cache.invalidate()
+    cache.put(key, {"v": 1}, stale_generation)
+    assert cache.get(key) is None, "a result computed before invalidate() must not be stored"
+
+    for i in range(3):
+        cache.put(window_key("s", coords, i), {"v": i}, cache.generation)
+    assert len(cache) == 2 and cache.evictions == 1
+
+
+async def check_app(app):
+    detector = app.detector
+    movements = window(seed=1)
+    first = await detector.predict_async("cache_session", movements, 2, "203.0.113.7", "bench")
+    second = await detector.predict_async("cache_session", movements, 2, "203.0.113.7", "bench")
+    assert "cached" not in first and second["cached"]
+    for key in ("is_bot", "confidence", "classification", "movement_count", "features"):
+        assert first[key] == second[key], key
+    other_clicks = await detector.predict_async("cache_session", movements, 3, "203.0.113.7", "bench")
+    assert "cached" not in other_clicks
+    incremental = await detector.predict_async("cache_incremental", movements, 2, "203.0.113.7", "bench",
+                                               incremental=True)
+    again = await detector.predict_async("cache_incremental", movements, 2, "203.0.113.7", "bench",
+                                         incremental=True)
+    assert "cached" not in incremental and "cached" not in again
+
+    # After a model swap the same window is scored again, by the new model
+    original = detector.model
+    detector.set_model(InvertedModel(original))
+    try:
+        swapped = await detector.predict_async("cache_session", movements, 2, "203.0.113.7", "bench")
+    finally:
+        detector.set_model(original)
+    assert "cached" not in swapped and swapped["is_bot"] != first["is_bot"], (first, swapped)
+    restored = await detector.predict_async("cache_session", movements, 2, "203.0.113.7", "bench")
+    assert "cached" not in restored and restored["is_bot"] == first["is_bot"]
+
+
+async def latencies(app, sessions, repeats):
+    """Per-call ms for the first (miss) and following (hit) sends of each idle window"""
+    misses, hits = [], []
+    for s in range(sessions):
+        movements = window(seed=100 + s)
+        for r in range(repeats):
+            start = time.perf_counter()
+            await app.detector.predict_async(f"idle_{s}", movements, 1, "203.0.113.7", "bench")
+            (hits if r else misses).append((time.perf_counter() - start) * 1000)
+    return misses, hits
+
+
+async def run(app, sessions, repeats):
+    for handler in app.app.router.on_startup:
+        await handler()
+    try:
+        await check_app(app)
+        print("✅ Hits match fresh verdicts; clicks, incremental calls and model swaps bypass the cache")
+        return await latencies(app, sessions, repeats)
+    finally:
+        for handler in app.app.router.on_shutdown:
+            await handler()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Result cache hit latency and correctness")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=12, help="sends of the same window, as an idle cursor makes")
+    args = parser.parse_args()
+
+    check_cache_unit()
+    print("✅ TTL expiry, LRU bound and stale-generation puts behave")
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["TOUCHGUARD_RESULT_CACHE"] = "1"
+        app = load_app(os.path.join(tmp, "bench.db"))
+        misses, hits = asyncio.run(run(app, args.sessions, args.repeats))
+        stats = app.detector.results.stats()
+
+    print(f"\n{'':6s} {'calls':>6s} {'median ms':>10s} {'p95 ms':>8s}")
+    for label, values in (("miss", misses), ("hit", hits)):
+        print(f"{label:6s} {len(values):6d} {statistics.median(values):10.3f} {np.percentile(values, 95):8.3f}")
+    print(f"\nhit ratio {stats['hit_ratio']:.1%}, miss ratio {stats['miss_ratio']:.1%}, "
+          f"{stats['entries']} entries, generation {stats['generation']}")
+
+
+if __name__ == "__main__":
+    main()
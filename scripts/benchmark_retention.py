@@ -0,0 +1,146 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import retention
+import dashboard_stats
+from storage import SessionStore
+from benchmark_suite import load_app
+
+DAY = timedelta(days=1)
+START = datetime(2024, 1, 1)
+
+
+def insert_day(storage, day, sessions, rng):
+    """A day of steady traffic: sessions whose last prediction falls on that day"""
+    for i in range(sessions):
+        seen = START + day * DAY + timedelta(seconds=rng.randint(0, 86399), microseconds=rng.randint(1, 999999))
+        storage.enqueue_upsert((f"d{day}_s{i}", seen, rng.choice(["Human", "Bot"]), 90.0, 120, seen,
+                                "203.0.113.7", "bench", "active"))
+    storage.flush()
+
+
+def admin_query_ms(storage, repeats=20):
+    """Median time of the dashboard's recent-sessions query plus a per-class scan"""
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        with storage.connection() as conn:
+            conn.execute('SELECT * FROM sessions ORDER BY last_prediction DESC LIMIT 50').fetchall()
+            conn.execute("SELECT COUNT(*), AVG(confidence) FROM sessions WHERE user_type = 'Bot'").fetchone()
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+def table_state(storage, sweeper):
+    with storage.connection() as conn:
+        rows = conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+    return rows, sweeper.stats()["database_bytes"]
+
+
+def check_guards(storage, sweeper):
+    """Blocked sessions survive, and a session seen again after being read is neither deleted nor archived"""
+    old = START - 10 * DAY
+    storage.enqueue_upsert(("blocked_old", old, "Bot", 99.0, 50, old, "203.0.113.7", "bench", "active"))
+    for session_id in ("returning", "idle", "idle_2"):
+        storage.enqueue_upsert((session_id, old, "Human", 80.0, 50, old, "203.0.113.7", "bench", "active"))
+    storage.flush()
+    storage.execute_write('UPDATE sessions SET status = "blocked" WHERE session_id = ?', ("blocked_old",))
+
+    # A one-row batch, so the first batch is made up only of the session that comes back
+    guard_archive = sweeper.archive_dir + "_guards"
+    one_at_a_time = retention.SessionRetention(storage, guard_archive, sweeper.ttl.total_seconds(), batch_size=1)
+    read = one_at_a_time.expired_rows
+
+    def comes_back_after_read(now=None):
+        rows = read(now)
+        if rows and rows[0]["session_id"] == "returning":
+            storage.enqueue_upsert(("returning", old, "Human", 80.0, 60, START, "203.0.113.7", "bench", "active"))
+        return rows
+
+    one_at_a_time.expired_rows = comes_back_after_read
+    assert [row["session_id"] for row in read(now=START)] == ["returning"]
+    # The empty first batch does not end the pass before the idle sessions behind it
+    result = one_at_a_time.run_pass(now=START)
+    assert result["evicted"] == 2 and result["batches"] == 3, result
+    archived = sorted(row["session_id"] for row in retention.iter_archive(guard_archive))
+    assert archived == ["idle", "idle_2"], archived
+    assert sweeper.run_pass(now=START)["evicted"] == 0
+    storage.execute_write('DELETE FROM sessions WHERE session_id IN ("blocked_old", "returning")')
+
+
+def simulate(app, db_file, archive_dir, days, per_day, ttl_days, enabled, seed=3):
+    """Per-day (day, rows, database bytes, rows evicted, admin query ms) on a fresh database"""
+    app.DB_FILE = db_file
+    app.create_schema(reset=False)
+    storage = SessionStore(db_file)
+    storage.start()
+    sweeper = retention.SessionRetention(storage, archive_dir, ttl_days * 86400)
+    try:
+        rng = random.Random(seed)
+        if enabled:
+            check_guards(storage, sweeper)
+        history = []
+        for day in range(days):
+            insert_day(storage, day, per_day, rng)
+            evicted = sweeper.run_pass(now=START + (day + 1) * DAY)["evicted"] if enabled else 0
+            rows, size = table_state(storage, sweeper)
+            history.append((day, rows, size, evicted, admin_query_ms(storage)))
+
+        with storage.connection() as conn:
+            counts = dashboard_stats.read_counts(conn)
+        recounted = storage.run_write(dashboard_stats.reconcile)
+        assert counts == recounted, (counts, recounted)
+        return history
+    finally:
+        storage.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Table size and admin query latency under steady traffic")
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--per-day", type=int, default=20000)
+    parser.add_argument("--ttl-days", type=float, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        archive_dir = os.path.join(tmp, "archive")
+        app = load_app(os.path.join(tmp, "unused.db"))  # for its schema
+        for enabled in (False, True):
+            results[enabled] = simulate(app, os.path.join(tmp, f"retention_{enabled}.db"), archive_dir, args.days,
+                                        args.per_day, args.ttl_days, enabled)
+
+        history = results[True]
+        evicted = sum(row[3] for row in history)
+        archived = list(retention.iter_archive(archive_dir))
+        assert len(archived) == evicted and len({row["session_id"] for row in archived}) == evicted
+        # Rows land in the partition of the day they were last seen
+        assert all(int(row["session_id"][1:].split("_")[0]) == (datetime.fromisoformat(row["last_prediction"])
+                                                                 - START).days for row in archived)
+        first_day = list(retention.iter_archive(archive_dir, since="2024-01-01", until="2024-01-01"))
+        assert len(first_day) == args.per_day
+        archive_bytes = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(archive_dir) for f in files)
+    print("✅ Counters stay exact, blocked and returning sessions are kept, every evicted row is archived")
+
+    print(f"\n{args.per_day} sessions/day, TTL {args.ttl_days:g} days\n")
+    print(f"{'day':>4s} | {'rows':>8s} {'db MB':>7s} {'query ms':>9s} | {'rows':>8s} {'db MB':>7s} {'query ms':>9s} "
+          f"{'evicted':>8s}")
+    print(f"{'':4s} | {'without retention':^26s} | {'with retention':^35s}")
+    for (day, rows, size, _, query), (_, kept, kept_size, evicted_today, kept_query) in zip(results[False],
+                                                                                         results[True]):
+        print(f"{day:4d} | {rows:8d} {size / 1e6:7.2f} {query:9.3f} | {kept:8d} {kept_size / 1e6:7.2f} "
+              f"{kept_query:9.3f} {evicted_today:8d}")
+    print(f"\narchive: {evicted} sessions in {archive_bytes / 1e6:.2f} MB of gzipped JSONL")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import os
+import sys
+import time
+import pickle
+import hashlib
+import socket
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+import numpy as np
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from compiled_forest import CompiledForest
+from benchmark_feature_extraction import synthetic_trace
+
+MODEL_PATH = os.path.join(ROOT, 'models', 'touchguard_improved_bot_detector.pkl')
+FOREST_PATH = os.path.join(ROOT, 'models', 'touchguard_forest')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def model_load_times(repetitions):
+    """Best-of seconds for unpickle + compile vs mapping the exported forest"""
+    def from_pickle():
+        with open(MODEL_PATH, 'rb') as f:
+            return CompiledForest.from_sklearn(pickle.load(f))
+
+    with open(MODEL_PATH, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+
+    def mapped():
+        return CompiledForest.load(FOREST_PATH, source_digest=digest)
+
+    # Same export the server writes, so it is reused rather than rebuilt on the next start
+    compiled = from_pickle()
+    compiled.save(FOREST_PATH, source_digest=digest)
+    X = np.random.default_rng(0).normal(size=(256, compiled.n_features_in_))
+    assert np.array_equal(compiled.predict_proba(X), mapped().predict_proba(X))
+
+    times = {}
+    for label, fn in (("pickle + compile", from_pickle), ("mmap export", mapped)):
+        samples = []
+        for _ in range(repetitions):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        times[label] = min(samples)
+    return times
+
+
+def start_server(port, db_file, env_overrides, workers=1):
+    """Spawn uvicorn and poll /readyz; returns (process, wall seconds until ready, /readyz body)"""
+    env = dict(os.environ, TOUCHGUARD_DB_FILE=db_file, TOUCHGUARD_LOG_PROFILE="production",
+               TOUCHGUARD_CADENCE="0", **env_overrides)
+    command = [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"]
+    if workers > 1:
+        command += ["--workers", str(workers)]
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            response = httpx.get(f"http://127.0.0.1:{port}/readyz", timeout=1)
+            if response.status_code == 200:
+                return proc, time.perf_counter() - start, response.json()
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.02)
+    proc.kill()
+    raise RuntimeError("server did not become ready")
+
+
+def stop_server(proc):
+    proc.terminate()
+    proc.wait(timeout=30)
+
+
+def detect_payload(session_id, seed):
+    trace = synthetic_trace(100, seed=seed)
+    return {"session_id": session_id, "clicks": 1, "timestamp": "0",
+            "movements": [{"x": x, "y": y, "timestamp": i * 16} for i, (x, y) in enumerate(trace)]}
+
+
+def first_requests(port, count):
+    """Latency in ms of the first detection on a fresh server, then the median of the following ones"""
+    latencies = []
+    with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as http:
+        for i in range(count):
+            start = time.perf_counter()
+            response = http.post("/api/detect", json=detect_payload(f"startup_{i}", seed=i))
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.text
+    return latencies[0], statistics.median(latencies[1:])
+
+
+def shared_forest_kb(proc):
+    """Shared_Clean kB of the forest mappings, summed over the uvicorn worker processes"""
+    children = []
+    for task in os.listdir(f"/proc/{proc.pid}/task"):
+        with open(f"/proc/{proc.pid}/task/{task}/children") as f:
+            children += f.read().split()
+    shared = {}
+    for pid in children:
+        mapping = None
+        with open(f"/proc/{pid}/smaps") as f:
+            for line in f:
+                if not line.split()[0].endswith(":"):  # a mapping header rather than a field
+                    fields = line.split()
+                    mapping = fields[-1] if len(fields) >= 6 and "touchguard_forest" in fields[-1] else None
+                elif mapping and line.startswith("Shared_Clean:"):
+                    shared[pid] = shared.get(pid, 0) + int(line.split()[1])
+    return shared
+
+
+def check_persistence(port, tmp):
+    """A session written before a restart is still there after it"""
+    db_file = os.path.join(tmp, "persist.db")
+    proc, _, _ = start_server(port, db_file, {})
+    try:
+        httpx.post(f"http://127.0.0.1:{port}/api/detect", json=detect_payload("kept_session", seed=1), timeout=30)
+    finally:
+        stop_server(proc)
+    proc, _, _ = start_server(port, db_file, {})
+    try:
+        response = httpx.get(f"http://127.0.0.1:{port}/api/session/kept_session", timeout=30)
+    finally:
+        stop_server(proc)
+    assert response.status_code == 200 and response.json()["status"] == "success", response.text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model load time, time-to-ready and first-request latency")
+    parser.add_argument("--runs", type=int, default=3, help="server starts per configuration")
+    parser.add_argument("--requests", type=int, default=21, help="detections sent after each start")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the shared-mapping check")
+    args = parser.parse_args()
+
+    print(f"{'model load':18s} {'ms':>8s}")
+    for label, seconds in model_load_times(repetitions=5).items():
+        print(f"{label:18s} {seconds * 1000:8.2f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        check_persistence(port, tmp)
+        print("\n✅ Sessions survive a restart")
+
+        print(f"\n{'warmup':8s} {'wall to ready ms':>17s} {'reported ms':>12s} {'warmup ms':>10s} "
+              f"{'1st detect ms':>14s} {'median after ms':>16s}")
+        for warmup in ("1", "0"):
+            for run in range(args.runs):
+                db_file = os.path.join(tmp, f"ready_{warmup}_{run}.db")
+                proc, wall, readyz = start_server(port, db_file, {"TOUCHGUARD_WARMUP": warmup})
+                try:
+                    first, median = first_requests(port, args.requests)
+                finally:
+                    stop_server(proc)
+                stages = readyz["startup_ms"]
+                label = 'on' if warmup == '1' else 'off'
+                print(f"{label:8s} {wall * 1000:17.0f} {readyz['time_to_ready_ms']:12.0f} "
+                      f"{stages.get('warmup', 0):10.1f} {first:14.1f} {median:16.1f}")
+
+        if args.workers > 1:
+            proc, wall, _ = start_server(port, os.path.join(tmp, "workers.db"), {}, workers=args.workers)
+            try:
+                shared = shared_forest_kb(proc)
+            finally:
+                stop_server(proc)
+            print(f"\n{args.workers} workers ready in {wall * 1000:.0f} ms; "
+                  f"forest pages shared per worker (kB): {sorted(shared.values())}")
+
+
+if __name__ == "__main__":
+    main()
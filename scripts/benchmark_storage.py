@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from storage import SessionStore, UPSERT_SESSION_SQL
+
+SCHEMA = '''
+    CREATE TABLE sessions (
+        session_id TEXT PRIMARY KEY,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        user_type TEXT,
+        confidence REAL,
+        status TEXT DEFAULT 'active',
+        movement_count INTEGER DEFAULT 0,
+        last_prediction TIMESTAMP,
+        ip_address TEXT,
+        user_agent TEXT
+    )
+'''
+
+
+def make_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    conn.commit()
+    conn.close()
+
+
+def row(i):
+    now = datetime.now()
+    return (f"session_{i % 5000}", now, "Human" if i % 3 else "Bot", 91.5, 60, now, "127.0.0.1", "bench", "active")
+
+
+def per_request_connections(path, n):
+    """The original save_prediction: connect, insert, commit, close for every row"""
+    for i in range(n):
+        conn = sqlite3.connect(path)
+        conn.execute(UPSERT_SESSION_SQL, row(i))
+        conn.commit()
+        conn.close()
+
+
+def write_behind(path, n):
+    store = SessionStore(path)
+    store.start()
+    for i in range(n):
+        store.enqueue_upsert(row(i))
+    store.flush()
+    stats = store.stats()
+    store.close()
+    return stats
+
+
+def check_failures(path):
+    """A raising write fails alone, a bad row is dropped without its batch, and the writer keeps going"""
+    store = SessionStore(path, flush_interval_ms=200)
+    store.start()
+    try:
+        for i in range(5):
+            store.enqueue_upsert(row(i))
+
+        def wipe_then_fail(conn):
+            conn.execute("DELETE FROM sessions")
+            raise ValueError("not a database error")
+
+        try:
+            store.run_write(wipe_then_fail)
+            raise AssertionError("the write's error was not raised")
+        except ValueError:
+            pass
+        for i in range(5, 10):
+            store.enqueue_upsert(row(i))
+        store.enqueue_upsert(("unbindable", object(), "Bot", 1.0, 1, None, "", "", "active"))
+        store.enqueue_upsert(("too_large", None, "Bot", 1.0, 1 << 70, None, "", "", "active"))
+        store.flush(timeout=10)
+        with store.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 10
+        stats = store.stats()
+        assert stats["rows_dropped"] == 2 and stats["rows_written"] == 10, stats
+    finally:
+        store.close()
+    try:
+        store.flush(timeout=1)
+        raise AssertionError("flush waited on a stopped writer")
+    except RuntimeError:
+        pass
+
+
+def main(n=5000):
+    with tempfile.TemporaryDirectory() as tmp:
+        failures_db = os.path.join(tmp, "failures.db")
+        make_db(failures_db)
+        check_failures(failures_db)
+
+        baseline_db = os.path.join(tmp, "baseline.db")
+        make_db(baseline_db)
+        start = time.perf_counter()
+        per_request_connections(baseline_db, n)
+        baseline = time.perf_counter() - start
+
+        batched_db = os.path.join(tmp, "batched.db")
+        make_db(batched_db)
+        start = time.perf_counter()
+        stats = write_behind(batched_db, n)
+        batched = time.perf_counter() - start
+
+        with sqlite3.connect(batched_db) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == min(n, 5000)
+
+    print("✅ Failing writes are isolated and bad rows dropped one at a time; the writer keeps running")
+    print(f"{n} upserts")
+    print(f"  connect/commit per row : {n / baseline:10.0f} rows/s")
+    print(f"  WAL + write-behind     : {n / batched:10.0f} rows/s "
+          f"({stats['transactions']} transactions, mean batch {stats['batch_size']['mean']:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from benchmark_feature_extraction import synthetic_trace
+
+TRACE_LENGTHS = [10, 100, 1000, 10000]
+BATCH_SIZES = [1, 8, 32, 256]
+DETECT_TRACE_LENGTHS = [60, 1000]
+DETECT_CONCURRENCY = 32
+
+
+def movement_dicts(n_points, seed=0):
+    return [{"x": x, "y": y, "timestamp": i * 16} for i, (x, y) in enumerate(synthetic_trace(n_points, seed))]
+
+
+def load_app(db_file):
+    """Import app against a scratch database with hot-path logging sampled out
+
+    The detection cadence and the result cache are off, so repeated benchmark sessions are always
+    scored rather than deferred or answered from the cache.
+    """
+    os.chdir(ROOT)
+    os.environ["TOUCHGUARD_DB_FILE"] = db_file
+    os.environ.setdefault("TOUCHGUARD_LOG_PROFILE", "production")
+    os.environ.setdefault("TOUCHGUARD_CADENCE", "0")
+    os.environ.setdefault("TOUCHGUARD_RESULT_CACHE", "0")
+    import app
+    return app
+
+
+def measure(fn, warmup, repetitions, min_time):
+    """Per-call seconds for each repetition; each repetition loops fn until it has run for min_time"""
+    for _ in range(warmup):
+        fn()
+    # Calibrate the loop count so one repetition takes about min_time
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    samples = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return samples, number
+
+
+def summarize(samples, number, ops_per_call=1):
+    per_op_us = [s * 1e6 / ops_per_call for s in samples]
+    return {
+        "median_us": round(statistics.median(per_op_us), 3),
+        "mean_us": round(statistics.fmean(per_op_us), 3),
+        "min_us": round(min(per_op_us), 3),
+        "stdev_us": round(statistics.stdev(per_op_us), 3) if len(per_op_us) > 1 else 0.0,
+        "p95_us": round(float(np.percentile(per_op_us, 95)), 3),
+        "repetitions": len(samples),
+        "loops": number,
+        "ops_per_call": ops_per_call
+    }
+
+
+def build_cases(app):
+    """(name, callable, ops per call) for every stage and parameter combination"""
+    detector = app.detector
+    cases = []
+
+    for n in TRACE_LENGTHS:
+        movements = movement_dicts(n, seed=1)
+        coords = detector.parse_mouse_behavior(movements)
+        cases.append((f"parse_mouse_behavior[points={n}]", lambda m=movements: detector.parse_mouse_behavior(m), 1))
+        cases.append((f"extract_features[points={n}]", lambda c=coords: detector.extract_features(c, 2), 1))
+
+    rng = np.random.default_rng(2)
+    features = [detector.extract_features(synthetic_trace(60, seed), 2) for seed in range(64)]
+    for batch_size in BATCH_SIZES:
+        batch = np.array([features[i] for i in rng.integers(0, len(features), batch_size)])
+        cases.append((f"predict_proba[batch={batch_size}]", lambda b=batch: detector.predict_proba(b), batch_size))
+
+    result = {"classification": "Bot", "confidence": 91.5, "movement_count": 60}
+    # The rows plus flush()'s marker fill exactly one writer batch, so no flush-interval wait is timed
+    save_rows = app.db_config.WRITE_BATCH_SIZE - 1
+
+    def save_batch():
+        for i in range(save_rows):
+            detector.save_prediction(f"bench_{i}", result, "203.0.113.7", "benchmark")
+        app.storage.flush()
+
+    cases.append((f"save_prediction[rows={save_rows}, flushed]", save_batch, save_rows))
+
+    loop = asyncio.new_event_loop()
+    request = app.Request({
+        "type": "http", "method": "POST", "path": "/api/detect", "query_string": b"",
+        "headers": [(b"user-agent", b"benchmark")], "client": ("203.0.113.7", 50000)
+    })
+    for n in DETECT_TRACE_LENGTHS:
+        movements = movement_dicts(n, seed=3)
+        payloads = [app.MouseData(session_id=f"bench_{i}", movements=movements, clicks=2, timestamp="0")
+                    for i in range(DETECT_CONCURRENCY)]
+
+        async def wave(payloads=payloads):
+            return await asyncio.gather(*(app.detect_bot(p, request) for p in payloads))
+
+        cases.append((f"detect_bot[points={n}, concurrency={DETECT_CONCURRENCY}]",
+                      lambda w=wave: loop.run_until_complete(w()), DETECT_CONCURRENCY))
+    return cases, loop
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def run_suite(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = load_app(os.path.join(tmp, "bench.db"))
+        app.init_database()
+        app.storage.start()
+        app.execution.start()
+        try:
+            cases, loop = build_cases(app)
+            results = {}
+            for name, fn, ops in cases:
+                if args.filter and args.filter not in name:
+                    continue
+                samples, number = measure(fn, args.warmup, args.repetitions, args.min_time)
+                results[name] = summarize(samples, number, ops)
+                print(f"  {name:48s} {results[name]['median_us']:12.2f} µs/op  "
+                      f"(± {results[name]['stdev_us']:.2f}, {args.repetitions} x {number})")
+            loop.close()
+        finally:
+            app.execution.shutdown()
+            app.storage.close()
+    return {"environment": environment(), "results": results}
+
+
+def compare(current, baseline, threshold):
+    """Print median changes against baseline; returns the names of cases slower by more than threshold %"""
+    regressions = []
+    print(f"\n  {'case':48s} {'baseline':>12s} {'current':>12s} {'change':>9s}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"  {name:48s} {'-':>12s} {result['median_us']:12.2f}      new")
+            continue
+        change = (result["median_us"] - before["median_us"]) / before["median_us"] * 100
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  ❌ regression"
+        print(f"  {name:48s} {before['median_us']:12.2f} {result['median_us']:12.2f} {change:+8.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detection hot-path microbenchmarks")
+    parser.add_argument("--output", help="write results as JSON to this file (use it later as a baseline)")
+    parser.add_argument("--compare", help="baseline JSON to compare against; exits 1 on regression")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed median slowdown in percent")
+    parser.add_argument("--filter", help="only run cases whose name contains this string")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--repetitions", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per repetition")
+    args = parser.parse_args()
+
+    print("⏱️ Detection hot-path benchmarks (median per operation)")
+    current = run_suite(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} case(s) regressed by more than {args.threshold}%")
+            sys.exit(1)
+        print(f"\n✅ No case regressed by more than {args.threshold}%")
+
+
+if __name__ == "__main__":
+    main()
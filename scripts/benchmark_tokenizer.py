@@ -0,0 +1,158 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import behaviour_tokenizer
+from benchmark_ingestion import behaviour_string
+
+
+def regex_parse(behavior_string):
+    """The original two-scan parser from train.py, kept as the parity reference"""
+    moves = re.findall(behaviour_tokenizer.MOVE_PATTERN, behavior_string)
+    clicks = re.findall(behaviour_tokenizer.CLICK_PATTERN, behavior_string)
+    return [(int(x), int(y)) for x, y in moves], len(clicks)
+
+
+def regex_click_positions(behavior_string):
+    """Movements preceding each click, by the reference patterns"""
+    positions = []
+    seen = 0
+    for match in re.finditer(behaviour_tokenizer.TOKEN_PATTERN, behavior_string):
+        if match.group(3):
+            positions.append(seen)
+        else:
+            seen += 1
+    return positions
+
+
+def fuzz_string(rng, n_tokens):
+    """Valid tokens mixed with near-misses, stray digits, non-ASCII digits and truncated tokens"""
+    fragments = ["[m(", ")]", ",", "[c(", "[c(x)]", "[m(1,)]", "[m(,2)]", "[[m(3,4)]", "m(5,6)]", "[m(7,8)",
+                 "]", "[", "(", "9", "12", "[m(-1,2)]", "[m(1 ,2)]", "[C(l)]", "[c(l))]", "[m(٣,4)]", "x"]
+    parts = []
+    for _ in range(n_tokens):
+        roll = rng.random()
+        if roll < 0.55:
+            parts.append(f"[m({rng.randint(0, 10 ** rng.randint(1, 6))},{rng.randint(0, 99999)})]")
+        elif roll < 0.65:
+            parts.append(f"[c({rng.choice('lr')})]")
+        elif roll < 0.7:
+            parts.append(f"[m({rng.randint(2 ** 31, 2 ** 40)},{rng.randint(0, 9)})]")
+        else:
+            parts.append(rng.choice(fragments))
+    return "".join(parts)
+
+
+def random_chunks(text, rng):
+    i = 0
+    while i < len(text):
+        size = rng.randint(1, 40)
+        yield text[i:i + size]
+        i += size
+
+
+def assert_equivalent(behaviour, tokens, what):
+    movements, click_count = regex_parse(behaviour)
+    expected = np.array(movements, dtype=np.int64).reshape(-1, 2)
+    assert np.array_equal(tokens.coords, expected), f"{what}: coordinates differ from the regex parser"
+    assert len(tokens.click_positions) == click_count, f"{what}: click count differs from the regex parser"
+    assert tokens.click_positions.tolist() == regex_click_positions(behaviour), f"{what}: click positions differ"
+
+
+def check_equivalence(cases, seed):
+    rng = random.Random(seed)
+    for i in range(cases):
+        behaviour = fuzz_string(rng, rng.randint(0, 200))
+        assert_equivalent(behaviour, behaviour_tokenizer.tokenize(behaviour), f"case {i}")
+        if behaviour.isascii():
+            assert_equivalent(behaviour, behaviour_tokenizer.scan(behaviour), f"case {i} byte scan")
+        assert_equivalent(behaviour, behaviour_tokenizer.tokenize_stream(random_chunks(behaviour, rng)),
+                          f"case {i} streamed")
+    for behaviour in ["", "[m(1,2)]", "[c(l)]", "[m(1,2)", "noise only", "[m(٣,4)][c(r)][m(5,6)]"]:
+        assert_equivalent(behaviour, behaviour_tokenizer.tokenize(behaviour), repr(behaviour))
+    for tokenize in (behaviour_tokenizer.tokenize, behaviour_tokenizer.scan):
+        big = tokenize("[m(2147483647,0)][m(2147483648,1)]")
+        assert big.coords.dtype == np.int64 and big.coords[1, 0] == 2 ** 31
+    assert behaviour_tokenizer.tokenize("[m(1920,1080)]").coords.dtype == np.int32
+
+
+def check_file_reader(behaviour):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "mouse_movements.json")
+        with open(path, "w") as f:
+            json.dump({"total_behaviour": behaviour, "other": "x"}, f)
+        streamed = "".join(behaviour_tokenizer.read_behaviour_chunks(path, chunk_size=4096))
+        assert streamed == behaviour, "streamed file contents differ from json.load"
+        # An escaped value falls back to the JSON decoder without repeating what was already yielded
+        escaped = behaviour[:10000] + '"quoted"' + behaviour[10000:20000]
+        with open(path, "w") as f:
+            json.dump({"total_behaviour": escaped}, f)
+        assert "".join(behaviour_tokenizer.read_behaviour_chunks(path, chunk_size=4096)) == escaped
+        with open(path, "w") as f:
+            json.dump({"total_behaviour": behaviour}, f)
+        peak_full, _ = peak_memory(lambda: regex_parse(json.load(open(path))["total_behaviour"]))
+        peak_stream, tokens = peak_memory(
+            lambda: behaviour_tokenizer.tokenize_stream(behaviour_tokenizer.read_behaviour_chunks(path)))
+    assert_equivalent(behaviour, tokens, "streamed file")
+    return peak_full, peak_stream
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    try:
+        result = fn()
+        return tracemalloc.get_traced_memory()[1], result
+    finally:
+        tracemalloc.stop()
+
+
+def best_time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="total_behaviour tokenizer throughput and equivalence")
+    parser.add_argument("--cases", type=int, default=2000, help="random strings checked against the regex parser")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    check_equivalence(args.cases, args.seed)
+    print(f"✅ {args.cases} fuzzed strings tokenize exactly like the regex parser, whole and streamed")
+
+    print(f"{'points':>9s} {'MB':>7s} {'regex MB/s':>11s} {'tokenize MB/s':>14s} {'stream MB/s':>12s} {'speedup':>8s}")
+    rng = random.Random(args.seed)
+    for n_points in [100, 1000, 10000, 100000, 1000000]:
+        behaviour = behaviour_string(rng, n_points)
+        assert_equivalent(behaviour, behaviour_tokenizer.tokenize(behaviour), f"{n_points} points")
+        mb = len(behaviour) / 1e6
+        chunk = behaviour_tokenizer.STREAM_CHUNK_SIZE
+        regex = best_time(lambda: regex_parse(behaviour), args.repeat)
+        tokenize = best_time(lambda: behaviour_tokenizer.tokenize(behaviour), args.repeat)
+        stream = best_time(lambda: behaviour_tokenizer.tokenize_stream(
+            behaviour[i:i + chunk] for i in range(0, len(behaviour), chunk)), args.repeat)
+        print(f"{n_points:9d} {mb:7.2f} {mb / regex:11.1f} {mb / tokenize:14.1f} {mb / stream:12.1f} "
+              f"{regex / tokenize:7.1f}x")
+
+    peak_full, peak_stream = check_file_reader(behaviour)
+    print(f"\nPeak memory parsing a {mb:.1f} MB session file: json.load + regex {peak_full / 1e6:.1f} MB, "
+          f"streamed tokenizer {peak_stream / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
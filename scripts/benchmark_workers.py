@@ -0,0 +1,177 @@
+import os
+import sys
+import time
+import pickle
+import shutil
+import asyncio
+import argparse
+import tempfile
+
+import numpy as np
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from benchmark_feature_extraction import synthetic_trace
+from benchmark_startup import free_port, start_server, stop_server
+
+
+def movements(trace, offset=0):
+    return [{"x": x, "y": y, "timestamp": (offset + i) * 16} for i, (x, y) in enumerate(trace)]
+
+
+def fresh_post(port, path, body, health=False):
+    """One request on its own connection, so consecutive calls can land on different workers
+
+    Returns the response and the serving worker's pid, or its whole /healthz body with health.
+    """
+    with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as http:
+        response = http.post(path, json=body)
+        status = http.get("/healthz").json()
+    return response, status if health else status["pid"]
+
+
+def check_shared_state(port, chunks=12, chunk_size=25):
+    """An incremental session split across workers ends up with the same features as one full detection"""
+    trace = synthetic_trace(chunks * chunk_size, seed=5)
+    pids = set()
+    for i in range(chunks):
+        chunk = trace[i * chunk_size:(i + 1) * chunk_size]
+        response, pid = fresh_post(port, "/api/detect", {
+            "session_id": "split_session", "movements": movements(chunk, i * chunk_size), "clicks": 2,
+            "timestamp": "0", "incremental": True
+        })
+        assert response.status_code == 200, response.text
+        pids.add(pid)
+    full, _ = fresh_post(port, "/api/detect", {"session_id": "whole_session", "movements": movements(trace),
+                                               "clicks": 2, "timestamp": "0"})
+    np.testing.assert_allclose(response.json()["features"], full.json()["features"], rtol=1e-9, atol=1e-9)
+
+    blocked, _ = fresh_post(port, "/api/admin/block/split_session", {})
+    assert blocked.status_code == 200, blocked.text
+    for i in range(8):
+        response, pid = fresh_post(port, "/api/detect", {
+            "session_id": "split_session", "movements": movements(trace[:10]), "clicks": 2, "timestamp": "0",
+            "incremental": True
+        })
+        assert response.status_code == 403 and response.json()["blocked"], response.text
+        pids.add(pid)
+    return pids
+
+
+def check_model_reload(port, model_path, sync_seconds, attempts=16):
+    """A reload through one worker is served by every worker once they have checked the shared digest"""
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    model.retrained_for_benchmark = True  # same predictions, new pickle digest
+    with open(model_path, 'wb') as f:
+        pickle.dump(model, f)
+    reloaded, _ = fresh_post(port, "/api/admin/reload-model", {})
+    assert reloaded.status_code == 200, reloaded.text
+    digest = reloaded.json()["model_digest"]
+    time.sleep(sync_seconds * 1.5)
+    served = {}
+    for i in range(attempts):
+        response, health = fresh_post(port, "/api/detect", {
+            "session_id": f"after_reload_{i}", "movements": movements(synthetic_trace(30, seed=i)), "clicks": 1,
+            "timestamp": "0"
+        }, health=True)
+        assert response.status_code == 200, response.text
+        served[health["pid"]] = health["model_digest"]
+    assert set(served.values()) == {digest}, served
+    return served
+
+
+async def client(http, client_id, requests_per_client, latencies, errors, chunk_size=20):
+    """Incremental calls of chunk_size new points each, so every call reads and writes session state
+
+    A state_reset after the first call means the session's state was not where the call landed.
+    """
+    trace = synthetic_trace(requests_per_client * chunk_size, seed=client_id)
+    for i in range(requests_per_client):
+        body = {"session_id": f"load_{client_id}", "clicks": 1, "timestamp": "0", "incremental": True,
+                "movements": movements(trace[i * chunk_size:(i + 1) * chunk_size], i * chunk_size)}
+        start = time.perf_counter()
+        try:
+            response = await http.post("/api/detect", json=body)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+            elif i and response.json().get("state_reset"):
+                errors.append("state_reset")
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run_load(ports, clients, requests_per_client):
+    """Clients spread over ports by session, as a proxy hashing X-TouchGuard-Session would"""
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    https = [httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) for port in ports]
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*[client(https[i % len(https)], i, requests_per_client, latencies, errors)
+                               for i in range(clients)])
+        elapsed = time.perf_counter() - start
+    finally:
+        for http in https:
+            await http.aclose()
+    return np.array(latencies), errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Detection throughput from 1 to N workers, sticky per-worker state against shared state")
+    parser.add_argument("--max-workers", type=int, default=max(os.cpu_count() or 1, 2))
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20, help="requests per client")
+    args = parser.parse_args()
+    print(f"{os.cpu_count()} CPU(s) available")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        model_path = os.path.join(tmp, "model.pkl")
+        shutil.copyfile(os.path.join(ROOT, "models", "touchguard_improved_bot_detector.pkl"), model_path)
+        sync_seconds = 0.2
+        proc, _, _ = start_server(port, os.path.join(tmp, "shared.db"), {
+            "TOUCHGUARD_WORKERS": "2", "TOUCHGUARD_MODEL_PATH": model_path,
+            "TOUCHGUARD_FOREST_PATH": os.path.join(tmp, "forest"), "TOUCHGUARD_MODEL_SYNC_SECONDS": str(sync_seconds)
+        }, workers=2)
+        try:
+            pids = check_shared_state(port)
+            served = check_model_reload(port, model_path, sync_seconds)
+        finally:
+            stop_server(proc)
+        print(f"✅ Incremental state and blocks are shared across workers (requests served by {len(pids)} of 2)")
+        print(f"✅ A model reload through one worker is served by all {len(served)} workers seen")
+
+        # in-proc: per-worker state, one single-worker instance per port with sessions routed stickily;
+        # shared: uvicorn --workers over the shared state file, every update in one BEGIN IMMEDIATE
+        print(f"\n{'workers':>7s} {'state':>9s} {'req/s':>8s} {'scaling':>8s} {'p50 ms':>8s} {'p99 ms':>8s} "
+              f"{'errors':>7s}")
+        configurations = [(1, "in-proc", {}), (1, "shared", {"TOUCHGUARD_SHARED_STATE": "1"})]
+        for n in range(2, args.max_workers + 1):
+            configurations += [(n, "in-proc", {}), (n, "shared", {"TOUCHGUARD_WORKERS": str(n)})]
+        baseline = None
+        for workers, label, env in configurations:
+            db_file = os.path.join(tmp, f"load_{workers}_{label}.db")
+            if label == "shared":
+                ports = [port]
+                procs = [start_server(port, db_file, env, workers=workers)[0]]
+            else:
+                ports = [port] + [free_port() for _ in range(workers - 1)]
+                procs = [start_server(p, db_file, {"TOUCHGUARD_DEPLOYMENT_ID": "sticky"})[0] for p in ports]
+            try:
+                latencies, errors, elapsed = asyncio.run(run_load(ports, args.clients, args.requests))
+            finally:
+                for proc in procs:
+                    stop_server(proc)
+            throughput = len(latencies) / elapsed
+            baseline = baseline or throughput
+            print(f"{workers:7d} {label:>9s} {throughput:8.0f} {throughput / baseline:7.2f}x "
+                  f"{np.percentile(latencies, 50):8.1f} {np.percentile(latencies, 99):8.1f} {len(errors):7d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import os
+import sys
+import json
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from benchmark_suite import load_app, movement_dicts
+
+STATS_ENDPOINTS = ["/api/admin/pipeline-stats", "/api/admin/inference-stats", "/api/admin/storage-stats",
+                   "/api/admin/cadence-stats", "/api/admin/cache-stats", "/api/admin/prefilter-stats",
+                   "/api/admin/retention-stats", "/api/admin/log-stats", "/api/admin/feed-stats"]
+
+
+def main():
+    """The JSON stats endpoints keep serializing once observations overflow the top histogram buckets"""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["TOUCHGUARD_ARCHIVE_DIR"] = os.path.join(tmp, "archive")
+        app = load_app(os.path.join(tmp, "stats.db"))
+        from fastapi.testclient import TestClient
+
+        with TestClient(app.app, raise_server_exceptions=False) as client:
+            # Past the top touchguard_detect_movement_count bucket
+            response = client.post('/api/detect', json={"session_id": "overflow", "movements": movement_dicts(12000),
+                                                         "clicks": 1, "timestamp": 0})
+            assert response.status_code == 200, response.text
+            # A micro-batch that waited longer than the last queue-wait bucket
+            app.detector.scheduler.queue_wait_ms.observe(10 * app.detector.scheduler.queue_wait_ms.buckets[-1])
+
+            pipeline = client.get("/api/admin/pipeline-stats").json()
+            assert pipeline["touchguard_detect_movement_count"]["all"]["overflow"] == 1, pipeline
+            inference = client.get("/api/admin/inference-stats").json()
+            assert inference["queue_wait_ms"]["p99"] == app.detector.scheduler.queue_wait_ms.buckets[-1], inference
+
+            for path in STATS_ENDPOINTS:
+                response = client.get(path)
+                assert response.status_code == 200, (path, response.status_code, response.text)
+                json.dumps(response.json(), allow_nan=False)
+            assert client.get("/metrics").status_code == 200
+    print(f"✅ {len(STATS_ENDPOINTS)} stats endpoints serialize with overflowing histograms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from movement_patterns import generate_linear_movements, generate_bezier_curve, add_human_like_pauses
+
+
+def basic_bot_movements(rng):
+    """The BasicBotSimulator path: straight lines to a product, then to the cart"""
+    start = int(time.time() * 1000)
+    product_x, product_y = rng.randint(300, 500), rng.randint(200, 400)
+    movements = generate_linear_movements(100, 100, product_x, product_y, start_time=start)
+    movements += generate_linear_movements(product_x, product_y, 800, 100, start_time=start + 1000)
+    return movements, 2
+
+
+def advanced_bot_movements(rng):
+    """The AdvancedBotSimulator path: Bézier browsing between products with pauses and micro-moves"""
+    start = int(time.time() * 1000)
+    x, y = rng.randint(50, 200), rng.randint(50, 200)
+    movements = generate_bezier_curve(x, y, rng.randint(300, 600), rng.randint(200, 400),
+                                      start_time=start, rng=rng)
+    clicks = 0
+    for product_num in range(rng.randint(2, 4)):
+        last = movements[-1]
+        movements += generate_bezier_curve(last['x'], last['y'], rng.randint(200, 800), rng.randint(300, 600),
+                                           start_time=last['timestamp'] + rng.randint(1000, 3000), rng=rng)
+        if product_num >= 1:
+            clicks += 1
+    return add_human_like_pauses(movements, rng=rng), clicks
+
+
+# name -> (payload generator, expected classification)
+SCENARIOS = {
+    "basic_bot": (basic_bot_movements, "Bot"),
+    "advanced_bot": (advanced_bot_movements, "Bot"),
+}
+
+
+def parse_mix(spec):
+    """Parse "basic_bot=0.5,advanced_bot=0.5" into normalized scenario weights"""
+    weights = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, weight = item.partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(f"unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    total = sum(weights.values())
+    return {name: weight / total for name, weight in weights.items()}
+
+
+def build_payloads(mix, pool_size, seed):
+    """Pre-generate a pool of (scenario, body) pairs so payload generation stays out of the timed loop"""
+    rng = random.Random(seed)
+    names, weights = zip(*mix.items())
+    pool = []
+    for i in range(pool_size):
+        scenario = rng.choices(names, weights)[0]
+        movements, clicks = SCENARIOS[scenario][0](rng)
+        pool.append((scenario, {
+            "session_id": f"load_{scenario}_{i}",
+            "movements": movements,
+            "clicks": clicks,
+            "timestamp": datetime.now().isoformat()
+        }))
+    return pool
+
+
+class LoadStats:
+    """Latencies, status codes and verdicts collected over a run"""
+
+    def __init__(self):
+        self.latencies_ms = []
+        self.errors = {}
+        self.verdicts = {name: {"total": 0, "correct": 0} for name in SCENARIOS}
+
+    def record(self, scenario, latency_ms, status, body):
+        self.latencies_ms.append(latency_ms)
+        if status != 200:
+            self.add_error(f"http_{status}")
+            return
+        if body.get("error"):
+            self.add_error(f"rejected: {body['error']}")
+            return
+        verdict = self.verdicts[scenario]
+        verdict["total"] += 1
+        verdict["correct"] += body.get("classification") == SCENARIOS[scenario][1]
+
+    def add_error(self, kind):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def report(self, elapsed):
+        latencies = np.array(self.latencies_ms) if self.latencies_ms else np.zeros(1)
+        requests = len(self.latencies_ms)
+        return {
+            "requests": requests,
+            "duration_s": round(elapsed, 3),
+            "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(float(np.percentile(latencies, 50)), 3),
+                "p90": round(float(np.percentile(latencies, 90)), 3),
+                "p95": round(float(np.percentile(latencies, 95)), 3),
+                "p99": round(float(np.percentile(latencies, 99)), 3),
+                "max": round(float(latencies.max()), 3)
+            },
+            "error_rate": round(sum(self.errors.values()) / requests, 4) if requests else 0.0,
+            "errors": self.errors,
+            "accuracy": {
+                name: round(v["correct"] / v["total"], 4)
+                for name, v in self.verdicts.items() if v["total"]
+            }
+        }
+
+
+async def send(client, stats, scenario, body, scheduled_at):
+    """POST one payload; latency counts from the scheduled send time so queueing delay is included"""
+    try:
+        response = await client.post("/api/detect", json=body)
+        status = response.status_code
+        result = response.json() if status == 200 else {}
+    except httpx.HTTPError as e:
+        stats.latencies_ms.append((time.perf_counter() - scheduled_at) * 1000)
+        stats.add_error(type(e).__name__)
+        return
+    stats.record(scenario, (time.perf_counter() - scheduled_at) * 1000, status, result)
+
+
+async def run_closed_loop(client, stats, pool, total_requests, concurrency):
+    """concurrency workers, each sending its next request as soon as the previous one returns"""
+    counter = iter(range(total_requests))
+
+    async def worker():
+        for i in counter:
+            scenario, body = pool[i % len(pool)]
+            await send(client, stats, scenario, {**body, "session_id": f"{body['session_id']}_{i}"},
+                       time.perf_counter())
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def run_open_loop(client, stats, pool, total_requests, rate, max_in_flight):
+    """Start requests on a fixed schedule of rate per second, whether or not earlier ones finished"""
+    interval = 1.0 / rate
+    start = time.perf_counter()
+    in_flight = set()
+    limit = asyncio.Semaphore(max_in_flight)
+
+    async def bounded(scenario, body, scheduled_at):
+        async with limit:
+            await send(client, stats, scenario, body, scheduled_at)
+
+    for i in range(total_requests):
+        scheduled_at = start + i * interval
+        delay = scheduled_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        scenario, body = pool[i % len(pool)]
+        task = asyncio.create_task(bounded(scenario, {**body, "session_id": f"{body['session_id']}_{i}"},
+                                           scheduled_at))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    await asyncio.gather(*in_flight)
+
+
+async def run_load(args):
+    mix = parse_mix(args.mix)
+    pool = build_payloads(mix, args.pool_size, args.seed)
+    stats = LoadStats()
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout,
+                                   limits=httpx.Limits(max_connections=max(args.concurrency, args.max_in_flight)))
+        app_module = None
+    else:
+        # In-process: drive the ASGI app directly, running its startup and shutdown hooks ourselves.
+        # The app resets its database on startup, so point it at a scratch file unless told otherwise.
+        os.chdir(ROOT)
+        os.environ.setdefault("TOUCHGUARD_DB_FILE", os.path.join(tempfile.mkdtemp(), "load_test.db"))
+        os.environ.setdefault("TOUCHGUARD_LOG_PROFILE", "production")
+        import app as app_module
+        for handler in app_module.app.router.on_startup:
+            await handler()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app_module.app,
+                                                                 client=("203.0.113.7", 50000)),
+                                   base_url="http://touchguard.local", timeout=args.timeout)
+
+    try:
+        start = time.perf_counter()
+        if args.rate:
+            await run_open_loop(client, stats, pool, args.requests, args.rate, args.max_in_flight)
+        else:
+            await run_closed_loop(client, stats, pool, args.requests, args.concurrency)
+        elapsed = time.perf_counter() - start
+    finally:
+        await client.aclose()
+        if app_module is not None:
+            for handler in app_module.app.router.on_shutdown:
+                await handler()
+
+    report = stats.report(elapsed)
+    report["mode"] = f"open loop at {args.rate} req/s" if args.rate else f"closed loop x{args.concurrency}"
+    report["target"] = args.url or "in-process ASGI app"
+    return report
+
+
+def print_report(report):
+    print(f"🎯 {report['target']} ({report['mode']})")
+    print(f"   📊 {report['requests']} requests in {report['duration_s']}s: {report['throughput_rps']} req/s")
+    latency = report["latency_ms"]
+    print(f"   ⏱️ latency ms  p50 {latency['p50']}  p90 {latency['p90']}  p95 {latency['p95']}  "
+          f"p99 {latency['p99']}  max {latency['max']}")
+    print(f"   ❌ error rate {report['error_rate'] * 100:.2f}% {report['errors'] or ''}")
+    for name, accuracy in report["accuracy"].items():
+        print(f"   🤖 {name}: {accuracy * 100:.1f}% classified as {SCENARIOS[name][1]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Browserless load generator for /api/detect")
+    parser.add_argument("--url", help="server base URL, e.g. http://localhost:8000; omit to run in-process")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32, help="closed-loop workers")
+    parser.add_argument("--rate", type=float, help="open-loop requests per second instead of closed loop")
+    parser.add_argument("--max-in-flight", type=int, default=512, help="cap on outstanding open-loop requests")
+    parser.add_argument("--mix", default="basic_bot=0.5,advanced_bot=0.5", help="scenario weights")
+    parser.add_argument("--pool-size", type=int, default=200, help="distinct payloads to pre-generate")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
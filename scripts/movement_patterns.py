@@ -0,0 +1,82 @@
+import time
+import random
+
+
+def generate_linear_movements(start_x, start_y, end_x, end_y, steps=20, start_time=None):
+    """Generate straight-line bot movements"""
+    movements = []
+    current_time = int(time.time() * 1000) if start_time is None else start_time
+
+    for i in range(steps):
+        progress = i / (steps - 1) if steps > 1 else 1
+        x = int(start_x + (end_x - start_x) * progress)
+        y = int(start_y + (end_y - start_y) * progress)
+
+        movements.append({
+            'x': x,
+            'y': y,
+            'timestamp': current_time + i * 50  # Fixed 50ms intervals
+        })
+
+    return movements
+
+
+def generate_bezier_curve(start_x, start_y, end_x, end_y, steps=50, start_time=None, rng=random):
+    """Generate curved, human-like movements using Bézier curves"""
+    movements = []
+    current_time = int(time.time() * 1000) if start_time is None else start_time
+
+    # Add control points for natural curve
+    mid_x = (start_x + end_x) / 2 + rng.randint(-100, 100)
+    mid_y = (start_y + end_y) / 2 + rng.randint(-50, 50)
+
+    for i in range(steps):
+        t = i / (steps - 1) if steps > 1 else 1
+
+        # Quadratic Bézier curve
+        x = (1-t)**2 * start_x + 2*(1-t)*t * mid_x + t**2 * end_x
+        y = (1-t)**2 * start_y + 2*(1-t)*t * mid_y + t**2 * end_y
+
+        # Add subtle random noise (human imperfection)
+        x += rng.uniform(-3, 3)
+        y += rng.uniform(-3, 3)
+
+        # Variable timing (human-like acceleration/deceleration)
+        base_delay = rng.uniform(15, 35)  # Variable timing
+        timestamp_offset = int(base_delay * i)
+
+        movements.append({
+            'x': int(max(0, min(x, 1920))),  # Keep within screen bounds
+            'y': int(max(0, min(y, 1080))),
+            'timestamp': current_time + timestamp_offset
+        })
+
+    return movements
+
+
+def add_human_like_pauses(movements, rng=random):
+    """Add realistic pauses and micro-movements"""
+    enhanced_movements = []
+
+    for i, move in enumerate(movements):
+        enhanced_movements.append(move)
+
+        # Random pauses (thinking time)
+        if rng.random() < 0.08:  # 8% chance of pause
+            pause_duration = rng.uniform(200, 800)  # 200-800ms pause
+            pause_move = move.copy()
+            pause_move['timestamp'] += int(pause_duration)
+            enhanced_movements.append(pause_move)
+
+        # Micro-movements (small adjustments)
+        if rng.random() < 0.03:  # 3% chance of micro-movement
+            micro_x = move['x'] + rng.randint(-5, 5)
+            micro_y = move['y'] + rng.randint(-5, 5)
+            micro_move = {
+                'x': micro_x,
+                'y': micro_y,
+                'timestamp': move['timestamp'] + rng.randint(20, 100)
+            }
+            enhanced_movements.append(micro_move)
+
+    return enhanced_movements
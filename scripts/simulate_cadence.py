@@ -0,0 +1,177 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from detection_cadence import CadencePolicy
+
+FIXED_INTERVAL_S = 5.0
+CLIENT_TICK_S = 1.0
+POINTS_PER_SECOND = 20
+# Points a non-incremental tracker resends on every call (mouse-tracker.js keeps at most 100)
+FULL_WINDOW_POINTS = 100
+
+
+def settled_human(rng, t, duration):
+    return False, rng.uniform(88, 99)
+
+
+def settled_bot(rng, t, duration):
+    return True, rng.uniform(90, 99)
+
+
+def ambiguous(rng, t, duration):
+    return rng.random() < 0.5, rng.uniform(50, 65)
+
+
+def turns_bot(rng, t, duration):
+    """Confident human for the first half, then scripted automation takes over the tab"""
+    return (True, rng.uniform(85, 97)) if t >= duration / 2 else (False, rng.uniform(88, 99))
+
+
+# name -> verdict the model would return at time t
+SESSION_TYPES = {
+    "settled_human": settled_human,
+    "settled_bot": settled_bot,
+    "ambiguous": ambiguous,
+    "turns_bot": turns_bot,
+}
+
+
+def simulate(policy, kind, session_id, duration, rng, load=0.0, full_window=False):
+    """Run one client that follows the server's schedule; returns (check times, deferred calls)
+
+    A full-window client sends its last points instead of only the new ones,
+    so its calls are checked against the interval alone.
+    """
+    policy.load = lambda: load
+    verdict = SESSION_TYPES[kind]
+    next_check_at, min_new, new_points = 0.0, policy.min_new_movements, 0
+    checks, deferred = [], 0
+    t = 0.0
+    while t < duration:
+        t += CLIENT_TICK_S
+        new_points += POINTS_PER_SECOND * CLIENT_TICK_S
+        if t < next_check_at or new_points < min_new:
+            continue
+        decision = policy.check(session_id, None if full_window else new_points, now=t)
+        if not decision.allowed:
+            deferred += 1
+            next_check_at, min_new = t + decision.retry_after, decision.min_new_movements
+            continue
+        is_bot, confidence = verdict(rng, t, duration)
+        interval, min_new = policy.record(session_id, is_bot, confidence, now=t)
+        next_check_at, new_points = t + interval, 0
+        checks.append((t, is_bot))
+    return checks, deferred
+
+
+def max_gap(checks):
+    times = [0.0] + [t for t, _ in checks]
+    return max(b - a for a, b in zip(times, times[1:]))
+
+
+async def check_endpoint():
+    """A second call straight after the first is deferred with 429 and the schedule
+
+    Once a session has settled and is due again, a full window of
+    FULL_WINDOW_POINTS is scored even though min_new_movements is above it,
+    while an incremental call with too few new points is still deferred.
+    """
+    os.chdir(ROOT)
+    os.environ["TOUCHGUARD_DB_FILE"] = os.path.join(tempfile.mkdtemp(), "cadence.db")
+    os.environ.setdefault("TOUCHGUARD_LOG_PROFILE", "production")
+    import app
+    for handler in app.app.router.on_startup:
+        await handler()
+    transport = httpx.ASGITransport(app=app.app, client=("203.0.113.7", 50000))
+    body = {"session_id": "cadence_check", "clicks": 1, "timestamp": "0", "incremental": True,
+            "movements": [{"x": 100 + 7 * i, "y": 200 + 3 * i, "timestamp": i * 16} for i in range(40)]}
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://touchguard.local") as client:
+            first = await client.post("/api/detect", json=body)
+            second = await client.post("/api/detect", json=body)
+            stats = (await client.get("/api/admin/cadence-stats")).json()
+
+            # Confident, agreeing verdicts recorded long enough ago that the session is due again
+            for _ in range(app.cadence.history):
+                _, min_new = app.cadence.record("cadence_check", False, 99.0, now=time.monotonic() - 3600)
+            window = {**body, "incremental": False,
+                      "movements": [{"x": 100 + 7 * i, "y": 200 + 3 * (i % 9), "timestamp": i * 16}
+                                    for i in range(FULL_WINDOW_POINTS)]}
+            full_window = await client.post("/api/detect", json=window)
+            for _ in range(app.cadence.history):
+                app.cadence.record("cadence_check", False, 99.0, now=time.monotonic() - 3600)
+            too_few = await client.post("/api/detect", json=body)
+    finally:
+        for handler in app.app.router.on_shutdown:
+            await handler()
+    assert first.status_code == 200 and first.json()["next_check_ms"] >= 5000, first.json()
+    assert second.status_code == 429 and int(second.headers["retry-after"]) >= 4, second.json()
+    assert second.json()["deferred"] and stats["deferred"] == 1, stats
+    assert min_new > FULL_WINDOW_POINTS and full_window.status_code == 200, (min_new, full_window.json())
+    assert too_few.status_code == 429 and too_few.json()["min_new_movements"] > len(body["movements"]), too_few.json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Request volume and coverage under the adaptive detection cadence")
+    parser.add_argument("--sessions", type=int, default=200, help="sessions per type")
+    parser.add_argument("--minutes", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--skip-endpoint", action="store_true", help="only run the policy simulation")
+    args = parser.parse_args()
+
+    duration = args.minutes * 60
+    fixed_per_minute = 60 / FIXED_INTERVAL_S
+    print(f"{args.sessions} sessions per type for {args.minutes:g} min; a fixed {FIXED_INTERVAL_S:g}s timer "
+          f"makes {fixed_per_minute:.1f} calls per session-minute")
+    print(f"\n{'session type':14s} {'load':>5s} {'calls/min':>10s} {'vs fixed':>9s} {'max gap s':>10s} "
+          f"{'deferred':>9s} {'flip caught after s':>20s}")
+    for load in (0.0, 1.0):
+        total = 0
+        for kind in SESSION_TYPES:
+            rng = random.Random(args.seed)
+            policy = CadencePolicy()
+            calls, gaps, deferred, flip_delays = 0, [], 0, []
+            for i in range(args.sessions):
+                checks, session_deferred = simulate(policy, kind, f"{kind}_{i}", duration, rng, load)
+                calls += len(checks)
+                deferred += session_deferred
+                gaps.append(max_gap(checks))
+                if kind == "turns_bot":
+                    flip_delays.append(next(t for t, is_bot in checks if is_bot) - duration / 2)
+            total += calls
+            per_minute = calls / args.sessions / args.minutes
+            flip = f"{max(flip_delays):20.1f}" if flip_delays else f"{'-':>20s}"
+            print(f"{kind:14s} {load:5.1f} {per_minute:10.2f} {per_minute / fixed_per_minute:8.0%} "
+                  f"{max(gaps):10.1f} {deferred:9d} {flip}")
+            if kind == "ambiguous":
+                # Ambiguous sessions keep the base cadence, load or not
+                assert max(gaps) <= FIXED_INTERVAL_S + 2 * CLIENT_TICK_S, max(gaps)
+        share = total / (len(SESSION_TYPES) * args.sessions * args.minutes * fixed_per_minute)
+        print(f"{'all':14s} {load:5.1f} {'':10s} {share:8.0%}\n")
+
+    # Settled full-window sessions keep being checked at the slow cadence instead of being deferred forever
+    policy = CadencePolicy()
+    rng = random.Random(args.seed)
+    for i in range(args.sessions):
+        checks, deferred = simulate(policy, "settled_human", f"window_{i}", duration, rng, full_window=True)
+        assert deferred == 0 and max_gap(checks) <= policy.max_interval + 2 * CLIENT_TICK_S, (deferred, checks)
+    print(f"settled full-window sessions: {len(checks) / args.minutes:.2f} calls/min, none deferred")
+
+    if not args.skip_endpoint:
+        asyncio.run(check_endpoint())
+        print("✅ /api/detect returns the schedule and defers early calls with 429 + Retry-After; "
+              "settled full-window sessions are still scored")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+import time
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+import feature_engine
+
+# velocity_median is exact over this many steps, then estimated from log-spaced bins MEDIAN_BIN_GROWTH apart
+EXACT_MEDIAN_STEPS = 1024
+MEDIAN_BIN_GROWTH = 1.02
+# feature_engine.MIN_VELOCITY up to about 1e5 px per step; faster steps share the last bin
+MEDIAN_BIN_EDGES = feature_engine.MIN_VELOCITY * MEDIAN_BIN_GROWTH ** np.arange(700)
+
+# Recent timestamps kept per session, so the prefilter's timing checks see more than one call's points
+TIMESTAMP_WINDOW = 128
+
+# state_reset is true when the state held no points before this call: a new session, or one whose
+# state was lost to idle eviction, the LRU cap, a restart or another worker's private store.
+# timestamps is the session's recent timestamp window, including this call's
+SessionUpdate = namedtuple("SessionUpdate", "features count state_reset timestamps")
+
+
+class RunningStats:
+    """Welford mean/variance plus min/max, updated a chunk at a time"""
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        """Merge a chunk of values using Chan's parallel form of Welford's update"""
+        n_b = len(values)
+        if n_b == 0:
+            return
+        mean_b = float(values.mean())
+        m2_b = float(((values - mean_b) ** 2).sum())
+        n_a = self.count
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta * delta * n_a * n_b / n
+        self.count = n
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.variance))
+
+
+class VelocityMedian:
+    """Median of a velocity stream in bounded memory
+
+    The first EXACT_MEDIAN_STEPS values are buffered and give the exact
+    median. Past that the buffer is folded into counts over MEDIAN_BIN_EDGES
+    and dropped, so memory, pickled size and median() cost stay constant
+    however long the session runs. The estimate interpolates geometrically
+    inside the bin holding the median, so it is within MEDIAN_BIN_GROWTH
+    (2%) of the exact value.
+    """
+
+    __slots__ = ('count', 'values', 'bins')
+
+    def __init__(self):
+        self.count = 0
+        self.values = np.empty(64, dtype=np.float64)
+        self.bins = None
+
+    def update(self, velocities):
+        n = self.count + len(velocities)
+        if self.bins is None and n <= EXACT_MEDIAN_STEPS:
+            if n > len(self.values):
+                grown = np.empty(min(max(n, 2 * len(self.values)), EXACT_MEDIAN_STEPS), dtype=np.float64)
+                grown[:self.count] = self.values[:self.count]
+                self.values = grown
+            self.values[self.count:n] = velocities
+            self.count = n
+            return
+        if self.bins is None:
+            self.bins = np.zeros(len(MEDIAN_BIN_EDGES), dtype=np.int64)
+            self._bin(self.values[:self.count])
+            self.values = None
+        self._bin(velocities)
+        self.count = n
+
+    def _bin(self, velocities):
+        index = np.searchsorted(MEDIAN_BIN_EDGES, velocities, side='right') - 1
+        np.clip(index, 0, len(MEDIAN_BIN_EDGES) - 1, out=index)
+        self.bins += np.bincount(index, minlength=len(MEDIAN_BIN_EDGES))
+
+    def median(self):
+        if self.bins is None:
+            return float(np.median(self.values[:self.count])) if self.count else 0.0
+        cumulative = np.cumsum(self.bins)
+        target = self.count / 2
+        i = int(np.searchsorted(cumulative, target))
+        fraction = (target - (cumulative[i] - self.bins[i])) / self.bins[i]
+        return float(MEDIAN_BIN_EDGES[i] * MEDIAN_BIN_GROWTH ** fraction)
+
+    def __getstate__(self):
+        # Only the filled part of the buffer, for states pickled into the shared store
+        values = None if self.values is None else self.values[:self.count].copy()
+        return self.count, values, self.bins
+
+    def __setstate__(self, state):
+        self.count, self.values, self.bins = state
+
+
+class SessionFeatureState:
+    """Running feature statistics for one session's movement stream
+
+    Every feature matches a full recompute except velocity_median, which is
+    estimated once the session has more than EXACT_MEDIAN_STEPS steps (see
+    VelocityMedian).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.tail = np.empty((0, 2), dtype=np.float64)  # last two points, for angle deltas
+        self.velocity = RunningStats()
+        self.acceleration = RunningStats()
+        self.direction = RunningStats()
+        self.total_distance = 0.0
+        self.pause_count = 0
+        self.x_min = self.y_min = np.inf
+        self.x_max = self.y_max = -np.inf
+        self.velocity_median = VelocityMedian()
+        self.timestamps = np.empty(0, dtype=np.float64)  # last TIMESTAMP_WINDOW timestamps
+        self.last_seen = time.monotonic()
+
+    def update(self, movements, timestamps=None):
+        """Fold new points into the running statistics in O(len(movements))
+
+        Without timestamps the window restarts, since intervals across the
+        gap would be meaningless.
+        """
+        self.last_seen = time.monotonic()
+        if timestamps is None:
+            self.timestamps = self.timestamps[:0]
+        elif len(timestamps):
+            self.timestamps = np.concatenate([self.timestamps, timestamps])[-TIMESTAMP_WINDOW:]
+        new = feature_engine.to_coordinate_array(movements)
+        if len(new) == 0:
+            return
+
+        ext = np.concatenate([self.tail, new]) if len(self.tail) else new
+        distances, velocities, accelerations, direction_changes = feature_engine.movement_kinematics(ext)
+        # Steps that end on a new point; the step between the two tail points was already counted
+        if len(self.tail) == 2:
+            distances = distances[1:]
+            velocities = velocities[1:]
+
+        self.velocity.update(velocities)
+        self.acceleration.update(accelerations)
+        self.direction.update(direction_changes)
+        self.total_distance = float(np.cumsum(np.concatenate(([self.total_distance], distances)))[-1])
+        self.pause_count += int(np.count_nonzero(velocities < feature_engine.PAUSE_VELOCITY))
+        self.velocity_median.update(velocities)
+
+        self.x_min = min(self.x_min, float(new[:, 0].min()))
+        self.x_max = max(self.x_max, float(new[:, 0].max()))
+        self.y_min = min(self.y_min, float(new[:, 1].min()))
+        self.y_max = max(self.y_max, float(new[:, 1].max()))
+        self.count += len(new)
+        self.tail = ext[-2:].copy()
+
+    def features(self, click_count):
+        """Build the 18-feature vector in feature_engine.FEATURE_NAMES order"""
+        n = self.count
+        if n < 3:
+            return None
+
+        v = self.velocity
+        a = self.acceleration
+        d = self.direction
+        features = [
+            v.mean,
+            v.std,
+            v.max,
+            v.min,
+            self.velocity_median.median(),
+            v.variance,
+            a.mean,
+            a.std if a.count > 1 else 0.0,
+            d.mean if d.count else 0.0,
+            d.std if d.count > 1 else 0.0,
+            n,
+            self.total_distance,
+            click_count,
+            self.pause_count,
+            self.x_max - self.x_min,
+            self.y_max - self.y_min,
+            n / (self.total_distance + 1),
+            self.total_distance / n,
+        ]
+        return [float(f) if np.isfinite(f) else 0.0 for f in features]
+
+    def apply(self, movements, click_count, timestamps=None):
+        """Fold in new points and snapshot the features, for callers holding the state's lock"""
+        state_reset = self.count == 0
+        self.update(movements, timestamps)
+        return SessionUpdate(self.features(click_count), self.count, state_reset, self.timestamps)
+
+
+class SessionStateStore:
+    """Per-session feature states with LRU capacity and idle-time eviction"""
+
+    def __init__(self, max_sessions=10000, idle_timeout=1800, sweep_every=256):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sweep_every = sweep_every
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+        self._updates = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._states)
+
+    def __contains__(self, session_id):
+        return session_id in self._states
+
+    def update(self, session_id, movements, click_count=0, reset=False, timestamps=None):
+        """Append new movements to a session and return a SessionUpdate
+
+        The state is created on first sight; reset starts it over from these
+        movements. Features are computed before the lock is released, so a
+        concurrent call for the same session cannot fold its points in between.
+        """
+        with self._lock:
+            if reset:
+                self._states.pop(session_id, None)
+            state = self._states.get(session_id)
+            if state is None:
+                state = self._states[session_id] = SessionFeatureState()
+            else:
+                self._states.move_to_end(session_id)
+            update = state.apply(movements, click_count, timestamps)
+
+            self._updates += 1
+            if self._updates % self.sweep_every == 0:
+                self._evict_idle()
+            while len(self._states) > self.max_sessions:
+                self._states.popitem(last=False)
+                self.evictions += 1
+            return update
+
+    def discard(self, session_id):
+        with self._lock:
+            self._states.pop(session_id, None)
+
+    def evict_idle(self):
+        """Drop sessions not updated within idle_timeout seconds"""
+        with self._lock:
+            return self._evict_idle()
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        evicted = 0
+        # States are kept in least-recently-updated order, so stop at the first fresh one
+        while self._states:
+            session_id, state = next(iter(self._states.items()))
+            if state.last_seen >= cutoff:
+                break
+            del self._states[session_id]
+            evicted += 1
+        self.evictions += evicted
+        return evicted
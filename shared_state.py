@@ -0,0 +1,249 @@
+import os
+import time
+import pickle
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; multi-worker deployments there are not supported
+    fcntl = None
+
+from storage import open_connection
+from session_state import SessionFeatureState
+from detection_cadence import CadencePolicy, SessionCadence
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS shared_state (
+        namespace TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value BLOB NOT NULL,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (namespace, key)
+    ) WITHOUT ROWID
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_shared_state_updated_at ON shared_state(namespace, updated_at)',
+]
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive advisory lock on path, shared by every process that takes it"""
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class SharedStateStore:
+    """Pickled per-session state in one SQLite file that every worker process opens
+
+    Each read-modify-write runs in its own BEGIN IMMEDIATE transaction, so
+    two workers updating the same session are serialized instead of one
+    losing the other's points. Entries are stamped with wall-clock time,
+    since monotonic clocks are not comparable across processes.
+    """
+
+    def __init__(self, path, busy_timeout_ms=5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = open_connection(self.path, busy_timeout_ms=self.busy_timeout_ms)
+        return conn
+
+    def install(self, reset=False):
+        """Create the table; reset also drops every entry left by a previous run"""
+        conn = self._connection()
+        for statement in SCHEMA:
+            conn.execute(statement)
+        if reset:
+            conn.execute('DELETE FROM shared_state')
+
+    def get(self, namespace, key):
+        row = self._connection().execute(
+            'SELECT value FROM shared_state WHERE namespace = ? AND key = ?', (namespace, key)
+        ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def update(self, namespace, key, fn, default, reset=False):
+        """Apply fn to the stored value, or to default() when there is none, store it and return fn's result
+
+        reset applies fn to default() even when a value is stored, replacing it.
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = None if reset else conn.execute(
+                'SELECT value FROM shared_state WHERE namespace = ? AND key = ?', (namespace, key)
+            ).fetchone()
+            value = pickle.loads(row[0]) if row else default()
+            result = fn(value)
+            conn.execute(
+                'INSERT OR REPLACE INTO shared_state (namespace, key, value, updated_at) VALUES (?, ?, ?, ?)',
+                (namespace, key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), time.time())
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def discard(self, namespace, key):
+        self._connection().execute('DELETE FROM shared_state WHERE namespace = ? AND key = ?', (namespace, key))
+
+    def count(self, namespace):
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM shared_state WHERE namespace = ?', (namespace,)
+        ).fetchone()[0]
+
+    def evict(self, namespace, idle_timeout, max_entries):
+        """Drop entries idle for idle_timeout seconds, then the oldest beyond max_entries; returns the count"""
+        conn = self._connection()
+        evicted = conn.execute(
+            'DELETE FROM shared_state WHERE namespace = ? AND updated_at < ?', (namespace, time.time() - idle_timeout)
+        ).rowcount
+        evicted += conn.execute('''
+            DELETE FROM shared_state WHERE namespace = ? AND key IN (
+                SELECT key FROM shared_state WHERE namespace = ?
+                ORDER BY updated_at DESC LIMIT -1 OFFSET ?
+            )
+        ''', (namespace, namespace, max_entries)).rowcount
+        return evicted
+
+
+class SharedSessionStates:
+    """SessionStateStore's interface over a SharedStateStore, for multi-worker deployments"""
+
+    namespace = "features"
+
+    def __init__(self, store, max_sessions=10000, idle_timeout=1800, sweep_every=256):
+        self.store = store
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sweep_every = sweep_every
+        self._lock = threading.Lock()
+        self._updates = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return self.store.count(self.namespace)
+
+    def __contains__(self, session_id):
+        return self.store.get(self.namespace, session_id) is not None
+
+    def update(self, session_id, movements, click_count=0, reset=False, timestamps=None):
+        """Append new movements to a session and return a SessionUpdate, computed inside the transaction"""
+        update = self.store.update(self.namespace, session_id,
+                                   lambda state: state.apply(movements, click_count, timestamps),
+                                   SessionFeatureState, reset=reset)
+        with self._lock:
+            self._updates += 1
+            sweep = self._updates % self.sweep_every == 0
+        if sweep:
+            self.evict_idle()
+        return update
+
+    def discard(self, session_id):
+        self.store.discard(self.namespace, session_id)
+
+    def evict_idle(self):
+        """Drop sessions not updated within idle_timeout seconds, and the oldest beyond max_sessions"""
+        evicted = self.store.evict(self.namespace, self.idle_timeout, self.max_sessions)
+        self.evictions += evicted
+        return evicted
+
+
+class SharedModelVersion:
+    """Digest of the model pickle every worker should serve, published by whichever worker reloaded it"""
+
+    namespace = "model"
+    key = "current"
+
+    def __init__(self, store):
+        self.store = store
+
+    def publish(self, digest):
+        self.store.update(self.namespace, self.key, lambda value: value.update(digest=digest), dict)
+
+    def current(self):
+        value = self.store.get(self.namespace, self.key)
+        return value["digest"] if value else None
+
+
+class SharedCadencePolicy(CadencePolicy):
+    """CadencePolicy whose per-session schedules live in a SharedStateStore
+
+    Times are wall-clock rather than monotonic, so a schedule set by one
+    worker is honoured by the others. Accepted/deferred counts and the
+    interval histogram stay per worker.
+    """
+
+    namespace = "cadence"
+
+    def __init__(self, store, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+
+    def __len__(self):
+        return self.store.count(self.namespace)
+
+    def check(self, session_id, new_movements, now=None):
+        now = time.time() if now is None else now
+        state = self.store.get(self.namespace, session_id)
+        with self._lock:
+            return self._decide(state, new_movements, now)
+
+    def record(self, session_id, is_bot, confidence, now=None):
+        now = time.time() if now is None else now
+        load = self.load()
+        interval, min_new = self.store.update(
+            self.namespace, session_id,
+            lambda state: self._apply(state, is_bot, confidence, now, load),
+            lambda: SessionCadence(self.history)
+        )
+        with self._lock:
+            self._records += 1
+            sweep = self._records % self.sweep_every == 0
+        if sweep:
+            self.evictions += self.store.evict(self.namespace, self.idle_timeout, self.max_sessions)
+        self.intervals.observe(interval)
+        return interval, min_new
+
+    def discard(self, session_id):
+        self.store.discard(self.namespace, session_id)
+
+
+def deployment_token(workers):
+    """Identical in every worker of one deployment, different on the next start
+
+    TOUCHGUARD_DEPLOYMENT_ID wins when set. Otherwise workers spawned by
+    uvicorn or gunicorn share their master's pid, and a single process uses
+    its own.
+    """
+    token = os.environ.get("TOUCHGUARD_DEPLOYMENT_ID")
+    if token:
+        return token
+    return str(os.getppid() if workers > 1 else os.getpid())
+
+
+def claim_once(marker_path, token):
+    """True for the first caller with this token; call it while holding the file_lock"""
+    try:
+        with open(marker_path, encoding='utf-8') as f:
+            if f.read() == token:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(marker_path, 'w', encoding='utf-8') as f:
+        f.write(token)
+    return True
@@ -0,0 +1,260 @@
+import queue
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import Histogram
+
+WRITE_BATCH_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+
+# A blocked session stays blocked: a detection that was already in flight when the block
+# landed must not write its row back as active
+UPSERT_SESSION_SQL = '''
+    INSERT OR REPLACE INTO sessions
+    (session_id, created_at, user_type, confidence, movement_count, last_prediction, ip_address, user_agent, status)
+    VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, COALESCE(
+        (SELECT status FROM sessions WHERE session_id = ?1 AND status = 'blocked'), ?9
+    ))
+'''
+
+_STOP = object()
+
+# How often a caller waiting on the writer checks that it is still running, in seconds
+WRITER_CHECK_INTERVAL = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+def open_connection(db_file, journal_mode="WAL", synchronous="NORMAL", busy_timeout_ms=5000):
+    """Open a SQLite connection with the pragmas every pooled connection shares"""
+    conn = sqlite3.connect(db_file, check_same_thread=False, isolation_level=None)
+    conn.execute(f"PRAGMA journal_mode={journal_mode}")
+    conn.execute(f"PRAGMA synchronous={synchronous}")
+    conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+    # REPLACE must fire delete triggers so the dashboard counters stay exact
+    conn.execute("PRAGMA recursive_triggers=ON")
+    return conn
+
+
+class _WriteOp:
+    """Work that must run in order with the queued upserts; waits for its commit"""
+
+    __slots__ = ('fn', 'done', 'result', 'error')
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SessionStore:
+    """Pooled WAL-mode SQLite access with a write-behind batched writer
+
+    Reads borrow one of a fixed set of long-lived connections. Writes go
+    through a bounded queue drained by a single writer thread, which groups
+    pending upserts into one transaction per batch_size rows or
+    flush_interval_ms, whichever comes first. Blocks and deletes are queued
+    behind those upserts so they are applied in arrival order.
+
+    A queued write that raises is rolled back to its own savepoint and the
+    error goes to its caller. If the batch itself fails, it is retried one
+    item per transaction, so only the offending row is dropped and counted.
+    """
+
+    def __init__(self, db_file, pool_size=4, journal_mode="WAL", synchronous="NORMAL",
+                 busy_timeout_ms=5000, batch_size=256, flush_interval_ms=50, queue_max=10000):
+        self.db_file = db_file
+        self.pool_size = pool_size
+        self.pragmas = dict(journal_mode=journal_mode, synchronous=synchronous, busy_timeout_ms=busy_timeout_ms)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self._queue = queue.Queue(maxsize=queue_max)
+        self._pool = None
+        self._writer = None
+        self._writer_conn = None
+
+        self.rows_written = 0
+        self.transactions = 0
+        self.write_errors = 0
+        self.batch_retries = 0
+        self.rows_dropped = 0
+        self.batch_sizes = Histogram(WRITE_BATCH_BUCKETS)
+        self._started_at = None
+
+    def start(self):
+        self._pool = queue.Queue()
+        for _ in range(self.pool_size):
+            self._pool.put(open_connection(self.db_file, **self.pragmas))
+        self._writer_conn = open_connection(self.db_file, **self.pragmas)
+        self._started_at = time.monotonic()
+        self._writer = threading.Thread(target=self._run_writer, name="touchguard-writer", daemon=True)
+        self._writer.start()
+
+    def close(self):
+        """Flush everything still queued, then close all connections"""
+        if self._writer is not None:
+            self._queue.put(_STOP)
+            self._writer.join()
+            self._writer = None
+        if self._writer_conn is not None:
+            self._writer_conn.close()
+            self._writer_conn = None
+        if self._pool is not None:
+            while not self._pool.empty():
+                self._pool.get_nowait().close()
+            self._pool = None
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled read connection"""
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def enqueue_upsert(self, params):
+        """Queue a session upsert; blocks only when the queue is full"""
+        self._put(params)
+
+    def execute_write(self, sql, params=(), timeout=None):
+        """Run a write in order behind queued upserts and wait until it commits"""
+        return self.run_write(lambda conn: conn.execute(sql, params).rowcount, timeout)
+
+    def run_write(self, fn, timeout=None):
+        """Call fn(conn) on the writer connection inside its next transaction and wait for the commit
+
+        Raises TimeoutError when the commit has not happened within timeout
+        seconds, and RuntimeError when the writer thread is not running.
+        """
+        op = _WriteOp(fn)
+        self._put(op)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        interval = WRITER_CHECK_INTERVAL if timeout is None else min(WRITER_CHECK_INTERVAL, timeout)
+        while not op.done.wait(interval):
+            if not self.writer_alive():
+                raise RuntimeError("Database writer is not running")
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Database write not committed within {timeout}s")
+        if op.error is not None:
+            raise op.error
+        return op.result
+
+    def flush(self, timeout=None):
+        """Block until every write queued so far has been committed"""
+        self.execute_write("SELECT 1", timeout=timeout)
+
+    def writer_alive(self):
+        return self._writer is not None and self._writer.is_alive()
+
+    def _put(self, item):
+        # A full queue only drains while the writer runs, so do not wait on a dead one
+        while True:
+            try:
+                self._queue.put(item, timeout=WRITER_CHECK_INTERVAL)
+                return
+            except queue.Full:
+                if not self.writer_alive():
+                    raise RuntimeError("Database writer is not running")
+
+    def _run_writer(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            # Keep collecting until the batch is full or the flush interval runs out
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+            if stop:
+                return
+
+    def _commit(self, batch):
+        try:
+            self._apply(batch)
+        except Exception as e:
+            self._rollback()
+            self.write_errors += 1
+            if len(batch) == 1:
+                self._drop(batch[0], e)
+                return
+            logger.warning(f"⚠️ Database batch write failed ({len(batch)} rows), retrying one at a time: {e}")
+            self.batch_retries += 1
+            for item in batch:
+                try:
+                    self._apply([item])
+                except Exception as item_error:
+                    self._rollback()
+                    self.write_errors += 1
+                    self._drop(item, item_error)
+        finally:
+            for item in batch:
+                if isinstance(item, _WriteOp):
+                    item.done.set()
+
+    def _apply(self, batch):
+        """Write batch in one transaction; a failing _WriteOp only rolls back its own savepoint"""
+        conn = self._writer_conn
+        upserts = 0
+        conn.execute("BEGIN IMMEDIATE")
+        for item in batch:
+            if isinstance(item, _WriteOp):
+                item.result = item.error = None
+                conn.execute("SAVEPOINT write_op")
+                try:
+                    item.result = item.fn(conn)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_op")
+                    item.error = e
+                conn.execute("RELEASE write_op")
+            else:
+                conn.execute(UPSERT_SESSION_SQL, item)
+                upserts += 1
+        conn.execute("COMMIT")
+        self.rows_written += upserts
+        self.transactions += 1
+        self.batch_sizes.observe(len(batch))
+
+    def _rollback(self):
+        conn = self._writer_conn
+        try:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+        except sqlite3.Error as e:
+            logger.error(f"❌ Database rollback failed: {e}")
+
+    def _drop(self, item, error):
+        if isinstance(item, _WriteOp):
+            item.error = error
+            logger.error(f"❌ Database write failed: {error}")
+        else:
+            self.rows_dropped += 1
+            logger.error(f"❌ Session upsert dropped ({str(item[0])[:16]}...): {error}")
+
+    def stats(self):
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            "rows_written": self.rows_written,
+            "transactions": self.transactions,
+            "write_errors": self.write_errors,
+            "batch_retries": self.batch_retries,
+            "rows_dropped": self.rows_dropped,
+            "rows_per_second": round(self.rows_written / elapsed, 2) if elapsed else 0.0,
+            "queue_depth": self._queue.qsize(),
+            "queue_max": self._queue.maxsize,
+            "batch_size": self.batch_sizes.snapshot()
+        }
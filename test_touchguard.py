@@ -7,6 +7,9 @@ from sklearn.metrics import classification_report, confusion_matrix, accuracy_sc
 from sklearn.model_selection import cross_val_score, StratifiedKFold
 import time
 
+import feature_store
+from train import extract_session_features
+
 def test_improved_touchguard_model():
     """Complete testing suite for the improved TouchGuard model"""
     
@@ -47,89 +50,14 @@ def test_improved_touchguard_model():
         "84q2klr0foifmc69684fjvafqa": "moderate_bot"
     }
     
-    def parse_mouse_behavior(behavior_string):
-        move_pattern = r'\[m\((\d+),(\d+)\)\]'
-        moves = re.findall(move_pattern, behavior_string)
-        click_pattern = r'\[c\([lr]\)\]'
-        clicks = re.findall(click_pattern, behavior_string)
-        movements = [(int(x), int(y)) for x, y in moves]
-        click_count = len(clicks)
-        return movements, click_count
-    
-    def extract_features_from_movements(movements, click_count):
-        if len(movements) < 3:
-            return None
-        
-        x_coords = [m[0] for m in movements]
-        y_coords = [m[1] for m in movements]
-        
-        velocities = []
-        accelerations = []
-        direction_changes = []
-        distances = []
-        pauses = []
-        
-        for i in range(1, len(movements)):
-            dx = x_coords[i] - x_coords[i-1]
-            dy = y_coords[i] - y_coords[i-1]
-            distance = np.sqrt(dx**2 + dy**2)
-            distances.append(distance)
-            velocity = distance
-            velocities.append(velocity)
-            
-            if velocity < 2:
-                pauses.append(1)
-            
-            if i > 1:
-                acceleration = velocities[-1] - velocities[-2]
-                accelerations.append(acceleration)
-            
-            if i > 1 and distance > 0:
-                prev_dx = x_coords[i-1] - x_coords[i-2]
-                prev_dy = y_coords[i-1] - y_coords[i-2]
-                if prev_dx != 0 or prev_dy != 0:
-                    angle_current = np.arctan2(dy, dx)
-                    angle_prev = np.arctan2(prev_dy, prev_dx)
-                    angle_diff = abs(angle_current - angle_prev)
-                    if angle_diff > np.pi:
-                        angle_diff = 2*np.pi - angle_diff
-                    direction_changes.append(angle_diff)
-        
-        # Match the 18 features from improved model
-        features = [
-            np.mean(velocities) if velocities else 0,                    # velocity_mean
-            np.std(velocities) if len(velocities) > 1 else 0,           # velocity_std
-            np.max(velocities) if velocities else 0,                    # velocity_max
-            np.min(velocities) if velocities else 0,                    # velocity_min
-            np.median(velocities) if velocities else 0,                 # velocity_median
-            np.mean(accelerations) if accelerations else 0,             # acceleration_mean
-            np.std(accelerations) if len(accelerations) > 1 else 0,     # acceleration_std
-            np.mean(direction_changes) if direction_changes else 0,      # direction_mean
-            np.std(direction_changes) if len(direction_changes) > 1 else 0, # direction_std
-            len(movements),                                              # total_points
-            sum(distances),                                              # total_distance
-            click_count,                                                 # click_count
-            len(pauses),                                                 # pause_count
-            np.max(x_coords) - np.min(x_coords) if x_coords else 0,     # x_range
-            np.max(y_coords) - np.min(y_coords) if y_coords else 0,     # y_range
-            len(movements) / (sum(distances) + 1),                      # movement_efficiency
-            np.var(velocities) if len(velocities) > 1 else 0,          # velocity_variance
-            sum(distances) / len(movements) if movements else 0         # avg_step_size
-        ]
-        
-        return features
-    
-    # Load test data from known annotations
+    # Load test data from known annotations; features come from train.py's extractor via the feature cache
     def load_test_data():
         search_folders = [
             os.path.join(base_path, "phase1", "data", "mouse_movements", "humans_and_moderate_bots"),
             os.path.join(base_path, "phase1", "data", "mouse_movements", "humans_and_advanced_bots")
         ]
         
-        features_list = []
-        labels_list = []
-        session_ids = []
-        
+        candidates = []
         for search_folder in search_folders:
             if not os.path.exists(search_folder):
                 continue
@@ -138,24 +66,15 @@ def test_improved_touchguard_model():
                 json_file = os.path.join(search_folder, session_id, "mouse_movements.json")
                 
                 if os.path.exists(json_file):
-                    try:
-                        with open(json_file, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                        
-                        behavior = data.get('total_behaviour', '')
-                        if behavior:
-                            movements, click_count = parse_mouse_behavior(behavior)
-                            
-                            if movements and len(movements) >= 3:
-                                features = extract_features_from_movements(movements, click_count)
-                                
-                                if features and len(features) == 18:
-                                    features_list.append(features)
-                                    # Convert to binary labels
-                                    labels_list.append(0 if label == "human" else 1)
-                                    session_ids.append(session_id)
-                    except:
-                        continue
+                    candidates.append((session_id, label, json_file))
+        
+        columns = extract_session_features([json_file for _, _, json_file in candidates])
+        usable = (columns["status"] == feature_store.STATUS_OK) & (columns["behaviour_length"] > 0)
+        
+        features_list = columns["features"][usable]
+        # Convert to binary labels
+        labels_list = [0 if label == "human" else 1 for (_, label, _), ok in zip(candidates, usable) if ok]
+        session_ids = [session_id for (session_id, _, _), ok in zip(candidates, usable) if ok]
         
         return np.array(features_list), np.array(labels_list), session_ids
     
@@ -212,9 +131,7 @@ def test_improved_touchguard_model():
         os.path.join(base_path, "phase1", "data", "mouse_movements", "humans_and_advanced_bots")
     ]
     
-    all_features = []
-    all_labels = []
-    
+    candidates = []
     for search_folder in search_folders:
         if not os.path.exists(search_folder):
             continue
@@ -222,33 +139,23 @@ def test_improved_touchguard_model():
         session_folders = [f for f in os.listdir(search_folder) 
                           if os.path.isdir(os.path.join(search_folder, f))][:30]  # Limit for testing
         
-        for session_id in session_folders:
-            json_file = os.path.join(search_folder, session_id, "mouse_movements.json")
-            
-            if os.path.exists(json_file):
-                try:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    
-                    behavior = data.get('total_behaviour', '')
-                    if behavior:
-                        movements, click_count = parse_mouse_behavior(behavior)
-                        
-                        if movements and len(movements) >= 3:
-                            features = extract_features_from_movements(movements, click_count)
-                            
-                            if features and len(features) == 18:
-                                all_features.append(features)
-                                # Use simple heuristic for labeling
-                                if session_id in test_annotations:
-                                    all_labels.append(0 if test_annotations[session_id] == "human" else 1)
-                                else:
-                                    # Simple heuristic based on behavioral patterns
-                                    velocity_std = features[1]
-                                    pause_count = features[12]
-                                    all_labels.append(0 if velocity_std > 10 and pause_count > 2 else 1)
-                except:
-                    continue
+        candidates.extend((session_id, os.path.join(search_folder, session_id, "mouse_movements.json"))
+                          for session_id in session_folders)
+    
+    columns = extract_session_features([json_file for _, json_file in candidates])
+    usable = (columns["status"] == feature_store.STATUS_OK) & (columns["behaviour_length"] > 0)
+    
+    all_features = columns["features"][usable]
+    all_labels = []
+    for (session_id, _), features in zip((c for c, ok in zip(candidates, usable) if ok), all_features):
+        # Use simple heuristic for labeling
+        if session_id in test_annotations:
+            all_labels.append(0 if test_annotations[session_id] == "human" else 1)
+        else:
+            # Simple heuristic based on behavioral patterns
+            velocity_std = features[1]
+            pause_count = features[12]
+            all_labels.append(0 if velocity_std > 10 and pause_count > 2 else 1)
     
     if len(all_features) > 10:
         X_cv = np.array(all_features)
@@ -1,131 +1,244 @@
-import pandas as pd
 import numpy as np
 import json
 import os
-import re
+import time
+import argparse
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split, cross_val_score, StratifiedKFold
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 import pickle
 
-def load_all_touchguard_data():
-    """Load ALL available mouse movement files from Phase 1 with proper labeling"""
-    
-    base_path = r"C:\Users\Santhosh kumar P\OneDrive\Desktop\Advanced Bot Detection\web_bot_detection_dataset"
-    
-    # Complete annotation mapping (your original annotations + folder-based labeling)
-    known_annotations = {
-        # Test data
-        "g2gh9qmk9krld14h5uojlg7g10": "human", "kaodsjbnqm7umgfvao63d3rihb": "human",
-        "1aqgqrcuurlmvvbbpirvsh7e53": "human", "igbeqcjnbst8afmoi4sg6tn669": "human",
-        "vopb1c4o3o2dpsov8jinbbou5h": "human", "mlrcehe439iiene6e485tni66i": "human",
-        "ss0e28413uif2hd88q186t7tj8": "human", "i49goovgc8d214dbipv8o6504l": "human",
-        "8ikvavmgf5jc51c5goirm6gd5i": "human", "euj4q1fvb0h7sgca0ngnkb88gs": "human",
-        "0oa2dua3mli7mrr32c0gd4o0i2": "human", "nkoa2dl20gbqn2vrse8rol2vr6": "human",
-        "7jbhkuigmbeo5m7ei6h4eefrmk": "human", "ognvhdn35j9b11cnclf6ej5gsj": "human",
-        "dpo8vpnhg6ca53pj9di78t9513": "human",
-        "vtcjrbtjq57mnai4banl61pd25": "advanced_bot", "071tbv7fsev5d64kb0f9jieor6": "advanced_bot",
-        "6ntd0tthl2oaq1l21tho6bflst": "advanced_bot", "imgld2d8lq8ugjvfur481ofr2n": "advanced_bot",
-        "htodnmm7tjpihgeuqk64c0gjes": "advanced_bot", "0i5kvpslrq3vb6u8ff2kuejv0v": "advanced_bot",
-        "69pb8jcum0600139r70m1aqbrf": "advanced_bot", "656v65u3buefq447rk141pj08c": "advanced_bot",
-        "q80o426gl01opbf2ve05c36c4u": "advanced_bot", "j732r4nonn5d5q37e9u2g9hr11": "advanced_bot",
-        
-        # Train set 1 - moderate bots
-        "jfmilo33fin84baeh3k6bcnh3v": "moderate_bot", "6gftqgk6qqkipsecbrvk0mtr5h": "moderate_bot",
-        "84q2klr0foifmc69684fjvafqa": "moderate_bot", "scep2a1a2l1tjoc5dqlche5mqq": "moderate_bot",
-        "qg5jilensjo45f7koo4cvrouqn": "moderate_bot", "kd4h7t2e50hpl0uv1pdbcsoe4n": "moderate_bot",
-        "sjr20ddno9sftolk2ofmqoskmf": "moderate_bot", "5hv5h86d5hnph965gtsjskmtu0": "moderate_bot",
-        
-        # Train set 2 - humans  
-        "dr09rk5eagjuu87gedvdqmq3gl": "human", "gq715ms79515gcq39vf91mli6t": "human",
-        "hrbko2t4t14q3pahqltndlolb5": "human", "nvmlnfhs5v6hehsd81e9mf75cn": "human",
-        "brrlh9tmiodt2ekkjvn7kcsps0": "human", "s74076j0vtua7ct0fkej7ehmt8": "human",
-        
-        # Train set 2 - advanced bots
-        "3uqepgd76f9ecnauehcl4sucbh": "advanced_bot", "ck0vis16184tm6572eohin19d2": "advanced_bot",
-        "pf7tnis955pq27n6sibk32d87k": "advanced_bot", "1ttvuqau08dh4t1cjg50pr2298": "advanced_bot",
-        
-        # Train set 2 - moderate bots
-        "7onurvslijk8fm97iohvhcoq52": "moderate_bot", "dplgo3sid3ccoh1p28kt7oal82": "moderate_bot",
-        "t8f9bu34vogoj5kisdk61hp83n": "moderate_bot", "lbpk1okd4btot9vqfjpsv2vl9n": "moderate_bot"
-    }
-    
-    def parse_mouse_behavior(behavior_string):
-        """Parse mouse behavior string"""
-        move_pattern = r'\[m\((\d+),(\d+)\)\]'
-        moves = re.findall(move_pattern, behavior_string)
-        click_pattern = r'\[c\([lr]\)\]'
-        clicks = re.findall(click_pattern, behavior_string)
-        movements = [(int(x), int(y)) for x, y in moves]
-        click_count = len(clicks)
-        return movements, click_count
-    
-    def extract_features_from_movements(movements, click_count):
-        """Extract comprehensive behavioral features"""
-        if len(movements) < 3:
-            return None
-        
-        x_coords = [m[0] for m in movements]
-        y_coords = [m[1] for m in movements]
+import behaviour_tokenizer
+import feature_store
+import model_variants
+import param_search
+
+BASE_PATH = r"C:\Users\Santhosh kumar P\OneDrive\Desktop\Advanced Bot Detection\web_bot_detection_dataset"
+
+# Complete annotation mapping (your original annotations + folder-based labeling)
+KNOWN_ANNOTATIONS = {
+    # Test data
+    "g2gh9qmk9krld14h5uojlg7g10": "human", "kaodsjbnqm7umgfvao63d3rihb": "human",
+    "1aqgqrcuurlmvvbbpirvsh7e53": "human", "igbeqcjnbst8afmoi4sg6tn669": "human",
+    "vopb1c4o3o2dpsov8jinbbou5h": "human", "mlrcehe439iiene6e485tni66i": "human",
+    "ss0e28413uif2hd88q186t7tj8": "human", "i49goovgc8d214dbipv8o6504l": "human",
+    "8ikvavmgf5jc51c5goirm6gd5i": "human", "euj4q1fvb0h7sgca0ngnkb88gs": "human",
+    "0oa2dua3mli7mrr32c0gd4o0i2": "human", "nkoa2dl20gbqn2vrse8rol2vr6": "human",
+    "7jbhkuigmbeo5m7ei6h4eefrmk": "human", "ognvhdn35j9b11cnclf6ej5gsj": "human",
+    "dpo8vpnhg6ca53pj9di78t9513": "human",
+    "vtcjrbtjq57mnai4banl61pd25": "advanced_bot", "071tbv7fsev5d64kb0f9jieor6": "advanced_bot",
+    "6ntd0tthl2oaq1l21tho6bflst": "advanced_bot", "imgld2d8lq8ugjvfur481ofr2n": "advanced_bot",
+    "htodnmm7tjpihgeuqk64c0gjes": "advanced_bot", "0i5kvpslrq3vb6u8ff2kuejv0v": "advanced_bot",
+    "69pb8jcum0600139r70m1aqbrf": "advanced_bot", "656v65u3buefq447rk141pj08c": "advanced_bot",
+    "q80o426gl01opbf2ve05c36c4u": "advanced_bot", "j732r4nonn5d5q37e9u2g9hr11": "advanced_bot",
+    
+    # Train set 1 - moderate bots
+    "jfmilo33fin84baeh3k6bcnh3v": "moderate_bot", "6gftqgk6qqkipsecbrvk0mtr5h": "moderate_bot",
+    "84q2klr0foifmc69684fjvafqa": "moderate_bot", "scep2a1a2l1tjoc5dqlche5mqq": "moderate_bot",
+    "qg5jilensjo45f7koo4cvrouqn": "moderate_bot", "kd4h7t2e50hpl0uv1pdbcsoe4n": "moderate_bot",
+    "sjr20ddno9sftolk2ofmqoskmf": "moderate_bot", "5hv5h86d5hnph965gtsjskmtu0": "moderate_bot",
+    
+    # Train set 2 - humans  
+    "dr09rk5eagjuu87gedvdqmq3gl": "human", "gq715ms79515gcq39vf91mli6t": "human",
+    "hrbko2t4t14q3pahqltndlolb5": "human", "nvmlnfhs5v6hehsd81e9mf75cn": "human",
+    "brrlh9tmiodt2ekkjvn7kcsps0": "human", "s74076j0vtua7ct0fkej7ehmt8": "human",
+    
+    # Train set 2 - advanced bots
+    "3uqepgd76f9ecnauehcl4sucbh": "advanced_bot", "ck0vis16184tm6572eohin19d2": "advanced_bot",
+    "pf7tnis955pq27n6sibk32d87k": "advanced_bot", "1ttvuqau08dh4t1cjg50pr2298": "advanced_bot",
+    
+    # Train set 2 - moderate bots
+    "7onurvslijk8fm97iohvhcoq52": "moderate_bot", "dplgo3sid3ccoh1p28kt7oal82": "moderate_bot",
+    "t8f9bu34vogoj5kisdk61hp83n": "moderate_bot", "lbpk1okd4btot9vqfjpsv2vl9n": "moderate_bot"
+}
+
+# Sessions handed to a worker process at a time
+INGEST_CHUNK_SIZE = 64
+
+# Extracted features are cached here between runs; None disables the cache
+FEATURE_CACHE_DIR = os.environ.get("TOUCHGUARD_FEATURE_CACHE", ".feature_cache")
+
+# Improved Random Forest with regularization
+RF_PARAMS = dict(
+    n_estimators=75,              # Moderate number of trees
+    max_depth=10,                 # Limit depth to prevent overfitting
+    min_samples_split=15,         # Require more samples to split
+    min_samples_leaf=8,           # Require more samples in leaf
+    max_features='sqrt',          # Limit features per tree
+    bootstrap=True,               # Use bootstrapping
+    oob_score=True,              # Out-of-bag validation
+    class_weight='balanced',      # Handle class imbalance
+    random_state=42
+)
+
+MODEL_OUTPUT_PATH = "touchguard_improved_bot_detector.pkl"
+VARIANTS_REPORT_PATH = "model_variants.json"
+
+def parse_mouse_behavior(behavior_string):
+    """Parse mouse behavior string"""
+    tokens = behaviour_tokenizer.tokenize(behavior_string)
+    return tokens.coords.tolist(), len(tokens.click_positions)
+
+def extract_features_from_movements(movements, click_count):
+    """Extract comprehensive behavioral features"""
+    if len(movements) < 3:
+        return None
+    
+    x_coords = [m[0] for m in movements]
+    y_coords = [m[1] for m in movements]
+    
+    velocities = []
+    accelerations = []
+    direction_changes = []
+    distances = []
+    pauses = []
+    
+    for i in range(1, len(movements)):
+        dx = x_coords[i] - x_coords[i-1]
+        dy = y_coords[i] - y_coords[i-1]
+        distance = np.sqrt(dx**2 + dy**2)
+        distances.append(distance)
+        velocity = distance
+        velocities.append(velocity)
         
-        velocities = []
-        accelerations = []
-        direction_changes = []
-        distances = []
-        pauses = []
+        # Pauses (very small movements)
+        if velocity < 2:
+            pauses.append(1)
         
-        for i in range(1, len(movements)):
-            dx = x_coords[i] - x_coords[i-1]
-            dy = y_coords[i] - y_coords[i-1]
-            distance = np.sqrt(dx**2 + dy**2)
-            distances.append(distance)
-            velocity = distance
-            velocities.append(velocity)
-            
-            # Pauses (very small movements)
-            if velocity < 2:
-                pauses.append(1)
-            
-            # Acceleration
-            if i > 1:
-                acceleration = velocities[-1] - velocities[-2]
-                accelerations.append(acceleration)
-            
-            # Direction changes
-            if i > 1 and distance > 0:
-                prev_dx = x_coords[i-1] - x_coords[i-2]
-                prev_dy = y_coords[i-1] - y_coords[i-2]
-                if prev_dx != 0 or prev_dy != 0:
-                    angle_current = np.arctan2(dy, dx)
-                    angle_prev = np.arctan2(prev_dy, prev_dx)
-                    angle_diff = abs(angle_current - angle_prev)
-                    if angle_diff > np.pi:
-                        angle_diff = 2*np.pi - angle_diff
-                    direction_changes.append(angle_diff)
+        # Acceleration
+        if i > 1:
+            acceleration = velocities[-1] - velocities[-2]
+            accelerations.append(acceleration)
         
-        # Comprehensive feature set
-        features = [
-            np.mean(velocities) if velocities else 0,                    # velocity_mean
-            np.std(velocities) if len(velocities) > 1 else 0,           # velocity_std
-            np.max(velocities) if velocities else 0,                    # velocity_max
-            np.min(velocities) if velocities else 0,                    # velocity_min
-            np.median(velocities) if velocities else 0,                 # velocity_median
-            np.mean(accelerations) if accelerations else 0,             # acceleration_mean
-            np.std(accelerations) if len(accelerations) > 1 else 0,     # acceleration_std
-            np.mean(direction_changes) if direction_changes else 0,      # direction_mean
-            np.std(direction_changes) if len(direction_changes) > 1 else 0, # direction_std
-            len(movements),                                              # total_points
-            sum(distances),                                              # total_distance
-            click_count,                                                 # click_count
-            len(pauses),                                                 # pause_count
-            np.max(x_coords) - np.min(x_coords) if x_coords else 0,     # x_range
-            np.max(y_coords) - np.min(y_coords) if y_coords else 0,     # y_range
-            len(movements) / (sum(distances) + 1),                      # movement_efficiency
-            np.var(velocities) if len(velocities) > 1 else 0,          # velocity_variance
-            sum(distances) / len(movements) if movements else 0         # avg_step_size
-        ]
+        # Direction changes
+        if i > 1 and distance > 0:
+            prev_dx = x_coords[i-1] - x_coords[i-2]
+            prev_dy = y_coords[i-1] - y_coords[i-2]
+            if prev_dx != 0 or prev_dy != 0:
+                angle_current = np.arctan2(dy, dx)
+                angle_prev = np.arctan2(prev_dy, prev_dx)
+                angle_diff = abs(angle_current - angle_prev)
+                if angle_diff > np.pi:
+                    angle_diff = 2*np.pi - angle_diff
+                direction_changes.append(angle_diff)
+    
+    # Comprehensive feature set
+    features = [
+        np.mean(velocities) if velocities else 0,                    # velocity_mean
+        np.std(velocities) if len(velocities) > 1 else 0,           # velocity_std
+        np.max(velocities) if velocities else 0,                    # velocity_max
+        np.min(velocities) if velocities else 0,                    # velocity_min
+        np.median(velocities) if velocities else 0,                 # velocity_median
+        np.mean(accelerations) if accelerations else 0,             # acceleration_mean
+        np.std(accelerations) if len(accelerations) > 1 else 0,     # acceleration_std
+        np.mean(direction_changes) if direction_changes else 0,      # direction_mean
+        np.std(direction_changes) if len(direction_changes) > 1 else 0, # direction_std
+        len(movements),                                              # total_points
+        sum(distances),                                              # total_distance
+        click_count,                                                 # click_count
+        len(pauses),                                                 # pause_count
+        np.max(x_coords) - np.min(x_coords) if x_coords else 0,     # x_range
+        np.max(y_coords) - np.min(y_coords) if y_coords else 0,     # y_range
+        len(movements) / (sum(distances) + 1),                      # movement_efficiency
+        np.var(velocities) if len(velocities) > 1 else 0,          # velocity_variance
+        sum(distances) / len(movements) if movements else 0         # avg_step_size
+    ]
+    
+    return features
+
+# Cached features are invalidated whenever the parser or extractor source changes
+FEATURE_EXTRACTOR_VERSION = feature_store.code_version(behaviour_tokenizer, parse_mouse_behavior,
+                                                       extract_features_from_movements)
+
+def load_session_record(json_file):
+    """Worker entry point for one session file: content digest, stat and extracted features"""
+    return feature_store.read_session_record(json_file, parse_mouse_behavior, extract_features_from_movements)
+
+def load_session_chunk(chunk):
+    """Worker entry point: (row index, SessionRecord) for each (row index, json file) in chunk"""
+    return [(index, load_session_record(json_file)) for index, json_file in chunk]
+
+def label_session(session_id, folder_name, features):
+    """Smart labeling strategy: known annotations first, then folder-based heuristics"""
+    if session_id in KNOWN_ANNOTATIONS:
+        # Use known annotations
+        return 0 if KNOWN_ANNOTATIONS[session_id] == 'human' else 1
+    
+    # Use folder-based heuristics + behavioral analysis
+    if folder_name == "humans_and_moderate_bots":
+        # Analyze behavioral patterns to guess
+        pause_ratio = features[12] / max(features[9], 1)
         
-        return features
+        # Heuristic: humans have more varied patterns
+        if features[1] > 10 and pause_ratio > 0.1:  # High velocity std and pauses
+            return 0  # Human
+        return 1  # Bot
+    
+    # humans_and_advanced_bots folder
+    # Advanced bots are harder to detect, use more complex heuristics
+    movement_efficiency = features[15]
+    velocity_variance = features[16]
+    
+    if velocity_variance > 100 and movement_efficiency < 0.5:
+        return 0  # Human
+    return 1  # Bot
+
+def iter_session_chunks(tasks, chunk_size, workers):
+    """Yield load_session_chunk results, from a process pool when workers > 1"""
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield load_session_chunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(load_session_chunk, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            yield future.result()
+
+def extract_session_features(json_files, workers=1, chunk_size=INGEST_CHUNK_SIZE, cache_dir=FEATURE_CACHE_DIR):
+    """Feature store columns (features, status, points, behaviour_length) aligned with json_files
+    
+    Files already in the feature cache with the same size and mtime are
+    read back from it; the rest are parsed in chunks on a process pool
+    (workers=1 runs in-process) and added to the cache.
+    """
+    store = feature_store.FeatureStore(cache_dir, FEATURE_EXTRACTOR_VERSION)
+    rows = np.full(len(json_files), -1, dtype=np.int64)
+    tasks = []
+    for index, json_file in enumerate(json_files):
+        row = store.lookup(json_file)
+        if row is None:
+            tasks.append((index, json_file))
+        else:
+            rows[index] = row
+    if cache_dir:
+        print(f"Feature cache: {len(json_files) - len(tasks)} sessions cached, {len(tasks)} to extract")
+    
+    start = time.perf_counter()
+    done = 0
+    for chunk_number, results in enumerate(iter_session_chunks(tasks, chunk_size, workers), 1):
+        for index, record in results:
+            rows[index] = store.add(json_files[index], record)
+        done += len(results)
+        if chunk_number % 10 == 0 or done == len(tasks):
+            elapsed = time.perf_counter() - start
+            print(f"Processed {done}/{len(tasks)} sessions ({done / max(elapsed, 1e-9):.0f} sessions/s)")
+    
+    store.save()
+    return store.take(rows)
+
+def load_all_touchguard_data(base_path=BASE_PATH, workers=None, chunk_size=INGEST_CHUNK_SIZE,
+                             cache_dir=FEATURE_CACHE_DIR):
+    """Load ALL available mouse movement files from Phase 1 with proper labeling
+    
+    Session files are parsed in chunks on a process pool (workers=1 runs
+    in-process), with unchanged sessions read back from the feature cache.
+    Rows keep their position in the folder listing, so the result matches
+    a one-by-one serial load.
+    """
+    workers = workers or os.cpu_count() or 1
     
     # Load ALL files from both folders
     search_folders = [
@@ -133,10 +246,8 @@ def load_all_touchguard_data():
         ("humans_and_advanced_bots", os.path.join(base_path, "phase1", "data", "mouse_movements", "humans_and_advanced_bots"))
     ]
     
-    features_list = []
-    labels_list = []
-    session_info = []
-    
+    # One task per session folder, in the order the serial loader visits them
+    sessions = []
     for folder_name, search_folder in search_folders:
         if not os.path.exists(search_folder):
             print(f"Warning: Folder not found: {search_folder}")
@@ -149,66 +260,26 @@ def load_all_touchguard_data():
                           if os.path.isdir(os.path.join(search_folder, f))]
         
         print(f"Found {len(session_folders)} session folders in {folder_name}")
-        
-        loaded_count = 0
-        for session_id in session_folders:
-            json_file = os.path.join(search_folder, session_id, "mouse_movements.json")
-            
-            if os.path.exists(json_file):
-                try:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    
-                    behavior = data.get('total_behaviour', '')
-                    if behavior and len(behavior) > 50:  # Ensure meaningful data
-                        movements, click_count = parse_mouse_behavior(behavior)
-                        
-                        if movements and len(movements) >= 5:  # Minimum movement threshold
-                            features = extract_features_from_movements(movements, click_count)
-                            
-                            if features and len(features) == 18:
-                                features_list.append(features)
-                                
-                                # Smart labeling strategy
-                                if session_id in known_annotations:
-                                    # Use known annotations
-                                    label = 0 if known_annotations[session_id] == 'human' else 1
-                                else:
-                                    # Use folder-based heuristics + behavioral analysis
-                                    if folder_name == "humans_and_moderate_bots":
-                                        # Analyze behavioral patterns to guess
-                                        avg_velocity = np.mean([f for f in features[:5] if f > 0])
-                                        pause_ratio = features[12] / max(features[9], 1)
-                                        
-                                        # Heuristic: humans have more varied patterns
-                                        if features[1] > 10 and pause_ratio > 0.1:  # High velocity std and pauses
-                                            label = 0  # Human
-                                        else:
-                                            label = 1  # Bot
-                                    else:  # humans_and_advanced_bots folder
-                                        # Advanced bots are harder to detect, use more complex heuristics
-                                        movement_efficiency = features[15]
-                                        velocity_variance = features[16]
-                                        
-                                        if velocity_variance > 100 and movement_efficiency < 0.5:
-                                            label = 0  # Human
-                                        else:
-                                            label = 1  # Bot
-                                
-                                labels_list.append(label)
-                                session_info.append((session_id, folder_name))
-                                loaded_count += 1
-                                
-                                if loaded_count % 50 == 0:
-                                    print(f"Loaded {loaded_count} sessions from {folder_name}...")
-                
-                except Exception as e:
-                    continue
-        
-        print(f"Successfully loaded {loaded_count} sessions from {folder_name}")
+        sessions.extend((session_id, folder_name, os.path.join(search_folder, session_id, "mouse_movements.json"))
+                        for session_id in session_folders)
+    
+    print(f"Extracting features from {len(sessions)} sessions with {workers} worker(s)...")
+    columns = extract_session_features([json_file for _, _, json_file in sessions], workers, chunk_size,
+                                       cache_dir)
     
-    X = np.array(features_list)
-    y = np.array(labels_list)
+    # Same filters as before: meaningful behaviour string, enough movements, 18 features
+    loaded = ((columns["status"] == feature_store.STATUS_OK) & (columns["behaviour_length"] > 50)
+              & (columns["points"] >= 5))
+    kept = [session for session, ok in zip(sessions, loaded) if ok]
+    X = columns["features"][loaded]
+    y = np.array([label_session(session_id, folder_name, features)
+                  for (session_id, folder_name, _), features in zip(kept, X)])
+    session_info = [(session_id, folder_name) for session_id, folder_name, _ in kept]
+    
+    for folder_name, _ in search_folders:
+        loaded_count = sum(1 for _, name in session_info if name == folder_name)
+        if loaded_count:
+            print(f"Successfully loaded {loaded_count} sessions from {folder_name}")
     
     print(f"\nFinal Dataset Summary:")
     print(f"Total samples: {len(X)}")
@@ -218,15 +289,21 @@ def load_all_touchguard_data():
     
     return X, y, session_info
 
-def train_improved_touchguard_model():
-    """Train improved TouchGuard model with regularization to prevent overfitting"""
+def train_improved_touchguard_model(base_path=BASE_PATH, workers=None, cache_dir=FEATURE_CACHE_DIR, search=False,
+                                    search_baseline=False):
+    """Train improved TouchGuard model with regularization to prevent overfitting
+    
+    With search, n_estimators, max_depth, min_samples_leaf and max_features
+    are first chosen by cross-validated search on the training split.
+    """
+    workers = workers or os.cpu_count() or 1
     
     print("Improved TouchGuard Bot Detection Training")
     print("="*60)
     
     # Load ALL available data
     print("Loading ALL Phase 1 mouse movement files...")
-    X, y, session_info = load_all_touchguard_data()
+    X, y, session_info = load_all_touchguard_data(base_path, workers, cache_dir=cache_dir)
     
     if len(X) == 0:
         print("ERROR: No data loaded!")
@@ -241,25 +318,30 @@ def train_improved_touchguard_model():
     print(f"Training: {len(X_train)} samples (Humans: {sum(y_train == 0)}, Bots: {sum(y_train == 1)})")
     print(f"Testing: {len(X_test)} samples (Humans: {sum(y_test == 0)}, Bots: {sum(y_test == 1)})")
     
+    params = RF_PARAMS
+    if search:
+        print(f"\nSearching hyperparameters with {workers} worker(s)...")
+        result = param_search.search(X_train, y_train, RF_PARAMS, workers=workers)
+        baseline_seconds = None
+        if search_baseline:
+            print(f"Timing GridSearchCV over the same grid with {workers} job(s)...")
+            _, baseline_seconds = param_search.grid_search(X_train, y_train, RF_PARAMS, workers=workers)
+        print("\n".join(param_search.format_report(result, baseline_seconds=baseline_seconds)))
+        params = {**RF_PARAMS, **result["best_params"]}
+        speedup = (f", {baseline_seconds / result['wall_seconds']:.2f}x faster than GridSearchCV"
+                   if baseline_seconds else "")
+        print(f"Chosen: {result['best_params']} (CV accuracy {result['best_accuracy']:.2%}, "
+              f"found in {result['wall_seconds']:.2f}s{speedup})")
+    
     # Improved Random Forest with regularization
     print("\nTraining improved Random Forest with regularization...")
-    rf_model = RandomForestClassifier(
-        n_estimators=75,              # Moderate number of trees
-        max_depth=10,                 # Limit depth to prevent overfitting
-        min_samples_split=15,         # Require more samples to split
-        min_samples_leaf=8,           # Require more samples in leaf
-        max_features='sqrt',          # Limit features per tree
-        bootstrap=True,               # Use bootstrapping
-        oob_score=True,              # Out-of-bag validation
-        class_weight='balanced',      # Handle class imbalance
-        random_state=42
-    )
+    rf_model = RandomForestClassifier(**params)
     
     rf_model.fit(X_train, y_train)
     
     # Cross-validation during training
     print("Performing cross-validation...")
-    cv_scores = cross_val_score(rf_model, X_train, y_train, cv=5, scoring='accuracy')
+    cv_scores = cross_val_score(rf_model, X_train, y_train, cv=5, scoring='accuracy', n_jobs=min(workers, 5))
     print(f"Cross-validation scores: {cv_scores}")
     print(f"Mean CV accuracy: {cv_scores.mean():.3f} (+/- {cv_scores.std() * 2:.3f})")
     
@@ -312,15 +394,96 @@ def train_improved_touchguard_model():
         print(f"{i+1:2d}. {name:20s}: {importance:.4f}")
     
     # Save improved model
-    model_path = "touchguard_improved_bot_detector.pkl"
-    with open(model_path, 'wb') as f:
+    with open(MODEL_OUTPUT_PATH, 'wb') as f:
         pickle.dump(rf_model, f)
-    print(f"\nImproved model saved: {model_path}")
+    print(f"\nImproved model saved: {MODEL_OUTPUT_PATH}")
     
     return rf_model, test_accuracy
 
+def train_model_variants(base_path=BASE_PATH, workers=None, cache_dir=FEATURE_CACHE_DIR, latency_budget_ms=None,
+                         report_path=VARIANTS_REPORT_PATH):
+    """Train shrunk, pruned and distilled forests and profile each at float64 and float32
+    
+    Every variant is compiled as the app serves it and timed for single-row
+    and batch inference on the held-out split. Writes the profiles to
+    report_path; with a latency budget, the most accurate variant whose p95
+    single-row latency fits is saved as the production model, and the report
+    records its digest and precision so the app serves it as profiled.
+    """
+    print("TouchGuard Model Variants")
+    print("="*60)
+    X, y, session_info = load_all_touchguard_data(base_path, workers, cache_dir=cache_dir)
+    if len(X) == 0:
+        print("ERROR: No data loaded!")
+        return None, None
+    
+    # Same split as train_improved_touchguard_model, so accuracies are comparable
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.25, random_state=42, stratify=y
+    )
+    
+    print(f"\nTraining variants on {len(X_train)} samples...")
+    candidates = model_variants.build_candidates(X_train, y_train, RF_PARAMS)
+    print(f"Profiling {len(candidates)} forests on {len(X_test)} held-out samples...")
+    profiles = model_variants.mark_pareto(model_variants.profile_candidates(candidates, X_test, y_test))
+    selected = (model_variants.select_for_budget(profiles, latency_budget_ms)
+                if latency_budget_ms is not None else None)
+    
+    print("\n" + "\n".join(model_variants.format_report(profiles, selected)))
+    print("\n* Pareto front on p95 single-row latency and accuracy")
+    
+    chosen = None
+    model_digest = None
+    if selected is not None:
+        chosen = next(c for c in candidates if c.name == selected["candidate"])
+        with open(MODEL_OUTPUT_PATH, 'wb') as f:
+            pickle.dump(chosen.forest, f)
+        with open(MODEL_OUTPUT_PATH, 'rb') as f:
+            model_digest = hashlib.sha256(f.read()).hexdigest()
+    
+    # The app reads selected_precision back for the pickle whose digest matches
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump({"latency_budget_ms": latency_budget_ms, "selected": selected and selected["name"],
+                   "selected_precision": selected and selected["precision"], "model_digest": model_digest,
+                   "variants": profiles}, f, indent=2)
+    print(f"Variant report saved: {report_path}")
+    
+    if chosen is None:
+        if latency_budget_ms is not None:
+            print(f"\n❌ No variant fits a {latency_budget_ms} ms budget; production model left unchanged")
+        return None, profiles
+    print(f"\n✅ {selected['name']} fits {latency_budget_ms} ms (p95 {selected['single_row_p95_ms']:.3f} ms, "
+          f"accuracy {selected['accuracy']:.2%}); saved: {MODEL_OUTPUT_PATH}")
+    print(f"🚀 Served at {selected['precision']}, as recorded in {report_path}; keep the report next to the app "
+          f"or set TOUCHGUARD_FOREST_PRECISION")
+    return chosen.forest, profiles
+
 if __name__ == "__main__":
-    model, accuracy = train_improved_touchguard_model()
+    parser = argparse.ArgumentParser(description="Train the TouchGuard bot detector")
+    parser.add_argument("--data-dir", default=BASE_PATH, help="root of web_bot_detection_dataset")
+    parser.add_argument("--workers", type=int,
+                        help="feature-extraction and search processes (default: one per CPU)")
+    parser.add_argument("--cache-dir", default=FEATURE_CACHE_DIR, help="feature cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="re-extract every session without caching")
+    parser.add_argument("--variants", action="store_true",
+                        help="train and profile smaller, pruned, distilled and float32 variants")
+    parser.add_argument("--latency-budget-ms", type=float,
+                        help="with --variants, save the most accurate variant within this p95 per-request latency")
+    parser.add_argument("--report", default=VARIANTS_REPORT_PATH, help="with --variants, JSON report path")
+    parser.add_argument("--search", action="store_true",
+                        help="choose the forest's hyperparameters by parallel cross-validated search first")
+    parser.add_argument("--search-baseline", action="store_true",
+                        help="with --search, also time GridSearchCV over the same grid and report the speedup")
+    args = parser.parse_args()
+    
+    if args.variants:
+        train_model_variants(args.data_dir, args.workers, None if args.no_cache else args.cache_dir,
+                             args.latency_budget_ms, args.report)
+        raise SystemExit(0)
+    
+    model, accuracy = train_improved_touchguard_model(args.data_dir, args.workers,
+                                                      None if args.no_cache else args.cache_dir, args.search,
+                                                      args.search_baseline)
     
     if model and accuracy > 0.75:
         print(f"\n🎉 SUCCESS! Improved TouchGuard model: {accuracy:.1%} accuracy")